@@ -1,13 +1,36 @@
 # app.py
 # Run: python -m streamlit run app.py
 
+import os
+import uuid
+from datetime import datetime, timezone
+
 import streamlit as st
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
 from io import BytesIO
 
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.tables import (
+    variable_costs_frame, fixed_costs_frame, summary_frame,
+    variable_cost_items, fixed_cost_items, summary_items, SUMMARY_UNITS,
+)
+from app_custo_sublimacao.formatting import (
+    Formatter, LOCALES, CURRENCIES, Unit, NUMBER, INTEGER, PERCENT, MONEY,
+)
+from app_custo_sublimacao.risk import simulate, spread_distribution
+from app_custo_sublimacao.grid import sweep_2d, span
+from app_custo_sublimacao.optimize import price_for_margin, price_for_roi, best_usage_mix, best_shift_plan
+from app_custo_sublimacao.goalseek import break_even_table
+from app_custo_sublimacao.scenarios import ScenarioSet, BASE_NAME, evaluate_many
+from app_custo_sublimacao.store import ScenarioStore
+from app_custo_sublimacao.report import write_report, cost_report
+from app_custo_sublimacao.projection import ProjectionInputs, project
+from app_custo_sublimacao.fleet import Machine, allocate
+from app_custo_sublimacao.scheduler import ShopConfig, jobs_from_arrays, simulate_month, replicate
+from app_custo_sublimacao.artwork import CHANNELS, InkProfile, measure_coverage, job_costs
+from app_custo_sublimacao.instrument import RerunProfiler, MetricsRegistry
+from app_custo_sublimacao.reference import load_reference, file_signature, input_deltas
+
 # ========================
 # Page Configuration
 # ========================
@@ -37,75 +60,144 @@ div[data-testid="stMetricDelta"] {
 </style>
 """, unsafe_allow_html=True)
 
-# ---------- Formatting helpers ----------
-def fmt_num_en(x, decimals=2):
-    try:
-        return f"{float(x):,.{decimals}f}"
-    except Exception:
-        return str(x)
+# ---------- Caching ----------
+# Each section caches its output under the inputs it actually reads.
+# Entries are bounded per process so a busy server does not grow unbounded.
+CACHE_OPTS = dict(max_entries=256, ttl=3600, show_spinner=False)
 
-def fmt_int_en(x):
-    try:
-        return f"{int(round(float(x))):,d}"
-    except Exception:
-        return str(x)
+@st.cache_data(**CACHE_OPTS)
+def cached_costs(params):
+    return compute_costs(params)
+
+# Figures are built once per input set and shared read-only across reruns and
+# sessions. They live in the resource cache: st.cache_data would hand out a
+# pickled copy, and unpickling a Plotly figure costs as much as building it.
+chart_cache = st.cache_resource(**CACHE_OPTS)
 
-def fmt_usd(x, decimals=2):
-    return f"USD {fmt_num_en(x, decimals)}"
+# ---------- Reference data ----------
+# Price lists, machine specs and fixed-cost templates are read once per
+# process and shared read-only by every session. The file's signature
+# (mtime, size) is part of the cache key, so rewriting it reloads it.
+REFERENCE_PATH = os.environ.get(
+    "SUBLIMACAO_REFERENCE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "reference.json")
+)
 
-def label_usd_per_m(x):
-    return f"{fmt_usd(x)} /m"
+@st.cache_resource(max_entries=4)
+def reference_data(path, signature):
+    return load_reference(path)
+
+try:
+    reference, reference_error = reference_data(REFERENCE_PATH, file_signature(REFERENCE_PATH)), None
+except ValueError as e:
+    reference, reference_error = reference_data(None, None), str(e)
+
+# ---------- Inputs ----------
+# Input widgets are keyed by CostParams field and seeded here, so a saved
+# scenario can be loaded by writing session state.
+INT_INPUTS = {"usage1", "shifts_per_day", "hours_per_shift", "days_month", "years_printer", "years_cal"}
+
+def input_value(name, value):
+    return int(round(value)) if name in INT_INPUTS else float(value)
+
+def reset_to_reference(base):
+    for name, value in base.as_dict().items():
+        st.session_state[name] = input_value(name, value)
 
 # ---------- Sidebar: global options ----------
 st.sidebar.header("⚙️ Options")
 kpi_cols = st.sidebar.selectbox("KPI columns per row", [3, 4], index=1)
 dark_charts = st.sidebar.toggle("Dark charts", value=False)
 plotly_template = "plotly_dark" if dark_charts else "plotly"
+number_locale = st.sidebar.selectbox("Number format", list(LOCALES), format_func={"en-US": "1,234.56", "pt-BR": "1.234,56"}.get)
+currency = st.sidebar.selectbox("Currency", CURRENCIES, help="Label for all amounts; enter inputs in this currency.")
+fmt = Formatter.for_locale(number_locale, currency)
+CUR = fmt.currency
+
+with st.sidebar.expander("📚 Reference data"):
+    # Entries removed from the file fall back to the first one
+    for _key, _entries in (("ref_price_list", reference.price_lists), ("ref_machine", reference.machines),
+                           ("ref_fixed_costs", reference.fixed_costs)):
+        if st.session_state.get(_key) not in _entries:
+            st.session_state.pop(_key, None)
+    price_list = st.selectbox("Price list", list(reference.price_lists), key="ref_price_list")
+    machine = st.selectbox("Machine", list(reference.machines), key="ref_machine")
+    fixed_template = st.selectbox("Fixed-cost template", list(reference.fixed_costs), key="ref_fixed_costs")
+    st.caption(f"Source: `{reference.source}`" if reference.source else "Built-in defaults (no reference file).")
+    if reference_error:
+        st.error(f"Reference file not loaded: {reference_error}")
+    reference_box = st.container()
+
+# A session keeps only its own edits: inputs still at the previous reference
+# value follow the current one (new prices, another machine); edited inputs
+# stay. Re-assigning each value every run also keeps it when a widget's
+# identity changes (labels follow the chosen currency).
+input_base = reference.defaults(price_list, machine, fixed_template)
+_previous = st.session_state.get("input_base", input_base)
+for _name, _value in input_base.as_dict().items():
+    _current = st.session_state.get(_name)
+    if _current is None or _current == input_value(_name, getattr(_previous, _name)):
+        _current = input_value(_name, _value)
+    st.session_state[_name] = _current
+st.session_state["input_base"] = input_base
+if st.session_state.setdefault("reference_signature", reference.signature) != reference.signature:
+    st.session_state["reference_signature"] = reference.signature
+    st.toast("📚 Reference data reloaded; inputs you have not edited now follow it.")
+
+def table_view(items, label, value, unit):
+    # Small formatted tables stay plain dicts; st.table renders them as-is
+    return {label: [k for k, _ in items], value: fmt.format([v for _, v in items], unit)}
+
+# ---------- Sidebar: debug profiling ----------
+# Off by default; SUBLIMACAO_PROFILE=1 turns it on for every session and
+# SUBLIMACAO_METRICS_FILE names a Prometheus textfile rewritten per rerun.
+@st.cache_resource
+def metrics_registry():
+    return MetricsRegistry()
+
+with st.sidebar.expander("🐞 Debug"):
+    profile = st.toggle("Profile sections", value=os.environ.get("SUBLIMACAO_PROFILE", "") not in ("", "0"))
+    trace_memory = st.toggle("Trace memory (tracemalloc)", value=False, disabled=not profile,
+                             help="Process-wide: slows every session while on.")
+    debug_box = st.container()
+session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex[:8])
+metrics_registry().want_tracing(session_id, profile and trace_memory)
+prof = RerunProfiler(profile, trace_memory)
 
 # =========================
 # 1) Production Parameters
 # =========================
+prof.mark("inputs")
 st.header("1️⃣ Production Parameters & Capacity")
 col1, col2, col3 = st.columns(3)
 with col1:
-    width = st.number_input("Print width (m)", 0.1, 10.0, 1.6, step=0.01, help="Material usable width.")
-    speed1 = st.number_input("Speed 1 pass (m/h)", 0.0, 2000.0, 400.0)
-    speed2 = st.number_input("Speed 2 passes (m/h)", 0.0, 2000.0, 200.0)
+    width = st.number_input("Print width (m)", 0.1, 10.0, step=0.01, key="width", help="Material usable width.")
+    speed1 = st.number_input("Speed 1 pass (m/h)", 0.0, 2000.0, key="speed1")
+    speed2 = st.number_input("Speed 2 passes (m/h)", 0.0, 2000.0, key="speed2")
 
 with col2:
-    usage1 = st.slider("Usage 1 pass (%)", 0, 100, 50)
+    usage1 = st.slider("Usage 1 pass (%)", 0, 100, key="usage1")
     usage2 = 100 - usage1
     st.write(f"Usage 2 passes: **{usage2}%**")
 
-    shifts_per_day = st.number_input("Shifts per day", 1, 4, 1, step=1)
-    hours_per_shift = st.number_input("Hours per shift", 1, 12, 8, step=1)
+    shifts_per_day = st.number_input("Shifts per day", 1, 4, step=1, key="shifts_per_day")
+    hours_per_shift = st.number_input("Hours per shift", 1, 12, step=1, key="hours_per_shift")
     hours_day = shifts_per_day * hours_per_shift
     st.write(f"Total hours/day: **{hours_day}**")
 
-    days_month = st.number_input("Operating days/month", 1, 31, 24)
+    days_month = st.number_input("Operating days/month", 1, 31, key="days_month")
     total_hours_month = float(hours_day) * float(days_month)
 
+    # Keep the stored downtime within the (possibly reduced) monthly hours
+    st.session_state["downtime_h"] = min(st.session_state["downtime_h"], total_hours_month)
     downtime_h = st.number_input(
         "Downtime hours per month",
-        min_value=0.0, max_value=total_hours_month, value=0.0, step=0.1,
+        min_value=0.0, max_value=total_hours_month, step=0.1, key="downtime_h",
         help="Total hours/month when the machine is NOT producing."
     )
 
 with col3:
-    avg_speed = speed1 * usage1/100 + speed2 * usage2/100
-    productive_hours = max(0.0, total_hours_month - downtime_h)
-    prod_month = avg_speed * productive_hours
-    prod_year = prod_month * 12
-
-    st.subheader("📈 Estimated Capacity")
-    st.write(f"Monthly production (after downtime): **{fmt_int_en(prod_month)} m**")
-    st.write(f"Annual production: **{fmt_int_en(prod_year)} m**")
-    if downtime_h > 0:
-        lost = avg_speed * downtime_h
-        st.warning(f"Downtime **{fmt_num_en(downtime_h,1)} h/mo** reduces ~**{fmt_int_en(lost)} m/mo**.")
-
-utilization = (productive_hours/total_hours_month * 100) if total_hours_month > 0 else 0.0
-idle_pct = 100 - utilization
+    # Filled once the cost model has run (after all inputs are read)
+    capacity_box = st.container()
 
 # =========================
 # 2) Consumables & Variable Costs
@@ -113,60 +205,35 @@ idle_pct = 100 - utilization
 st.header("2️⃣ Consumables & Variable Costs")
 colv, colc = st.columns(2)
 with colv:
-    ink_ml = st.number_input("Ink (ml/m)", 0.0, 1000.0, 5.0)
-    ink_price_l = st.number_input("Ink price (USD/L)", 0.0, 500.0, 56.7)
+    ink_ml = st.number_input("Ink (ml/m)", 0.0, 1000.0, key="ink_ml")
+    ink_price_l = st.number_input(f"Ink price ({CUR}/L)", 0.0, 500.0, key="ink_price_l")
 
-    paper_imp_waste = st.number_input("Printing paper waste (%)", 0.0, 20.0, 5.0, step=0.1,
+    paper_imp_waste = st.number_input("Printing paper waste (%)", 0.0, 20.0, step=0.1, key="paper_imp_waste",
                                       help="Example: 5% ⇒ consumption 1.05 units/m")
     paper_imp_u = 1.0 + paper_imp_waste/100
     st.number_input(
         f"Printing paper (units/m) (consumption = 1 + {paper_imp_waste/100:.2f})",
         value=paper_imp_u, key="paper_imp_display", disabled=True
     )
-    paper_imp_price = st.number_input("Printing paper price (USD/unit)", 0.0, 10.0, 0.85)
+    paper_imp_price = st.number_input(f"Printing paper price ({CUR}/unit)", 0.0, 10.0, key="paper_imp_price")
 
-    paper_prot_waste = st.number_input("Protective paper waste (%)", 0.0, 20.0, 3.0, step=0.1,
+    paper_prot_waste = st.number_input("Protective paper waste (%)", 0.0, 20.0, step=0.1, key="paper_prot_waste",
                                        help="Example: 3% ⇒ consumption 1.03 units/m")
     paper_prot_u = 1.0 + paper_prot_waste/100
     st.number_input(
         f"Protective paper (units/m) (consumption = 1 + {paper_prot_waste/100:.2f})",
         value=paper_prot_u, key="paper_prot_display", disabled=True
     )
-    paper_prot_price = st.number_input("Protective paper price (USD/unit)", 0.0, 10.0, 0.20)
+    paper_prot_price = st.number_input(f"Protective paper price ({CUR}/unit)", 0.0, 10.0, key="paper_prot_price")
 
-    machine_kw = st.number_input("Machine consumption (kW/h)", 0.0, 1000.0, 60.0)
-    elec_price = st.number_input("Electricity price (USD/kWh)", 0.0, 10.0, 1.6)
+    machine_kw = st.number_input("Machine consumption (kW/h)", 0.0, 1000.0, key="machine_kw")
+    elec_price = st.number_input(f"Electricity price ({CUR}/kWh)", 0.0, 10.0, key="elec_price")
 
-    # Consumption summaries
-    ink_l_month = ink_ml * prod_month / 1000
-    ink_l_year = ink_l_month * 12
-    paper_imp_month = paper_imp_u * prod_month * width
-    paper_imp_year = paper_imp_month * 12
-    paper_prot_month = paper_prot_u * prod_month * width
-    paper_prot_year = paper_prot_month * 12
-    monthly_kwh = machine_kw * productive_hours
-    annual_kwh = monthly_kwh * 12
-
-    st.markdown("**Monthly/Annual Consumption**")
-    st.write(f"- Ink: **{fmt_num_en(ink_l_month)} L/mo** | **{fmt_num_en(ink_l_year)} L/yr**")
-    st.write(f"- Printing paper: **{fmt_int_en(paper_imp_month)} units/mo** | **{fmt_int_en(paper_imp_year)} units/yr**")
-    st.write(f"- Protective paper: **{fmt_int_en(paper_prot_month)} units/mo** | **{fmt_int_en(paper_prot_year)} units/yr**")
-    st.write(f"- Electricity: **{fmt_int_en(monthly_kwh)} kWh/mo** | **{fmt_int_en(annual_kwh)} kWh/yr**")
+    # Consumption summaries (filled after the cost model runs)
+    consumption_box = st.container()
 
 with colc:
-    cv_ink = ink_ml/1000 * ink_price_l
-    cv_paper_imp = paper_imp_u * paper_imp_price
-    cv_paper_prot = paper_prot_u * paper_prot_price
-    cv_elec = (machine_kw * productive_hours * elec_price) / prod_month if prod_month else 0.0
-    cost_var_per_m = cv_ink + cv_paper_imp + cv_paper_prot + cv_elec
-
-    df_var = pd.DataFrame({
-        "Item": ["Ink", "Printing paper", "Protective paper", "Electricity", "Total variable"],
-        "USD/m": [cv_ink, cv_paper_imp, cv_paper_prot, cv_elec, cost_var_per_m]
-    })
-    df_var_view = df_var.copy()
-    df_var_view["USD/m"] = df_var_view["USD/m"].map(fmt_usd)
-    st.table(df_var_view)
+    var_table_box = st.container()
 
 # =========================
 # 3) Monthly Fixed Costs
@@ -174,157 +241,266 @@ with colc:
 st.header("3️⃣ Monthly Fixed Costs")
 colf1, colf2 = st.columns(2)
 with colf1:
-    salary = st.number_input("Salaries (USD/month)", 0.0, 100000.0, 25340.0)
-    invest_printer = st.number_input("Printer investment (USD)", 0.0, 1e7, 450000.0)
-    years_printer = st.number_input("Printer depreciation (years)", 1, 50, 4)
+    salary = st.number_input(f"Salaries ({CUR}/month)", 0.0, 100000.0, key="salary")
+    invest_printer = st.number_input(f"Printer investment ({CUR})", 0.0, 1e7, key="invest_printer")
+    years_printer = st.number_input("Printer depreciation (years)", 1, 50, key="years_printer")
 with colf2:
-    invest_cal = st.number_input("Calender investment (USD)", 0.0, 1e7, 150000.0)
-    years_cal = st.number_input("Calender depreciation (years)", 1, 50, 5)
-    rent = st.number_input("Rent (USD/month)", 0.0, 50000.0, 8000.0)
-other_fixed = st.number_input("Other fixed costs (USD/month)", 0.0, 100000.0, 0.0)
-maintenance = st.number_input("Maintenance (USD/month)", 0.0, 100000.0, 0.0)
-
-depr_printer_m = invest_printer / years_printer / 12
-depr_cal_m = invest_cal / years_cal / 12
-fixed_cost_month = salary + depr_printer_m + depr_cal_m + rent + other_fixed + maintenance
+    invest_cal = st.number_input(f"Calender investment ({CUR})", 0.0, 1e7, key="invest_cal")
+    years_cal = st.number_input("Calender depreciation (years)", 1, 50, key="years_cal")
+    rent = st.number_input(f"Rent ({CUR}/month)", 0.0, 50000.0, key="rent")
+other_fixed = st.number_input(f"Other fixed costs ({CUR}/month)", 0.0, 100000.0, key="other_fixed")
+maintenance = st.number_input(f"Maintenance ({CUR}/month)", 0.0, 100000.0, key="maintenance")
 
-df_fix = pd.DataFrame({
-    "Item": ["Salaries", "Printer depreciation", "Calender depreciation", "Rent", "Other", "Maintenance", "Total"],
-    "USD/month": [salary, depr_printer_m, depr_cal_m, rent, other_fixed, maintenance, fixed_cost_month]
-})
-df_fix_view = df_fix[df_fix["Item"] != "Total"].copy()
-df_fix_view["USD/month"] = df_fix_view["USD/month"].map(fmt_usd)
-st.table(df_fix_view)
+fix_table_box = st.container()
 
 # =========================
 # 3.1) Quick KPIs (native)
 # =========================
 st.header("📌 Quick Summary (KPIs)")
-sell_price = st.number_input("Selling price (USD/m)", 0.0, 100.0, 4.5)
-
-revenue_m = sell_price * prod_month
-var_total_m = cost_var_per_m * prod_month
-profit_m = revenue_m - var_total_m - fixed_cost_month
-roi_pct = (profit_m * 12) / (invest_printer + invest_cal) * 100 if (invest_printer + invest_cal) > 0 else 0
-BE_m = fixed_cost_month / (sell_price - cost_var_per_m) if sell_price > cost_var_per_m else None
-fixed_per_m = (fixed_cost_month / prod_month) if prod_month > 0 else np.nan
-total_cost_per_m = cost_var_per_m + (fixed_per_m if pd.notna(fixed_per_m) else 0)
-gross_margin_per_m = sell_price - cost_var_per_m
-net_margin_per_m = (profit_m / prod_month) if prod_month > 0 else np.nan
+sell_price = st.number_input(f"Selling price ({CUR}/m)", 0.0, 100.0, key="sell_price")
+
+# ---------- Cost model (single evaluation for the whole page) ----------
+prof.mark("model")
+params = CostParams(
+    width=width, speed1=speed1, speed2=speed2, usage1=usage1,
+    shifts_per_day=shifts_per_day, hours_per_shift=hours_per_shift,
+    days_month=days_month, downtime_h=downtime_h,
+    ink_ml=ink_ml, ink_price_l=ink_price_l,
+    paper_imp_waste=paper_imp_waste, paper_imp_price=paper_imp_price,
+    paper_prot_waste=paper_prot_waste, paper_prot_price=paper_prot_price,
+    machine_kw=machine_kw, elec_price=elec_price,
+    salary=salary, invest_printer=invest_printer, years_printer=years_printer,
+    invest_cal=invest_cal, years_cal=years_cal, rent=rent,
+    other_fixed=other_fixed, maintenance=maintenance,
+    sell_price=sell_price,
+)
+res = cached_costs(params)
+
+avg_speed = res.avg_speed
+productive_hours = res.productive_hours
+prod_month = res.prod_month
+prod_year = res.prod_year
+utilization = res.utilization
+cv_ink, cv_paper_imp, cv_paper_prot, cv_elec = res.cv_ink, res.cv_paper_imp, res.cv_paper_prot, res.cv_elec
+cost_var_per_m = res.cost_var_per_m
+depr_printer_m, depr_cal_m = res.depr_printer_m, res.depr_cal_m
+fixed_cost_month = res.fixed_cost_month
+profit_m = res.profit_m
+roi_pct = res.roi_pct
+BE_m = None if np.isnan(res.BE_m) else res.BE_m
+total_cost_per_m = res.total_cost_per_m
+gross_margin_per_m = res.gross_margin_per_m
+net_margin_per_m = res.net_margin_per_m
+
+with reference_box:
+    deltas = input_deltas(params, input_base)
+    st.caption(f"{len(deltas)} input(s) differ from the reference." if deltas else "All inputs match the reference.")
+    st.button("Reset inputs to reference", on_click=reset_to_reference, args=(input_base,),
+              disabled=not deltas, use_container_width=True)
+
+# ---------- Sidebar: scenario library ----------
+prof.mark("scenario library")
+@st.cache_resource
+def scenario_store():
+    return ScenarioStore()
+
+def load_saved_scenario(scenario_id):
+    # Runs as a button callback, before the input widgets are created
+    _, saved = scenario_store().load(scenario_id)
+    for name, value in saved.as_dict().items():
+        st.session_state[name] = input_value(name, value)
+
+def scenario_label(rec):
+    kpis = f" · {fmt.money(rec.profit_m, 0)}/mo" if rec.profit_m is not None else ""
+    where = " · ".join(x for x in (rec.plant, rec.customer) if x)
+    return f"{rec.name} ({rec.created_at[:10]}{' · ' + where if where else ''}){kpis}"
+
+with st.sidebar.expander("💾 Scenario library"):
+    store = scenario_store()
+    with st.form("save_scenario", clear_on_submit=True, border=False):
+        save_name = st.text_input("Name")
+        save_plant = st.text_input("Plant")
+        save_customer = st.text_input("Customer")
+        if st.form_submit_button("Save current inputs") and save_name.strip():
+            store.save(params, save_name.strip(), save_plant.strip(), save_customer.strip())
+            st.toast(f"Saved “{save_name.strip()}”")
+    st.divider()
+    plant_filter = st.selectbox("Filter by plant", [""] + store.distinct("plant"), format_func=lambda v: v or "All plants")
+    customer_filter = st.selectbox("Filter by customer", [""] + store.distinct("customer"), format_func=lambda v: v or "All customers")
+    name_filter = st.text_input("Search name")
+    saved = store.list(plant=plant_filter, customer=customer_filter, name_like=name_filter.strip(), limit=200)
+    if saved:
+        by_id = {rec.id: rec for rec in saved}
+        chosen_id = st.selectbox("Saved scenarios", list(by_id), format_func=lambda i: scenario_label(by_id[i]))
+        st.button("Load", on_click=load_saved_scenario, args=(chosen_id,), use_container_width=True)
+    else:
+        st.caption("No saved scenarios match.")
+
+prof.mark("capacity")
+with capacity_box:
+    st.subheader("📈 Estimated Capacity")
+    st.write(f"Monthly production (after downtime): **{fmt.integer(prod_month)} m**")
+    st.write(f"Annual production: **{fmt.integer(prod_year)} m**")
+    if downtime_h > 0:
+        lost = avg_speed * downtime_h
+        st.warning(f"Downtime **{fmt.num(downtime_h,1)} h/mo** reduces ~**{fmt.integer(lost)} m/mo**.")
+
+with consumption_box:
+    ink_l_month = ink_ml * prod_month / 1000
+    paper_imp_month = res.paper_imp_u * prod_month * width
+    paper_prot_month = res.paper_prot_u * prod_month * width
+    monthly_kwh = machine_kw * productive_hours
+    st.markdown("**Monthly/Annual Consumption**")
+    st.write(f"- Ink: **{fmt.num(ink_l_month)} L/mo** | **{fmt.num(ink_l_month*12)} L/yr**")
+    st.write(f"- Printing paper: **{fmt.integer(paper_imp_month)} units/mo** | **{fmt.integer(paper_imp_month*12)} units/yr**")
+    st.write(f"- Protective paper: **{fmt.integer(paper_prot_month)} units/mo** | **{fmt.integer(paper_prot_month*12)} units/yr**")
+    st.write(f"- Electricity: **{fmt.integer(monthly_kwh)} kWh/mo** | **{fmt.integer(monthly_kwh*12)} kWh/yr**")
 
 # Row 1 of KPIs
+prof.mark("kpis")
 row1 = st.columns(kpi_cols)
 with row1[0]:
-    st.metric("Production (month)", f"{fmt_int_en(prod_month)} m")
+    st.metric("Production (month)", f"{fmt.integer(prod_month)} m")
 with row1[1]:
     if BE_m is not None:
         gap = prod_month - BE_m
-        st.metric("Break-even (month)", f"{fmt_int_en(BE_m)} m",
-                  delta=f"{'+' if gap >= 0 else ''}{fmt_int_en(gap)} m vs BE")
+        st.metric("Break-even (month)", f"{fmt.integer(BE_m)} m",
+                  delta=f"{'+' if gap >= 0 else ''}{fmt.integer(gap)} m vs BE")
     else:
         st.metric("Break-even (month)", "—")
 with row1[2]:
-    st.metric("Profit (month)", fmt_usd(profit_m),
-              delta=f"{'+' if profit_m >= 0 else ''}{fmt_usd(profit_m)}")
+    st.metric("Profit (month)", fmt.money(profit_m),
+              delta=f"{'+' if profit_m >= 0 else ''}{fmt.money(profit_m)}")
 if kpi_cols == 4:
     with row1[3]:
-        st.metric("ROI (annual)", f"{fmt_num_en(roi_pct,1)}%",
-                  delta=f"{'+' if roi_pct >= 0 else ''}{fmt_num_en(roi_pct,1)}%")
+        st.metric("ROI (annual)", f"{fmt.num(roi_pct,1)}%",
+                  delta=f"{'+' if roi_pct >= 0 else ''}{fmt.num(roi_pct,1)}%")
 
 # Row 2 of KPIs
 row2 = st.columns(kpi_cols)
 with row2[0]:
-    st.metric("Total cost per meter", label_usd_per_m(total_cost_per_m))
+    st.metric("Total cost per meter", fmt.money_per_m(total_cost_per_m))
 with row2[1]:
-    st.metric("Gross margin per meter", label_usd_per_m(gross_margin_per_m),
-              delta=f"{'+' if gross_margin_per_m>=0 else ''}{label_usd_per_m(gross_margin_per_m)}")
+    st.metric("Gross margin per meter", fmt.money_per_m(gross_margin_per_m),
+              delta=f"{'+' if gross_margin_per_m>=0 else ''}{fmt.money_per_m(gross_margin_per_m)}")
 with row2[2]:
     st.metric("Net margin per meter",
-              (label_usd_per_m(net_margin_per_m) if pd.notna(net_margin_per_m) else "—"))
+              (fmt.money_per_m(net_margin_per_m) if np.isfinite(net_margin_per_m) else "—"))
 if kpi_cols == 4:
     with row2[3]:
-        st.metric("Utilization", f"{fmt_num_en(utilization,1)}% (Idle {fmt_num_en(100-utilization,1)}%)")
+        st.metric("Utilization", f"{fmt.num(utilization,1)}% (Idle {fmt.num(100-utilization,1)}%)")
+
+# ---------- Deferred imports ----------
+# pandas (~0.5 s on a cold interpreter) is first needed by the tables below:
+# st.table converts its data with pandas, so the cost tables are filled into
+# their placeholders only now, after the KPIs have been sent.
+import pandas as pd
+
+prof.mark("variable costs")
+with var_table_box:
+    st.table(table_view(variable_cost_items(res), "Item", f"{CUR}/m", MONEY))
+
+prof.mark("fixed costs")
+fixed_items = tuple(fixed_cost_items(params, res)[:-1])
+with fix_table_box:
+    st.table(table_view(fixed_items, "Item", f"{CUR}/month", MONEY))
 
 # =========================
 # 4) Charts (2 per row)
 # =========================
-st.header("4️⃣ Cost Charts")
-if prod_month > 0:
-    fixed_per_m_series = df_fix[df_fix["Item"] != "Total"].set_index("Item")["USD/month"] / prod_month
-    var_series = pd.Series([cv_ink, cv_paper_imp, cv_paper_prot, cv_elec],
-                           index=["Ink", "Printing paper", "Protective paper", "Electricity"])
-
-    # Direct vs Indirect (per meter)
-    direct_cost = float(var_series.sum())
-    indirect_cost = float(fixed_per_m_series.sum())
-    fig_ci = go.Figure(data=[
+@chart_cache
+def build_fig_ci(direct_cost, indirect_cost, template, fmt):
+    import plotly.graph_objects as go
+    fig = go.Figure(data=[
         go.Bar(
             x=["Direct", "Indirect"],
             y=[direct_cost, indirect_cost],
             marker_color=["#66c2a5", "#fc8d62"],
-            text=[label_usd_per_m(direct_cost), label_usd_per_m(indirect_cost)],
+            text=[fmt.money_per_m(direct_cost), fmt.money_per_m(indirect_cost)],
             textposition="outside",
             textfont=dict(size=13),
             cliponaxis=False,
             width=0.5
         )
     ])
-    fig_ci.update_layout(
-        template=plotly_template,
+    fig.update_layout(
+        template=template,
         title=dict(text="Direct vs Indirect<br>Costs per Meter", x=0.5, y=0.9, font=dict(size=17)),
-        yaxis_title="USD/meter",
+        yaxis_title=f"{fmt.currency}/meter",
         height=300, width=460,
         margin=dict(t=46, b=28, l=36, r=18),
         uniformtext_minsize=12, uniformtext_mode='hide'
     )
+    return fig
 
-    # Fixed per meter
-    def fix_label(v):
-        pct = (v/fixed_per_m_series.sum()*100) if fixed_per_m_series.sum() else 0
-        return f"{label_usd_per_m(v)}<br>({fmt_num_en(pct,1)}%)"
+def _share_label(v, total, fmt):
+    pct = (v/total*100) if total else 0
+    return f"{fmt.money_per_m(v)}<br>({fmt.num(pct,1)}%)"
 
-    fig_fix = go.Figure(data=[
+# Fixed per meter: depends only on the fixed-cost items and prod_month
+@chart_cache
+def build_fig_fix(fixed_items, prod_month, template, fmt):
+    import plotly.graph_objects as go
+    labels = [k for k, _ in fixed_items]
+    values = [v / prod_month for _, v in fixed_items]
+    total = sum(values)
+    fig = go.Figure(data=[
         go.Bar(
-            y=list(fixed_per_m_series.index),
-            x=list(fixed_per_m_series.values),
+            y=labels,
+            x=values,
             orientation="h",
             marker_color="#1f77b4",
-            text=[fix_label(v) for v in fixed_per_m_series.values],
+            text=[_share_label(v, total, fmt) for v in values],
             textposition="auto",
             cliponaxis=False
         )
     ])
-    fig_fix.update_layout(
-        template=plotly_template,
+    fig.update_layout(
+        template=template,
         title=dict(text="Fixed Costs<br>per Meter", x=0.5, y=0.9, font=dict(size=17)),
-        xaxis_title="USD/meter",
+        xaxis_title=f"{fmt.currency}/meter",
         height=330, width=500,
         margin=dict(t=46, b=28, l=36, r=18)
     )
+    return fig
 
-    # Variable per meter
-    def var_label(v):
-        pct = (v/var_series.sum()*100) if var_series.sum() else 0
-        return f"{label_usd_per_m(v)}<br>({fmt_num_en(pct,1)}%)"
-
-    fig_var = go.Figure(data=[
+# Variable per meter: depends only on the cv_* terms
+@chart_cache
+def build_fig_var(var_items, template, fmt):
+    import plotly.graph_objects as go
+    labels = [k for k, _ in var_items]
+    values = [v for _, v in var_items]
+    total = sum(values)
+    fig = go.Figure(data=[
         go.Bar(
-            y=list(var_series.index),
-            x=list(var_series.values),
+            y=labels,
+            x=values,
             orientation="h",
             marker_color="#ff7f0e",
-            text=[var_label(v) for v in var_series.values],
+            text=[_share_label(v, total, fmt) for v in values],
             textposition="auto",
             cliponaxis=False
         )
     ])
-    fig_var.update_layout(
-        template=plotly_template,
+    fig.update_layout(
+        template=template,
         title=dict(text="Variable Costs<br>per Meter", x=0.5, y=0.9, font=dict(size=17)),
-        xaxis_title="USD/meter",
+        xaxis_title=f"{fmt.currency}/meter",
         height=330, width=500,
         margin=dict(t=46, b=28, l=36, r=18)
     )
+    return fig
+
+prof.mark("charts")
+st.header("4️⃣ Cost Charts")
+if prod_month > 0:
+    var_items = (("Ink", cv_ink), ("Printing paper", cv_paper_imp),
+                 ("Protective paper", cv_paper_prot), ("Electricity", cv_elec))
+
+    # Direct vs Indirect (per meter)
+    fig_ci = build_fig_ci(cost_var_per_m, fixed_cost_month / prod_month, plotly_template, fmt)
+    fig_fix = build_fig_fix(fixed_items, prod_month, plotly_template, fmt)
+    fig_var = build_fig_var(var_items, plotly_template, fmt)
 
     cA, cB = st.columns(2)
     with cA:
@@ -338,197 +514,864 @@ else:
 # =========================
 # 5) Summary & ROI (table)
 # =========================
+def summary_view(res):
+    items = summary_items(res, CUR)
+    return {"Metric": [k for k, _ in items],
+            "Value": [fmt(round(v, 2), unit) for (_, v), unit in zip(items, SUMMARY_UNITS)]}
+
+prof.mark("summary")
 st.header("5️⃣ Summary & ROI")
-df_sum = pd.DataFrame({
-    "Metric": ["Production (m)", "Revenue (USD)", "Variable cost (USD)", "Fixed cost (USD)", "Profit (USD)", "ROI (%)"],
-    "Value": [prod_month, sell_price*prod_month, cost_var_per_m*prod_month, fixed_cost_month, profit_m, roi_pct]
-}).round(2)
-df_sum_view = df_sum.copy()
-df_sum_view.loc[df_sum_view["Metric"] == "Production (m)","Value"] = df_sum_view.loc[df_sum_view["Metric"]=="Production (m)","Value"].map(lambda v: f"{fmt_int_en(v)} m")
-for m in ["Revenue (USD)", "Variable cost (USD)", "Fixed cost (USD)", "Profit (USD)"]:
-    df_sum_view.loc[df_sum_view["Metric"] == m, "Value"] = df_sum_view.loc[df_sum_view["Metric"] == m, "Value"].map(fmt_usd)
-df_sum_view.loc[df_sum_view["Metric"] == "ROI (%)", "Value"] = df_sum_view.loc[df_sum_view["Metric"] == "ROI (%)", "Value"].map(lambda v: f"{fmt_num_en(v,1)}%")
-st.table(df_sum_view)
+st.table(summary_view(res))
 
 # =========================
-# 6) Export (CSV + Excel)
+# 6) Export (CSV, Excel, Parquet)
 # =========================
-st.header("6️⃣ Export Reports")
-c1, c2, c3, c4 = st.columns(4)
-csv_var = df_var.to_csv(index=False).encode("utf-8")
-csv_fix = df_fix[df_fix["Item"] != "Total"].to_csv(index=False).encode("utf-8")
-csv_sum = df_sum.to_csv(index=False).encode("utf-8")
-with c1:
-    st.download_button("Variables CSV (USD)", csv_var, file_name="variables.csv")
-with c2:
-    st.download_button("Fixed CSV (USD)", csv_fix, file_name="fixed.csv")
-with c3:
-    st.download_button("Summary CSV (USD)", csv_sum, file_name="summary.csv")
-
-with c4:
+# Reports are built only when requested, and cached per parameter set,
+# so reruns that never download pay nothing for them.
+@st.cache_data(**CACHE_OPTS)
+def build_csv_exports(params, currency):
+    res = cached_costs(params)
+    df_fix = fixed_costs_frame(params, res, currency)
+    return (
+        variable_costs_frame(res, currency).to_csv(index=False).encode("utf-8"),
+        df_fix[df_fix["Item"] != "Total"].to_csv(index=False).encode("utf-8"),
+        summary_frame(res, currency).to_csv(index=False).encode("utf-8"),
+    )
+
+# Full report formats: (label, MIME type); the key is also the file extension
+REPORT_FORMATS = {
+    "xlsx": ("Excel", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv.zip": ("CSV (zip)", "application/zip"),
+    "parquet.zip": ("Parquet (zip)", "application/zip"),
+}
+
+@st.cache_data(**CACHE_OPTS)
+def build_report(params, currency, kind, scenarios=()):
+    # Rows are streamed into the file (Excel in constant_memory mode). The
+    # bytes are cached for up to an hour, so they carry no generation time;
+    # the download's file name is stamped when it is served instead.
     output = BytesIO()
-    with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-        df_var.to_excel(writer, index=False, sheet_name="Variables")
-        df_fix.to_excel(writer, index=False, sheet_name="Fixed")
-        df_sum.to_excel(writer, index=False, sheet_name="Summary")
-        params = {
-            "width_m": [width],
-            "speed1_mph": [speed1],
-            "speed2_mph": [speed2],
-            "usage1_%": [usage1],
-            "usage2_%": [usage2],
-            "shifts_per_day": [shifts_per_day],
-            "hours_per_shift": [hours_per_shift],
-            "days_month": [days_month],
-            "downtime_h": [downtime_h],
-            "sell_price_usd_m": [sell_price],
-            "prod_month_m": [prod_month],
-            "utilization_%": [utilization],
-        }
-        pd.DataFrame(params).to_excel(writer, index=False, sheet_name="Parameters")
-    st.download_button("Download Excel (all tabs)",
-                       output.getvalue(),
-                       file_name="sublimation_report.xlsx",
-                       mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    write_report(output, cost_report(params, cached_costs(params), currency, scenarios, stamp=False), kind, currency)
+    return output.getvalue()
+
+def defined_scenarios(params):
+    # What-if scenarios of this session, resolved on the current inputs
+    ss = st.session_state.get("scenario_set")
+    if ss is None:
+        return ()
+    ss.set_base(params)
+    return tuple((name, ss.params(name)) for name in ss.names)
+
+@st.fragment
+def export_section(params):
+    if st.button("Prepare reports", help="Build the CSV/Excel files for the current inputs."):
+        st.session_state["exports_for"] = params
+    if st.session_state.get("exports_for") != params:
+        st.caption("Reports are generated on request for the current inputs.")
+        return
+    csv_var, csv_fix, csv_sum = build_csv_exports(params, CUR)
+    c1, c2, c3, c4 = st.columns(4)
+    with c1:
+        st.download_button(f"Variables CSV ({CUR})", csv_var, file_name="variables.csv", on_click="ignore")
+    with c2:
+        st.download_button(f"Fixed CSV ({CUR})", csv_fix, file_name="fixed.csv", on_click="ignore")
+    with c3:
+        st.download_button(f"Summary CSV ({CUR})", csv_sum, file_name="summary.csv", on_click="ignore")
+    with c4:
+        kind = st.selectbox("Full report", list(REPORT_FORMATS), format_func=lambda k: REPORT_FORMATS[k][0],
+                            help="All tables, full parameter provenance and the what-if scenarios.")
+        st.download_button(f"Download {REPORT_FORMATS[kind][0]} (all tabs)",
+                           build_report(params, CUR, kind, defined_scenarios(params)),
+                           file_name=f"sublimation_report_{datetime.now(timezone.utc):%Y%m%dT%H%MZ}.{kind}",
+                           mime=REPORT_FORMATS[kind][1],
+                           on_click="ignore")
+
+prof.mark("export")
+st.header("6️⃣ Export Reports")
+export_section(params)
 
 # =========================
 # 7) Break-even
 # =========================
+# Revenue and total cost are straight lines: two points each are enough
+@chart_cache
+def build_fig_be(sell_price, cost_var_per_m, fixed_cost_month, prod_month, template, fmt):
+    import plotly.graph_objects as go
+    be = fixed_cost_month / (sell_price - cost_var_per_m)
+    x = np.array([0.0, max(prod_month, be*1.2)])
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=x, y=sell_price * x, mode="lines", name="Revenue"))
+    fig.add_trace(go.Scatter(x=x, y=fixed_cost_month + cost_var_per_m * x, mode="lines", name="Total cost"))
+    fig.add_vline(x=be, line_dash="dash", line_color="red",
+                  annotation_text=f"BE: {fmt.integer(be)} m", annotation_position="top left")
+    fig.update_layout(
+        template=template,
+        xaxis_title="Meters", yaxis_title=fmt.currency,
+        height=350, margin=dict(t=28, b=28, l=36, r=18)
+    )
+    return fig
+
+prof.mark("break-even")
 st.header("7️⃣ Break-even Point")
 if sell_price > cost_var_per_m:
     be = fixed_cost_month / (sell_price - cost_var_per_m)
     st.success(
-        f"🎯 With selling price **{fmt_usd(sell_price)} /m**, "
-        f"you must print **{fmt_int_en(be)} m/month** to avoid losses."
+        f"🎯 With selling price **{fmt.money(sell_price)} /m**, "
+        f"you must print **{fmt.integer(be)} m/month** to avoid losses."
     )
     if prod_month < be:
-        st.warning(f"🚩 Current production (**{fmt_int_en(prod_month)} m/month**) is **below BE**.")
+        st.warning(f"🚩 Current production (**{fmt.integer(prod_month)} m/month**) is **below BE**.")
     else:
-        st.info(f"✅ Current production (**{fmt_int_en(prod_month)} m/month**) is **above BE**.")
-
-    x = np.linspace(0, max(prod_month, be*1.2), 100)
-    rev_curve = sell_price * x
-    cost_curve = fixed_cost_month + cost_var_per_m * x
-    fig, ax = plt.subplots(figsize=(7, 3.5))
-    ax.plot(x, rev_curve, label="Revenue")
-    ax.plot(x, cost_curve, label="Total cost")
-    ax.axvline(be, ls="--", label=f"BE: {fmt_int_en(be)} m", color="red")
-    ax.set_xlabel("Meters"); ax.set_ylabel("USD"); ax.legend()
-    st.pyplot(fig, use_container_width=True)
+        st.info(f"✅ Current production (**{fmt.integer(prod_month)} m/month**) is **above BE**.")
+
+    fig = build_fig_be(sell_price, cost_var_per_m, fixed_cost_month, prod_month, plotly_template, fmt)
+    st.plotly_chart(fig, use_container_width=True)
 else:
     if prod_month > 0:
         min_price = (fixed_cost_month / prod_month) + cost_var_per_m
         st.error(
-            f"❌ With current production **{fmt_int_en(prod_month)} m/month**, "
-            f"minimum price to avoid loss is **{fmt_usd(min_price)} /m**."
+            f"❌ With current production **{fmt.integer(prod_month)} m/month**, "
+            f"minimum price to avoid loss is **{fmt.money(min_price)} /m**."
         )
     else:
         st.error("❌ Monthly production is zero. Enter positive values.")
 
+# ---------- Optimizer (target prices, pass mix, shifts) ----------
+@st.cache_data(**CACHE_OPTS)
+def build_optimizer(params, margin_pct, roi_target, min_two_pass, demand_m):
+    return (price_for_margin(params, margin_pct), price_for_roi(params, roi_target),
+            best_usage_mix(params, min_two_pass), best_shift_plan(params, demand_m or None))
+
+@st.fragment
+def optimizer_section(params):
+    with st.expander("🧮 Price & capacity optimizer"):
+        o1, o2, o3, o4 = st.columns(4)
+        with o1:
+            margin_pct = st.number_input("Target net margin (%)", 0.0, 95.0, 20.0, step=1.0)
+        with o2:
+            roi_target = st.number_input("Target ROI (annual %)", -100.0, 1000.0, 30.0, step=5.0)
+        with o3:
+            min_two_pass = st.slider("Min. 2-pass share (%)", 0, 100, int(100 - params.usage1),
+                                     help="Quality constraint for the 1-pass/2-pass mix.")
+        with o4:
+            demand_m = st.number_input("Demand (m/month, 0 = unlimited)", 0.0, 1e7, 0.0, step=1000.0)
+        p_margin, p_roi, mix, plan = build_optimizer(params, margin_pct, roi_target, min_two_pass, demand_m)
+
+        r1 = st.columns(4)
+        with r1[0]:
+            st.metric(f"Price for {fmt.num(margin_pct,0)}% margin",
+                      fmt.money_per_m(p_margin) if np.isfinite(p_margin) else "—")
+        with r1[1]:
+            st.metric(f"Price for {fmt.num(roi_target,0)}% ROI",
+                      fmt.money_per_m(p_roi) if np.isfinite(p_roi) else "—")
+        with r1[2]:
+            st.metric("Best mix (1 pass / 2 passes)", f"{fmt.integer(mix.usage1)}% / {fmt.integer(mix.usage2)}%",
+                      delta=f"{fmt.money(mix.profit_m - cached_costs(params).profit_m)} profit/mo")
+        with r1[3]:
+            st.metric("Cheapest shift setup", f"{plan.shifts_per_day} × {plan.hours_per_shift} h",
+                      delta=f"{fmt.money_per_m(plan.cost_per_m)}", delta_color="off")
+        if not plan.meets_demand:
+            st.warning(f"No shift setup reaches the demand; the best one prints {fmt.integer(plan.prod_month)} m/month.")
+        st.caption("Shift setup assumes payroll scales with the number of shifts; "
+                   "cost is per delivered meter (capped at demand).")
+
+optimizer_section(params)
+
 # =========================
 # 8) Sensitivity Analysis
 # =========================
-st.header("8️⃣ Sensitivity Analysis")
-perc = st.slider("Variation (%)", -50, 50, 10)
-be_base = fixed_cost_month / (sell_price - cost_var_per_m) if sell_price > cost_var_per_m else None
-
-def calc_sensitivity(param, base):
-    adj = base * (1 + perc/100)
-    if param == "ink":
-        cv_new = adj/1000 * ink_price_l
-        cost_var_new = cv_new + cv_paper_imp + cv_paper_prot + cv_elec
-    elif param == "energy":
-        kwh_new = adj * productive_hours
-        cv_new = kwh_new * elec_price / prod_month if prod_month else 0
-        cost_var_new = cv_ink + cv_paper_imp + cv_paper_prot + cv_new
-    elif param == "salary":
-        cost_var_new = cost_var_per_m
-    else:
-        cost_var_new = cost_var_per_m
-
-    fixed_new = (adj + depr_printer_m + depr_cal_m + rent + other_fixed + maintenance) if param == "salary" else fixed_cost_month
-    profit_new = (sell_price * prod_month) - cost_var_new * prod_month - fixed_new
-    roi_new = (profit_new * 12) / (invest_printer + invest_cal) * 100 if (invest_printer + invest_cal) > 0 else 0
-    be_new = fixed_new / (sell_price - cost_var_new) if sell_price > cost_var_new else None
-    return round(roi_new, 2), (round(be_new, 0) if be_new is not None else None)
-
-params = [
-    ("Ink (ml/m)", "ink", ink_ml),
-    ("Energy (kW/h)", "energy", machine_kw),
-    ("Salaries (USD/month)", "salary", salary)
-]
-rows = []
-for label, key, base in params:
-    roi_adj, be_adj = calc_sensitivity(key, base)
-    rows.append({
-        "Parameter": label,
-        "ROI Base (%)": round(roi_pct, 2),
-        f"ROI {perc}% (%)": roi_adj,
-        "BE Base (m)": round(be_base, 0) if be_base is not None else None,
-        f"BE {perc}% (m)": be_adj
+@st.cache_data(**CACHE_OPTS)
+def build_sensitivity(params, perc, fmt):
+    base = cached_costs(params)
+    sens_params = [
+        ("Ink (ml/m)", "ink_ml"),
+        ("Energy (kW/h)", "machine_kw"),
+        (f"Salaries ({fmt.currency}/month)", "salary"),
+    ]
+    # All variations in one vectorized evaluation
+    adj = evaluate_many([params.replace(**{key: getattr(params, key) * (1 + perc/100)}) for _, key in sens_params],
+                        metrics=("roi_pct", "BE_m"))
+    n = len(sens_params)
+    return {
+        "Parameter": [label for label, _ in sens_params],
+        "ROI Base (%)": fmt.format(np.full(n, round(base.roi_pct, 2)), PERCENT),
+        f"ROI {perc}% (%)": fmt.format(adj["roi_pct"].round(2), PERCENT),
+        "BE Base (m)": fmt.format(np.full(n, base.BE_m), INTEGER),
+        f"BE {perc}% (m)": fmt.format(adj["BE_m"], INTEGER),
+    }
+
+# Fragment: moving the slider reruns only this section
+@st.fragment
+def sensitivity_section(params):
+    perc = st.slider("Variation (%)", -50, 50, 10)
+    st.table(build_sensitivity(params, perc, fmt))
+
+# ---------- Goal seek: each input's threshold for a target ----------
+# Ranges of the input widgets above, for the goal seek and the scenario
+# editor. Downtime's widget limit follows the current schedule, and a
+# scenario may change that schedule, so this allows the hours of a 31-day
+# month (goal seek also caps it at the current schedule).
+INPUT_LIMITS = {
+    "ink_ml": (0.0, 1000.0), "ink_price_l": (0.0, 500.0),
+    "paper_imp_waste": (0.0, 20.0), "paper_imp_price": (0.0, 10.0),
+    "paper_prot_waste": (0.0, 20.0), "paper_prot_price": (0.0, 10.0),
+    "speed1": (0.0, 2000.0), "speed2": (0.0, 2000.0), "usage1": (0, 100),
+    "shifts_per_day": (1, 4), "hours_per_shift": (1, 12), "days_month": (1, 31), "downtime_h": (0.0, 24.0 * 31),
+    "machine_kw": (0.0, 1000.0), "elec_price": (0.0, 10.0),
+    "salary": (0.0, 100000.0), "rent": (0.0, 50000.0), "sell_price": (0.0, 100.0),
+}
+GOAL_INPUT_LABELS = {
+    "downtime_h": "Downtime (h/month)",
+    "ink_price_l": f"Ink price ({CUR}/L)",
+    "elec_price": f"Electricity price ({CUR}/kWh)",
+    "salary": f"Salaries ({CUR}/month)",
+    "paper_imp_waste": "Printing paper waste (%)",
+    "paper_prot_waste": "Protective paper waste (%)",
+    "sell_price": f"Selling price ({CUR}/m)",
+    "usage1": "Usage 1 pass (%)",
+}
+GOAL_TARGETS = {"profit_m": f"Monthly profit ({CUR})", "roi_pct": "ROI (annual %)",
+                "payback_months": "Break-even date (payback)"}
+
+@st.cache_data(**CACHE_OPTS)
+def build_goal_seek(params, metric, target):
+    return break_even_table(params, tuple(GOAL_INPUT_LABELS), metric, target, INPUT_LIMITS)
+
+@st.fragment
+def goal_seek_section(params):
+    st.subheader("🎯 Goal Seek")
+    g1, g2 = st.columns(2)
+    with g1:
+        metric = st.selectbox("Target", list(GOAL_TARGETS), format_func=GOAL_TARGETS.get, key="goal_metric")
+    with g2:
+        if metric == "payback_months":
+            today = pd.Timestamp.today().normalize()
+            when = st.date_input("Investment recovered by", (today + pd.DateOffset(months=24)).date(),
+                                 min_value=(today + pd.DateOffset(days=1)).date())
+            target = (pd.Timestamp(when) - today).days / (365.25 / 12)
+        else:
+            target = st.number_input(GOAL_TARGETS[metric], value=0.0 if metric == "profit_m" else 20.0,
+                                     step=1000.0 if metric == "profit_m" else 1.0)
+    df_goal = build_goal_seek(params, metric, float(target))
+    st.table({
+        "Input": [GOAL_INPUT_LABELS[k] for k in df_goal["input"]],
+        "Current": fmt.format(df_goal["base"]),
+        "Threshold": fmt.format(df_goal["value"]),
+        "Change": fmt.format(df_goal["change"], Unit(sign=True)),
+        "Change (%)": [c if np.isnan(v) or not np.isnan(p) else "n/a" for c, v, p in
+                       zip(fmt.format(df_goal["change_pct"], Unit(decimals=1, suffix="%", sign=True)),
+                           df_goal["value"], df_goal["change_pct"])],
     })
-df_sens = pd.DataFrame(rows)
-df_sens_view = df_sens.copy()
-df_sens_view["ROI Base (%)"] = df_sens_view["ROI Base (%)"].map(lambda v: f"{fmt_num_en(v,1)}%")
-df_sens_view[f"ROI {perc}% (%)"] = df_sens_view[f"ROI {perc}% (%)"].map(lambda v: f"{fmt_num_en(v,1)}%")
-if df_sens_view["BE Base (m)"].notna().any():
-    df_sens_view["BE Base (m)"] = df_sens_view["BE Base (m)"].map(lambda v: fmt_int_en(v) if pd.notna(v) else "—")
-df_sens_view[f"BE {perc}% (m)"] = df_sens_view[f"BE {perc}% (m)"].map(lambda v: fmt_int_en(v) if v is not None else "—")
-st.table(df_sens_view)
+    st.caption("Each row moves one input alone, the others stay at their current values; "
+               "closest thresholds first (inputs now at 0, shown as n/a, by their share of the input's range). "
+               "A threshold of — is not reachable within the range the input accepts above.")
+
+prof.mark("sensitivity")
+st.header("8️⃣ Sensitivity Analysis")
+sensitivity_section(params)
+goal_seek_section(params)
 
 # =========================
 # 9) What-if Scenarios
 # =========================
+# Labels carry no currency: column_config is part of the editor's identity,
+# so a currency switch would otherwise reset the rows typed in
+SCENARIO_FIELDS = {
+    "ink_ml": "Ink (ml/m)",
+    "ink_price_l": "Ink price (per L)",
+    "paper_imp_waste": "Printing paper waste (%)",
+    "paper_imp_price": "Printing paper price (per unit)",
+    "paper_prot_waste": "Protective paper waste (%)",
+    "paper_prot_price": "Protective paper price (per unit)",
+    "speed1": "Speed 1 pass (m/h)",
+    "speed2": "Speed 2 passes (m/h)",
+    "usage1": "Usage 1 pass (%)",
+    "shifts_per_day": "Shifts per day",
+    "hours_per_shift": "Hours per shift",
+    "days_month": "Operating days/month",
+    "downtime_h": "Downtime hours per month",
+    "machine_kw": "Machine consumption (kW/h)",
+    "elec_price": "Electricity price (per kWh)",
+    "salary": "Salaries (per month)",
+    "rent": "Rent (per month)",
+    "sell_price": "Selling price (per m)",
+}
+# Column label and display unit of each result shown
+SCENARIO_VIEW = {
+    "prod_month": ("Production (m)", INTEGER),
+    "revenue_m": (f"Revenue ({CUR})", MONEY),
+    "var_total_m": (f"Variable cost ({CUR})", MONEY),
+    "fixed_cost_month": (f"Fixed cost ({CUR})", MONEY),
+    "profit_m": (f"Profit ({CUR})", MONEY),
+    "Δ profit_m": (f"Δ Profit vs Base ({CUR})", Unit(money=True, sign=True)),
+    "roi_pct": ("ROI (%)", NUMBER.with_decimals(1)),
+    "Δ roi_pct": ("Δ ROI vs Base (pp)", Unit(decimals=1, sign=True)),
+    "BE_m": ("Break-even (m)", INTEGER),
+    "total_cost_per_m": (f"Total cost ({CUR}/m)", MONEY.with_decimals(3)),
+    "rank": ("Rank", INTEGER),
+}
+SCENARIO_RANKING = {"profit_m": "Profit", "roi_pct": "ROI", "total_cost_per_m": "Total cost per meter"}
+
+# Initial editor contents; must stay identical across reruns so edits persist
+SCENARIO_SEED = pd.DataFrame({"Scenario": ["Scenario A"], **{k: [np.nan] for k in SCENARIO_FIELDS}})
+
+def scenario_set(params):
+    # One ScenarioSet per session: it keeps per-scenario results between reruns
+    ss = st.session_state.get("scenario_set")
+    if ss is None:
+        ss = st.session_state["scenario_set"] = ScenarioSet(params)
+    ss.set_base(params)
+    return ss
+
+@st.fragment
+def whatif_section(params):
+    ss = scenario_set(params)
+    with st.expander("Define alternative scenarios", expanded=True):
+        st.caption(f"One row per scenario. Leave a cell empty to keep the base value. Amounts in {CUR}.")
+        edited = st.data_editor(
+            SCENARIO_SEED, key="scenario_editor", num_rows="dynamic", hide_index=True,
+            use_container_width=True,
+            column_config={"Scenario": st.column_config.TextColumn("Scenario", required=True),
+                           **{k: st.column_config.NumberColumn(v, min_value=INPUT_LIMITS[k][0],
+                                                               max_value=INPUT_LIMITS[k][1],
+                                                               step=1 if k in INT_INPUTS else None)
+                              for k, v in SCENARIO_FIELDS.items()}},
+        )
+    scenarios = {}
+    for row in edited.to_dict("records"):
+        name = str(row.pop("Scenario") or "").strip()
+        if not name or name == BASE_NAME:
+            continue
+        scenarios[name] = {k: float(v) for k, v in row.items() if pd.notna(v)}
+    if len(scenarios) < len(edited):
+        st.caption("Rows without a unique name (or named 'Base') are ignored.")
+    ss.replace_all(scenarios)
+
+    rank_by = st.selectbox("Rank scenarios by", list(SCENARIO_RANKING), format_func=SCENARIO_RANKING.get)
+    df_scen = ss.compare(rank_by)[list(SCENARIO_VIEW)]
+    # Formatted here: st.column_config formats have no locale of their own
+    formatted = fmt.columns(df_scen, {k: unit for k, (_, unit) in SCENARIO_VIEW.items()})
+    st.dataframe(
+        {"Scenario": list(df_scen.index), **{label: formatted[k] for k, (label, _) in SCENARIO_VIEW.items()}},
+        hide_index=True, use_container_width=True,
+    )
+
+prof.mark("what-if")
 st.header("9️⃣ What-if Scenarios")
-with st.expander("Define alternative scenario"):
-    ink_ml_s = st.number_input("Scenario ink (ml/m)", 0.0, 1000.0, ink_ml)
-    ink_price_l_s = st.number_input("Scenario ink price (USD/L)", 0.0, 500.0, ink_price_l)
+whatif_section(params)
 
-    paper_imp_waste_s = st.number_input("Scenario printing paper waste (%)", 0.0, 20.0, paper_imp_waste, step=0.1)
-    paper_imp_u_s = 1.0 + paper_imp_waste_s/100
-    st.number_input(
-        f"Scenario printing paper (units/m) (consumption = 1 + {paper_imp_waste_s/100:.2f})",
-        value=paper_imp_u_s, key="paper_imp_display_s", disabled=True
+# =========================
+# 10) Risk Simulation (Monte Carlo)
+# =========================
+RISK_LABELS = {
+    "ink_ml": "Ink (ml/m)",
+    "ink_price_l": f"Ink price ({CUR}/L)",
+    "paper_imp_price": f"Printing paper price ({CUR}/unit)",
+    "paper_imp_waste": "Printing paper waste (%)",
+    "paper_prot_price": f"Protective paper price ({CUR}/unit)",
+    "paper_prot_waste": "Protective paper waste (%)",
+    "elec_price": f"Electricity price ({CUR}/kWh)",
+    "downtime_h": "Downtime hours per month",
+    "sell_price": f"Selling price ({CUR}/m)",
+    "salary": f"Salaries ({CUR}/month)",
+}
+
+@st.cache_data(max_entries=16, ttl=CACHE_OPTS["ttl"], show_spinner="Simulating…")
+def build_risk(params, dist_specs, n, seed):
+    # Only the summary and histograms are cached: the raw samples would hold
+    # 3 x n floats per entry
+    dists = {k: spread_distribution(kind, getattr(params, k), spread, spread_abs)
+             for k, kind, spread, spread_abs in dist_specs}
+    return simulate(params, dists, n=n, seed=seed, chunk_size=100_000, bins=60, keep_samples=False)
+
+@chart_cache
+def build_fig_risk(params, dist_specs, n, seed, template, fmt):
+    import plotly.graph_objects as go
+    counts, edges = build_risk(params, dist_specs, n, seed).histogram("profit_m")
+    fig = go.Figure(data=[go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, marker_color="#1f77b4")])
+    fig.add_vline(x=0, line_dash="dash", line_color="red")
+    fig.update_layout(
+        template=template,
+        title=dict(text="Monthly Profit Distribution", x=0.5, font=dict(size=17)),
+        xaxis_title=f"{fmt.currency}/month", yaxis_title="Samples", bargap=0,
+        height=330, margin=dict(t=46, b=28, l=36, r=18)
     )
-    paper_imp_price_s = st.number_input("Scenario printing paper price (USD/unit)", 0.0, 10.0, paper_imp_price)
+    return fig
 
-    paper_prot_waste_s = st.number_input("Scenario protective paper waste (%)", 0.0, 20.0, paper_prot_waste, step=0.1)
-    paper_prot_u_s = 1.0 + paper_prot_waste_s/100
-    st.number_input(
-        f"Scenario protective paper (units/m) (consumption = 1 + {paper_prot_waste_s/100:.2f})",
-        value=paper_prot_u_s, key="paper_prot_display_s", disabled=True
+@st.fragment
+def risk_section(params):
+    with st.expander("Configure risk simulation"):
+        chosen = st.multiselect("Uncertain inputs", list(RISK_LABELS), default=["ink_price_l", "elec_price", "sell_price"],
+                                format_func=RISK_LABELS.get)
+        dist_specs = []
+        for k in chosen:
+            cd1, cd2 = st.columns(2)
+            with cd1:
+                kind = st.selectbox(f"{RISK_LABELS[k]}: distribution", ["normal", "triangular", "uniform"], key=f"risk_kind_{k}")
+            with cd2:
+                if getattr(params, k) == 0:
+                    # A % of 0 is no spread at all: take it in the input's own units
+                    spread, spread_abs = 0.0, st.number_input(
+                        f"{RISK_LABELS[k]}: spread (± absolute; current value is 0)", 0.0, None, 10.0, step=1.0,
+                        key=f"risk_spread_abs_{k}",
+                        help="Normal: 1 standard deviation. Triangular/uniform: half-width. "
+                             "Draws below 0 count as 0.")
+                else:
+                    spread, spread_abs = st.number_input(
+                        f"{RISK_LABELS[k]}: spread (± % of base)", 0.0, 100.0, 10.0, step=1.0, key=f"risk_spread_{k}",
+                        help="Normal: 1 standard deviation. Triangular/uniform: half-width."), None
+            dist_specs.append((k, kind, spread, spread_abs))
+        cs1, cs2 = st.columns(2)
+        with cs1:
+            n = st.select_slider("Samples", [10_000, 100_000, 250_000, 500_000, 1_000_000], value=100_000,
+                                 format_func=fmt.integer)
+        with cs2:
+            seed = st.number_input("Seed", 0, 2**31 - 1, 42, step=1)
+        run = st.button("Run simulation", disabled=not dist_specs)
+
+    if run:
+        st.session_state["risk_for"] = (params, tuple(dist_specs), n, seed)
+    if st.session_state.get("risk_for") != (params, tuple(dist_specs), n, seed):
+        st.caption("Pick the uncertain inputs and run the simulation.")
+        return
+
+    risk = build_risk(params, tuple(dist_specs), n, seed)
+    k1, k2, k3 = st.columns(3)
+    with k1:
+        st.metric("Probability of loss", f"{fmt.num(risk.prob_loss*100,1)}%")
+    with k2:
+        st.metric("Median profit (month)", fmt.money(risk.percentiles["profit_m"][50]))
+    with k3:
+        st.metric("Median ROI (annual)", f"{fmt.num(risk.percentiles['roi_pct'][50],1)}%")
+
+    df_risk = pd.DataFrame(risk.summary_rows())
+    df_risk["Output"] = df_risk["Output"].map({"profit_m": f"Profit ({CUR})", "roi_pct": "ROI (%)", "BE_m": "Break-even (m)"})
+    st.table(fmt.columns(df_risk, dict.fromkeys(df_risk.columns[1:], NUMBER)))
+    if risk.prob_no_be > 0:
+        st.warning(f"In {fmt.num(risk.prob_no_be*100,1)}% of samples the price does not cover variable cost (no BE).")
+
+    st.plotly_chart(build_fig_risk(params, tuple(dist_specs), n, seed, plotly_template, fmt), use_container_width=True)
+
+prof.mark("risk")
+st.header("🔟 Risk Simulation")
+risk_section(params)
+
+# =========================
+# 11) 2-D Sensitivity Map
+# =========================
+GRID_LABELS = {
+    "sell_price": f"Selling price ({CUR}/m)",
+    "downtime_h": "Downtime hours per month",
+    "hours_per_shift": "Hours per shift",
+    "usage1": "Usage 1 pass (%)",
+    "ink_ml": "Ink (ml/m)",
+    "ink_price_l": f"Ink price ({CUR}/L)",
+    "elec_price": f"Electricity price ({CUR}/kWh)",
+    "machine_kw": "Machine consumption (kW/h)",
+    "paper_imp_price": f"Printing paper price ({CUR}/unit)",
+    "salary": f"Salaries ({CUR}/month)",
+}
+GRID_OUTPUTS = {"profit_m": f"Profit ({CUR}/month)", "roi_pct": "ROI (annual %)"}
+
+def grid_axis(params, name, pct, n):
+    # Bounded inputs sweep their full range; the rest sweep ±pct% around base
+    if name == "downtime_h":
+        return np.linspace(0.0, params.shifts_per_day * params.hours_per_shift * params.days_month, n)
+    if name == "usage1":
+        return np.linspace(0.0, 100.0, n)
+    if name == "hours_per_shift":
+        return np.linspace(1.0, 12.0, n)
+    return span(getattr(params, name), pct, n)
+
+@st.cache_data(max_entries=32, ttl=CACHE_OPTS["ttl"], show_spinner=False)
+def build_grid(params, x_name, y_name, output, pct, n):
+    grids = sweep_2d(params, x_name, grid_axis(params, x_name, pct, n),
+                     y_name, grid_axis(params, y_name, pct, n), outputs=(output, "profit_m"))
+    # The browser only needs a coarse view of dense grids
+    return grids[output].downsample(150), grids["profit_m"].downsample(150)
+
+@chart_cache
+def build_fig_grid(params, x_name, y_name, output, pct, n, template, fmt):
+    import plotly.graph_objects as go
+    grid, profit = build_grid(params, x_name, y_name, output, pct, n)
+    fig = go.Figure()
+    fig.add_trace(go.Heatmap(x=grid.x, y=grid.y, z=grid.z, colorscale="RdYlGn", zmid=0,
+                             colorbar=dict(title=GRID_OUTPUTS[output])))
+    fig.add_trace(go.Contour(x=profit.x, y=profit.y, z=profit.z, showscale=False,
+                             contours=dict(start=0, end=0, size=1, coloring="lines", showlabels=False),
+                             line=dict(color="black", width=2, dash="dash"),
+                             name="Break-even", hoverinfo="skip"))
+    fig.add_trace(go.Scatter(x=[getattr(params, x_name)], y=[getattr(params, y_name)], mode="markers",
+                             marker=dict(symbol="x", size=11, color="black"), name="Current"))
+    fig.update_layout(
+        template=template,
+        title=dict(text=f"{GRID_OUTPUTS[output]} (dashed: break-even)", x=0.5, font=dict(size=17)),
+        xaxis_title=GRID_LABELS[x_name], yaxis_title=GRID_LABELS[y_name],
+        height=480, margin=dict(t=46, b=28, l=36, r=18), showlegend=False
+    )
+    return fig
+
+@st.fragment
+def grid_section(params):
+    g1, g2, g3 = st.columns(3)
+    with g1:
+        x_name = st.selectbox("X axis", list(GRID_LABELS), index=0, format_func=GRID_LABELS.get)
+    with g2:
+        y_name = st.selectbox("Y axis", [k for k in GRID_LABELS if k != x_name], index=0, format_func=GRID_LABELS.get)
+    with g3:
+        output = st.selectbox("Output", list(GRID_OUTPUTS), format_func=GRID_OUTPUTS.get)
+    g4, g5 = st.columns(2)
+    with g4:
+        pct = st.slider("Sweep range (± % of base)", 5, 100, 50)
+    with g5:
+        n = st.select_slider("Grid resolution", [50, 100, 200, 500], value=200)
+
+    st.plotly_chart(build_fig_grid(params, x_name, y_name, output, pct, n, plotly_template, fmt), use_container_width=True)
+
+prof.mark("2-d map")
+st.header("1️⃣1️⃣ 2-D Sensitivity Map")
+grid_section(params)
+
+# =========================
+# 12) Multi-year Projection
+# =========================
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+@st.cache_data(**CACHE_OPTS)
+def build_projection(params, inputs):
+    return project(params, inputs)
+
+@chart_cache
+def build_fig_projection(params, inputs, template, fmt):
+    import plotly.graph_objects as go
+    proj = build_projection(params, inputs)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=proj.month, y=proj.profit, name="Monthly profit", marker_color="#66c2a5"))
+    fig.add_trace(go.Scatter(x=proj.month, y=proj.cumulative_cash, name="Cumulative cash", mode="lines",
+                             line=dict(color="#1f77b4", width=2), yaxis="y2"))
+    fig.update_layout(
+        template=template,
+        title=dict(text="Projection", x=0.5, font=dict(size=17)),
+        xaxis_title="Month", yaxis=dict(title=f"Profit ({fmt.currency}/month)"),
+        yaxis2=dict(title=f"Cumulative cash ({fmt.currency})", overlaying="y", side="right", zeroline=True),
+        height=360, margin=dict(t=46, b=28, l=36, r=18), legend=dict(orientation="h", y=-0.2)
     )
-    paper_prot_price_s = st.number_input("Scenario protective paper price (USD/unit)", 0.0, 10.0, paper_prot_price)
-
-    hours_day_s = st.number_input("Scenario hours/day", 1, 24, int(hours_day))
-    days_month_s = st.number_input("Scenario days/month", 1, 31, int(days_month))
-
-    avg_speed_s = speed1 * usage1/100 + speed2 * usage2/100
-    prod_month_s = avg_speed_s * hours_day_s * days_month_s
-
-    cv_ink_s = ink_ml_s/1000 * ink_price_l_s
-    cv_paper_imp_s = paper_imp_u_s * paper_imp_price_s
-    cv_paper_prot_s = paper_prot_u_s * paper_prot_price_s
-    monthly_kwh_s = machine_kw * hours_day_s * days_month_s
-    cv_elec_s = monthly_kwh_s * elec_price / prod_month_s if prod_month_s else 0
-    cost_var_s = cv_ink_s + cv_paper_imp_s + cv_paper_prot_s + cv_elec_s
-
-    revenue_s = sell_price * prod_month_s
-    profit_s = revenue_s - cost_var_s * prod_month_s - fixed_cost_month
-    roi_s = (profit_s * 12) / (invest_printer + invest_cal) * 100 if (invest_printer + invest_cal) > 0 else 0
-
-    df_scen = pd.DataFrame({
-        "Metric": ["Production", "Revenue (USD)", "Variable cost (USD)", "Fixed cost (USD)", "Profit (USD)", "ROI (%)"],
-        "Base": [prod_month, sell_price*prod_month, cost_var_per_m*prod_month, fixed_cost_month, profit_m, roi_pct],
-        "Scenario": [prod_month_s, revenue_s, cost_var_s*prod_month_s, fixed_cost_month, profit_s, roi_s]
-    }).round(2)
-
-    df_scen_view = df_scen.copy()
-    df_scen_view.loc[df_scen_view["Metric"]=="Production","Base"] = df_scen_view.loc[df_scen_view["Metric"]=="Production","Base"].map(lambda v: f"{fmt_int_en(v)} m")
-    df_scen_view.loc[df_scen_view["Metric"]=="Production","Scenario"] = df_scen_view.loc[df_scen_view["Metric"]=="Production","Scenario"].map(lambda v: f"{fmt_int_en(v)} m")
-    for m in ["Revenue (USD)","Variable cost (USD)","Fixed cost (USD)","Profit (USD)"]:
-        df_scen_view.loc[df_scen_view["Metric"]==m,"Base"] = df_scen_view.loc[df_scen_view["Metric"]==m,"Base"].map(fmt_usd)
-        df_scen_view.loc[df_scen_view["Metric"]==m,"Scenario"] = df_scen_view.loc[df_scen_view["Metric"]==m,"Scenario"].map(fmt_usd)
-    df_scen_view.loc[df_scen_view["Metric"]=="ROI (%)","Base"] = df_scen_view.loc[df_scen_view["Metric"]=="ROI (%)","Base"].map(lambda v: f"{fmt_num_en(v,1)}%")
-    df_scen_view.loc[df_scen_view["Metric"]=="ROI (%)","Scenario"] = df_scen_view.loc[df_scen_view["Metric"]=="ROI (%)","Scenario"].map(lambda v: f"{fmt_num_en(v,1)}%")
-    st.table(df_scen_view)
+    return fig
+
+@st.fragment
+def projection_section(params):
+    with st.expander("Projection assumptions"):
+        pj1, pj2, pj3 = st.columns(3)
+        with pj1:
+            months = st.slider("Horizon (months)", 12, 120, int(max(params.years_printer, params.years_cal)) * 12, step=12)
+            ramp_months = st.number_input("Ramp-up (months)", 0, 36, 0)
+            ramp_start = st.slider("Volume in month 1 (%)", 0, 100, 50, disabled=ramp_months == 0)
+        with pj2:
+            price_growth = st.number_input("Selling price change (%/yr)", -50.0, 50.0, 0.0, step=0.5)
+            ink_infl = st.number_input("Ink inflation (%/yr)", -50.0, 50.0, 0.0, step=0.5)
+            elec_infl = st.number_input("Electricity inflation (%/yr)", -50.0, 50.0, 0.0, step=0.5)
+        with pj3:
+            fixed_infl = st.number_input("Fixed-cost inflation (%/yr)", -50.0, 50.0, 0.0, step=0.5)
+            discount = st.number_input("Discount rate (%/yr)", 0.0, 100.0, 10.0, step=0.5)
+            start_month = st.selectbox("First month", range(1, 13), format_func=lambda m: MONTH_NAMES[m-1])
+        season_df = st.data_editor(
+            pd.DataFrame([[1.0] * 12], columns=MONTH_NAMES, index=["Demand index"]),
+            key="projection_seasonality", use_container_width=True,
+        )
+        downtime_sched = st.text_input("Extra downtime schedule (h per month, comma-separated, repeats)", "",
+                                       help="Example: 0,0,0,0,0,16 adds a 16 h stop every 6th month.")
+    try:
+        extra_downtime = tuple(float(x) for x in downtime_sched.replace(";", ",").split(",") if x.strip())
+    except ValueError:
+        st.error("Extra downtime schedule must be numbers separated by commas.")
+        return
+
+    inputs = ProjectionInputs(
+        months=months, ramp_months=ramp_months, ramp_start_pct=ramp_start,
+        seasonality=tuple(float(v) for v in season_df.iloc[0].fillna(1.0)), start_month=start_month,
+        extra_downtime_h=extra_downtime, price_growth_pct=price_growth, ink_inflation_pct=ink_infl,
+        elec_inflation_pct=elec_infl, fixed_inflation_pct=fixed_infl, discount_rate_pct=discount,
+    )
+    proj = build_projection(params, inputs)
+
+    k1, k2, k3, k4 = st.columns(4)
+    with k1:
+        st.metric("Payback", f"month {fmt.integer(proj.payback_month)}" if np.isfinite(proj.payback_month) else "not reached")
+    with k2:
+        st.metric(f"NPV @ {fmt.num(discount,1)}%", fmt.money(proj.npv, 0))
+    with k3:
+        st.metric("IRR (annual)", f"{fmt.num(proj.irr_annual_pct,1)}%" if np.isfinite(proj.irr_annual_pct) else "—")
+    with k4:
+        st.metric(f"Cumulative cash (month {months})", fmt.money(proj.cumulative_cash[-1], 0))
+
+    st.plotly_chart(build_fig_projection(params, inputs, plotly_template, fmt), use_container_width=True)
+
+prof.mark("projection")
+st.header("1️⃣2️⃣ Multi-year Projection")
+projection_section(params)
+
+# =========================
+# 13) Fleet Planning
+# =========================
+# Currency-free labels, as in SCENARIO_FIELDS
+FLEET_COLUMNS = {
+    "name": st.column_config.TextColumn("Machine", required=True),
+    "width": st.column_config.NumberColumn("Width (m)", min_value=0.1),
+    "speed1": st.column_config.NumberColumn("Speed 1 pass (m/h)", min_value=0.0),
+    "speed2": st.column_config.NumberColumn("Speed 2 passes (m/h)", min_value=0.0),
+    "machine_kw": st.column_config.NumberColumn("kW", min_value=0.0),
+    "hours_month": st.column_config.NumberColumn("Hours/month", min_value=0.0),
+    "fixed_cost_month": st.column_config.NumberColumn("Fixed (per month)", min_value=0.0),
+    "cost_per_hour": st.column_config.NumberColumn("Running (per h)", min_value=0.0),
+}
+
+def fleet_seed(params, productive_hours, fixed_cost_month):
+    # The single line modelled above is the starting fleet, carrying all of its
+    # fixed costs (payroll, rent, other, maintenance and depreciation), so its
+    # blended cost per meter matches the KPIs
+    return pd.DataFrame([{
+        "name": "Line 1", "width": params.width, "speed1": params.speed1, "speed2": params.speed2,
+        "machine_kw": params.machine_kw, "hours_month": productive_hours,
+        "fixed_cost_month": fixed_cost_month, "cost_per_hour": 0.0,
+    }])
+
+@st.cache_data(**CACHE_OPTS)
+def build_fleet_plan(params, machines, orders):
+    return allocate(machines, orders["meters"], orders["passes"], orders["width"], orders["due_h"], params=params)
+
+def reset_fleet(seed):
+    st.session_state["fleet_seed"] = seed
+    st.session_state.pop("fleet_machines", None)
+
+@st.fragment
+def fleet_section(params, seed):
+    # The editor is seeded once per session: a seed rebuilt from the inputs on
+    # every rerun would give it a new identity and drop the rows typed in
+    st.session_state.setdefault("fleet_seed", seed)
+    with st.expander("Machines and orders"):
+        st.caption(f"Costs in {CUR}.")
+        st.button("Reset from current line", on_click=reset_fleet, args=(seed,),
+                  help="Replace the machine table with the line modelled above, at the current inputs.")
+        df_machines = st.data_editor(st.session_state["fleet_seed"], key="fleet_machines", num_rows="dynamic",
+                                     hide_index=True, use_container_width=True, column_config=FLEET_COLUMNS)
+        upload = st.file_uploader("Order book (CSV: meters, passes, width, due_h)", type=["csv"], key="fleet_orders")
+    machines = tuple(
+        Machine(**{k: (str(v) if k == "name" else float(v)) for k, v in row.items()})
+        for row in df_machines.dropna().to_dict("records")
+    )
+    if not machines:
+        st.info("Add at least one machine.")
+        return
+    if upload is not None:
+        df_orders = pd.read_csv(upload)
+        missing = {"meters"} - set(df_orders.columns)
+        if missing:
+            st.error("The order book needs a 'meters' column.")
+            return
+    else:
+        # Without an order book, plan this month's volume at the current pass mix
+        # (usage1/usage2 are shares of machine time, as in avg_speed)
+        hours = cached_costs(params).productive_hours
+        df_orders = pd.DataFrame({"meters": [hours * params.speed1 * params.usage1/100,
+                                             hours * params.speed2 * (100 - params.usage1)/100],
+                                  "passes": [1, 2]})
+    orders = {
+        "meters": tuple(df_orders["meters"].fillna(0.0).astype(float)),
+        "passes": tuple(df_orders.get("passes", pd.Series(1, index=df_orders.index)).fillna(1).astype(int)),
+        "width": tuple(df_orders.get("width", pd.Series(params.width, index=df_orders.index)).fillna(params.width).astype(float)),
+        "due_h": tuple(df_orders.get("due_h", pd.Series(np.inf, index=df_orders.index)).fillna(np.inf).astype(float)),
+    }
+    plan = build_fleet_plan(params, machines, orders)
+
+    f1, f2, f3 = st.columns(3)
+    with f1:
+        st.metric("Meters planned", f"{fmt.integer(plan.meters)} m")
+    with f2:
+        st.metric("Blended cost per meter", fmt.money_per_m(plan.blended_cost_per_m) if plan.meters else "—")
+    with f3:
+        st.metric("Unmet (capacity/due dates)", f"{fmt.integer(plan.unmet.sum())} m")
+    st.dataframe(pd.DataFrame(plan.machine_rows()), hide_index=True, use_container_width=True,
+                 column_config={"Meters": st.column_config.NumberColumn(format="%d"),
+                                "Hours": st.column_config.NumberColumn(format="%.1f"),
+                                "Utilization (%)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.1f%%"),
+                                "Value of 1 h (USD)": st.column_config.NumberColumn(f"Value of 1 h ({CUR})", format="%.2f")})
+
+prof.mark("fleet")
+st.header("1️⃣3️⃣ Fleet Planning")
+fleet_section(params, fleet_seed(params, productive_hours, fixed_cost_month))
+
+# =========================
+# 14) Job Simulation
+# =========================
+@st.cache_data(max_entries=32, ttl=CACHE_OPTS["ttl"], show_spinner="Simulating month…")
+def build_job_simulation(params, config, orders, replications, seed):
+    jobs = jobs_from_arrays(orders["meters"], orders["passes"], orders["due_h"])
+    first = simulate_month(jobs, params, config, seed)
+    reps = replicate(jobs, params, config, n=replications, seed=seed) if replications > 1 else None
+    return first, reps
+
+@st.fragment
+def job_simulation_section(params):
+    with st.expander("Jobs and shop floor"):
+        upload = st.file_uploader("Job list (CSV: meters, passes, due_day)", type=["csv"], key="sim_jobs",
+                                  help="due_day is the operating day (1..days/month) the job is due.")
+        js1, js2, js3 = st.columns(3)
+        with js1:
+            changeover_h = st.number_input("Changeover per job (h)", 0.0, 8.0, 0.25, step=0.05)
+            mode_change_h = st.number_input("Extra changeover 1↔2 passes (h)", 0.0, 8.0, 0.5, step=0.05)
+        with js2:
+            mtbf_h = st.number_input("Mean printing hours between breakdowns (0 = none)", 0.0, 1000.0, 40.0, step=5.0)
+            mttr_h = st.number_input("Mean repair time (h)", 0.0, 48.0, 2.0, step=0.5)
+        with js3:
+            replications = st.select_slider("Replications", [1, 10, 50, 100], value=10)
+            seed = st.number_input("Simulation seed", 0, 2**31 - 1, 7, step=1)
+
+    hours_day = params.shifts_per_day * params.hours_per_shift
+    if upload is not None:
+        df_jobs = pd.read_csv(upload)
+        if "meters" not in df_jobs.columns:
+            st.error("The job list needs a 'meters' column.")
+            return
+    else:
+        # Without a job list, split this month's model volume into 200 equal jobs
+        # (usage1 is a share of machine time, so convert it to a share of meters)
+        base = cached_costs(params)
+        n_jobs = 200
+        share_1pass = params.speed1 * params.usage1 / 100 / base.avg_speed if base.avg_speed else 0.0
+        df_jobs = pd.DataFrame({
+            "meters": np.full(n_jobs, base.prod_month / n_jobs),
+            "passes": np.where(np.arange(n_jobs) < n_jobs * share_1pass, 1, 2),
+            "due_day": np.linspace(1, params.days_month, n_jobs).round(),
+        })
+        st.caption("No job list uploaded: simulating this month's volume as 200 equal jobs.")
+    orders = {
+        "meters": tuple(df_jobs["meters"].fillna(0.0).astype(float)),
+        "passes": tuple(df_jobs.get("passes", pd.Series(1, index=df_jobs.index)).fillna(1).astype(int)),
+        "due_h": tuple(df_jobs.get("due_day", pd.Series(np.inf, index=df_jobs.index)).astype(float) * hours_day),
+    }
+    config = ShopConfig(changeover_h=changeover_h, mode_change_h=mode_change_h, mtbf_h=mtbf_h, mttr_h=mttr_h)
+    sim, reps = build_job_simulation(params, config, orders, replications, seed)
+
+    realized = cached_costs(sim.to_params(params))
+    s1, s2, s3, s4 = st.columns(4)
+    with s1:
+        st.metric("Realized production", f"{fmt.integer(sim.prod_month)} m",
+                  delta=f"{fmt.integer(sim.prod_month - cached_costs(params).prod_month)} m vs model")
+    with s2:
+        st.metric("Utilization (printing)", f"{fmt.num(sim.utilization,1)}%")
+    with s3:
+        st.metric("Late jobs", f"{sim.late_jobs:,d}", delta=f"max {fmt.num(sim.max_lateness_h,1)} h late",
+                  delta_color="off")
+    with s4:
+        st.metric("Profit at realized capacity", fmt.money(realized.profit_m),
+                  delta=f"{fmt.money(realized.profit_m - cached_costs(params).profit_m)} vs model")
+    st.write(
+        f"- Printing **{fmt.num(sim.printing_h,1)} h** | changeovers **{fmt.num(sim.changeover_h,1)} h** | "
+        f"breakdowns **{fmt.num(sim.breakdown_h,1)} h** | idle **{fmt.num(sim.idle_h,1)} h** "
+        f"(equivalent downtime **{fmt.num(sim.to_params(params).downtime_h,1)} h/mo**)"
+    )
+    if reps is not None:
+        p5, p50, p95 = np.percentile(reps["prod_month"], [5, 50, 95])
+        st.write(f"- Over {replications} replications: production P5 **{fmt.integer(p5)} m**, "
+                 f"median **{fmt.integer(p50)} m**, P95 **{fmt.integer(p95)} m**")
+
+prof.mark("job simulation")
+st.header("1️⃣4️⃣ Job Simulation")
+job_simulation_section(params)
+
+# =========================
+# 15) Ink from Artwork
+# =========================
+ARTWORK_COLUMNS = {
+    **{f"{ch}_%": st.column_config.ProgressColumn(f"{ch} (%)", min_value=0, max_value=100, format="%.1f%%")
+       for ch in CHANNELS},
+    "width_m": st.column_config.NumberColumn("Width (m)", format="%.2f"),
+    "length_m": st.column_config.NumberColumn("Length (m)", format="%.2f"),
+    "ink_ml_m": st.column_config.NumberColumn("Ink (ml/m)", format="%.2f"),
+    "ink_l_job": st.column_config.NumberColumn("Ink per job (L)", format="%.3f"),
+}
+
+def artwork_coverage(uploads):
+    # Coverage per uploaded file, kept for the session: files can be large
+    memo = st.session_state.get("artwork_coverage", {})
+    memo = st.session_state["artwork_coverage"] = {u.file_id: memo.get(u.file_id) for u in uploads}
+    coverages = []
+    for u in uploads:
+        if memo[u.file_id] is None:
+            try:
+                memo[u.file_id] = measure_coverage(u, name=u.name)
+            except ValueError as e:
+                st.error(str(e))
+                continue
+            except OSError:
+                st.error(f"{u.name}: not a readable PNG/TIFF file.")
+                continue
+        coverages.append(memo[u.file_id])
+    return coverages
+
+def apply_ink_ml(value):
+    st.session_state["ink_ml"] = value
+
+@st.fragment
+def artwork_section(params):
+    uploads = st.file_uploader("Job artwork (PNG/TIFF)", type=["png", "tif", "tiff"], accept_multiple_files=True,
+                               key="artwork_files",
+                               help="Uncompressed TIFFs are read band by band; other files are decoded first.")
+    cols = st.columns(4)
+    laydown = tuple(
+        col.number_input(f"{ch} laydown (ml/m² at 100%)", 0.0, 50.0, value, step=0.5, key=f"laydown_{ch}")
+        for col, ch, value in zip(cols, CHANNELS, InkProfile().laydown_ml_m2)
+    )
+    if not uploads:
+        st.caption("Upload artwork to price each job's ink from its CMYK coverage "
+                   "(files without a resolution are assumed to span the roll width).")
+        return
+    coverages = artwork_coverage(uploads)
+    if not coverages:
+        return
+    df_jobs = job_costs(coverages, params, InkProfile(laydown))
+    st.dataframe(df_jobs, hide_index=True, use_container_width=True, column_config={
+        **ARTWORK_COLUMNS,
+        **{k: st.column_config.NumberColumn(f"{label} ({CUR}/m)", format="%.4f")
+           for k, label in (("cv_ink", "Ink"), ("cost_var_per_m", "Variable"), ("total_cost_per_m", "Total"))},
+        "ink_cost_job": st.column_config.NumberColumn(f"Ink per job ({CUR})", format="%.2f"),
+    })
+    j1, j2 = st.columns([3, 1])
+    with j1:
+        job = st.selectbox("Job", range(len(df_jobs)), format_func=lambda i: df_jobs["job"].iloc[i])
+    with j2:
+        ink = round(float(df_jobs["ink_ml_m"].iloc[job]), 2)
+        if st.button(f"Use {fmt.num(ink)} ml/m as ink input", on_click=apply_ink_ml, args=(ink,)):
+            st.rerun()
+
+prof.mark("artwork")
+st.header("1️⃣5️⃣ Ink from Artwork")
+artwork_section(params)
+
+# =========================
+# Debug: per-section timings
+# =========================
+record = prof.finish()
+if prof.enabled:
+    registry = metrics_registry()
+    registry.observe(record, session=session_id)
+    if os.environ.get("SUBLIMACAO_METRICS_FILE"):
+        registry.write_prometheus(os.environ["SUBLIMACAO_METRICS_FILE"])
+    with debug_box:
+        st.caption(f"This rerun: **{fmt.num(record.total_seconds*1000,1)} ms** (full reruns only; "
+                   "fragment reruns are not profiled)")
+        st.dataframe(pd.DataFrame(record.rows()), hide_index=True, use_container_width=True,
+                     column_config={"ms": st.column_config.NumberColumn(format="%.2f"),
+                                    "Share (%)": st.column_config.ProgressColumn(min_value=0, max_value=100, format="%.0f%%"),
+                                    "Peak (KiB)": st.column_config.NumberColumn(format="%.0f")})
+        if record.top_allocations:
+            st.markdown("**Top allocations (traced)**")
+            st.dataframe(pd.DataFrame(record.top_allocations, columns=["Line", "Bytes", "Blocks"]),
+                         hide_index=True, use_container_width=True)
+        st.markdown("**All sessions (this server process)**")
+        st.dataframe(pd.DataFrame(registry.summary_rows()), hide_index=True, use_container_width=True,
+                     column_config={"Mean (ms)": st.column_config.NumberColumn(format="%.2f")})
+        st.download_button("Prometheus metrics", registry.to_prometheus(), file_name="metrics.prom",
+                           mime="text/plain", on_click="ignore")
+        st.download_button("This rerun (JSON)", record.to_json(), file_name="rerun.json",
+                           mime="application/json", on_click="ignore")
@@ -0,0 +1,5 @@
+# app_custo_sublimacao: cost model and tooling behind the Streamlit app (app.py).
+
+from .model import CostParams, CostResult, compute_costs, PARAM_NAMES, RESULT_NAMES
+
+__all__ = ["CostParams", "CostResult", "compute_costs", "PARAM_NAMES", "RESULT_NAMES"]
@@ -0,0 +1,236 @@
+# app_custo_sublimacao/artwork.py
+# Ink use from job artwork: mean CMYK coverage of PNG/TIFF files, turned
+# into ml of ink per printed meter and fed to compute_costs per job.
+# Run: python -m app_custo_sublimacao.artwork jobs/ -o ink.csv -j 4
+
+import argparse
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, compute_costs
+
+CHANNELS = ("C", "M", "Y", "K")
+IMAGE_EXTENSIONS = (".png", ".tif", ".tiff")
+BAND_BYTES = 32 * 2**20             # raw pixel bytes handled per step
+# Uncompressed TIFF layouts read straight from the file: raw mode -> samples per pixel
+_RAW_BANDS = {"L": 1, "RGB": 3, "RGBA": 4, "CMYK": 4}
+
+
+@dataclass(frozen=True)
+class InkProfile:
+    # ml per m² at 100% coverage of one channel (C, M, Y, K)
+    laydown_ml_m2: tuple = (4.0, 4.0, 4.0, 4.0)
+
+
+@dataclass(frozen=True)
+class Coverage:
+    name: str
+    width_px: int
+    height_px: int
+    dpi: float                      # 0 when the file does not say
+    cmyk: tuple                     # mean coverage per channel, 0..1
+    decoded: bool                   # decoded whole by Pillow (else read band by band from the file)
+
+    def width_m(self, default):
+        return self.width_px / self.dpi * 0.0254 if self.dpi else default
+
+    def length_m(self):
+        return self.height_px / self.dpi * 0.0254 if self.dpi else float("nan")
+
+
+# ---------- Coverage of one band of pixels ----------
+def _band_sums(band, mode):
+    """Summed ink per channel (C, M, Y, K, in pixel units) of a (rows, width, samples) uint8 band."""
+    if mode in ("CMYK", "L"):
+        # Integer sums down the rows first: contiguous and exact
+        sums = band.sum(axis=0, dtype=np.uint32).sum(axis=0, dtype=np.uint64) / 255
+        return sums if mode == "CMYK" else np.array([0.0, 0.0, 0.0, band[..., 0].size - sums[0]])
+    # RGB(A): naive conversion with k = 1 - max(r, g, b), so c = (max - r) / max;
+    # alpha scales every ink (transparent pixels print nothing)
+    mx = band[..., :3].max(axis=-1)
+    scale = np.divide(np.float32(1), mx, out=np.zeros(mx.shape, np.float32), where=mx > 0)
+    k = (255 - mx).astype(np.float32) * np.float32(1 / 255)
+    if mode == "RGBA":
+        alpha = band[..., 3].astype(np.float32) * np.float32(1 / 255)
+        scale *= alpha
+        k *= alpha
+    cmy = (mx[..., None] - band[..., :3]) * scale[..., None]
+    return np.append(cmy.sum(axis=0, dtype=np.float64).sum(axis=0), k.sum(dtype=np.float64))
+
+
+def _sum_rows(pixels, mode, band_bytes):
+    # pixels: (rows, width, samples) uint8, possibly a view of a memory map
+    row_bytes = max(pixels.shape[1] * (pixels.shape[2] if pixels.ndim == 3 else 1), 1)
+    step = max(band_bytes // row_bytes, 1)
+    sums = np.zeros(4)
+    for y in range(0, pixels.shape[0], step):
+        sums += _band_sums(np.asarray(pixels[y:y + step]), mode)
+    return sums
+
+
+# ---------- Files ----------
+def _raw_tiles(im):
+    """(extents, offset, row bytes, samples) per tile, or None unless every tile is uncompressed 8-bit."""
+    tiles = []
+    for tile in im.tile:
+        codec, extents, offset, args = tile
+        rawmode = args[0] if isinstance(args, tuple) else args
+        if codec != "raw" or rawmode != im.mode or rawmode not in _RAW_BANDS:
+            return None
+        samples = _RAW_BANDS[rawmode]
+        stride = (args[1] if isinstance(args, tuple) and len(args) > 1 else 0) or (extents[2] - extents[0]) * samples
+        tiles.append((extents, offset, stride, samples))
+    return tiles or None
+
+
+def _dpi(im):
+    dpi = im.info.get("dpi")
+    dpi = float(dpi[0]) if dpi else 0.0
+    return dpi if dpi > 1 else 0.0      # Pillow reports 1 dpi for "no resolution"
+
+
+def _open_image(src, name):
+    # TIFFs are opened by their plugin directly: Image.open's decompression-bomb
+    # check would reject full-size print files that are only memory-mapped
+    from PIL import Image, TiffImagePlugin
+    try:
+        return TiffImagePlugin.TiffImageFile(src)
+    except SyntaxError:
+        if not isinstance(src, (str, os.PathLike)):
+            src.seek(0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", Image.DecompressionBombWarning)
+        try:
+            return Image.open(src)
+        except Image.DecompressionBombError:
+            raise ValueError(f"{name}: too large to decode; save it as an uncompressed TIFF") from None
+
+
+def measure_coverage(src, name=None, band_bytes=BAND_BYTES):
+    """Mean CMYK coverage of a PNG/TIFF given as a path or a binary file object.
+
+    Uncompressed 8-bit TIFFs (strips or tiles) are memory-mapped and summed
+    band by band, so a full-size print file never sits in RAM. Other files
+    (PNG, compressed TIFF) are decoded by Pillow first.
+    """
+    from PIL import Image
+
+    name = name or os.path.basename(str(getattr(src, "name", src)))
+    with _open_image(src, name) as im:
+        width, height = im.size
+        dpi = _dpi(im)
+        tiles = _raw_tiles(im)
+        if tiles is not None:
+            if isinstance(src, (str, os.PathLike)):
+                raw = np.memmap(src, dtype=np.uint8, mode="r")
+            elif hasattr(src, "getbuffer"):
+                raw = np.frombuffer(src.getbuffer(), dtype=np.uint8)
+            else:
+                src.seek(0)
+                raw = np.frombuffer(src.read(), dtype=np.uint8)
+            sums = np.zeros(4)
+            for (x0, y0, x1, y1), offset, stride, samples in tiles:
+                rows = y1 - y0
+                block = raw[offset:offset + rows * stride].reshape(rows, stride)
+                block = block[:, :(x1 - x0) * samples].reshape(rows, x1 - x0, samples)
+                sums += _sum_rows(block, im.mode, band_bytes)
+            del raw, block          # release the map / the caller's buffer
+        else:
+            if Image.MAX_IMAGE_PIXELS and width * height > Image.MAX_IMAGE_PIXELS:
+                raise ValueError(f"{name}: too large to decode ({width} x {height} px); "
+                                 "save it as an uncompressed TIFF")
+            mode = im.mode if im.mode in ("CMYK", "RGB", "RGBA", "L") else \
+                ("RGBA" if "A" in im.getbands() or "transparency" in im.info else "RGB")
+            im = im if mode == im.mode else im.convert(mode)
+            pixels = np.asarray(im)
+            sums = _sum_rows(pixels if pixels.ndim == 3 else pixels[..., None], mode, band_bytes)
+        return Coverage(name=name, width_px=width, height_px=height, dpi=dpi,
+                        cmyk=tuple((sums / max(width * height, 1)).tolist()), decoded=tiles is None)
+
+
+def folder_images(folder):
+    """PNG/TIFF files directly inside `folder`, sorted by name."""
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                  if f.lower().endswith(IMAGE_EXTENSIONS))
+
+
+def measure_many(paths, workers=1, band_bytes=BAND_BYTES):
+    """measure_coverage for every path, in input order; one file per worker task."""
+    args = [(p, None, band_bytes) for p in paths]
+    if workers > 1 and len(args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(args))) as pool:
+            return list(pool.map(_measure_one, args))
+    return [_measure_one(a) for a in args]
+
+
+def _measure_one(args):
+    return measure_coverage(*args)
+
+
+# ---------- Costs per job ----------
+def job_costs(coverages, params=None, profile=None):
+    """One row per artwork: coverage, ink ml/m and the job's cost per meter.
+
+    Each job runs compute_costs with its own ink_ml (one vectorized call);
+    artwork without a resolution is assumed to span the roll width.
+    """
+    import pandas as pd
+
+    params = params if params is not None else CostParams()
+    profile = profile if profile is not None else InkProfile()
+    width = np.array([c.width_m(float(params.width)) for c in coverages], dtype=float)
+    cmyk = np.array([c.cmyk for c in coverages], dtype=float).reshape(-1, 4)
+    ink_ml = width * (cmyk @ np.asarray(profile.laydown_ml_m2, dtype=float))
+    res = compute_costs(params, ink_ml=ink_ml)
+    n = len(coverages)
+    length = np.array([c.length_m() for c in coverages], dtype=float)
+    df = pd.DataFrame({"job": [c.name for c in coverages], "width_m": width, "length_m": length})
+    for k, ch in enumerate(CHANNELS):
+        df[f"{ch}_%"] = cmyk[:, k] * 100
+    df["ink_ml_m"] = ink_ml
+    for name in ("cv_ink", "cost_var_per_m", "total_cost_per_m"):
+        df[name] = np.broadcast_to(getattr(res, name), (n,))
+    df["ink_l_job"] = ink_ml * length / 1000
+    df["ink_cost_job"] = df["cv_ink"] * length
+    return df
+
+
+def main(argv=None):
+    from .batch import _parse_override
+
+    ap = argparse.ArgumentParser(
+        prog="python -m app_custo_sublimacao.artwork",
+        description="Measure CMYK coverage of job artwork (PNG/TIFF) and price the ink per job.")
+    ap.add_argument("inputs", nargs="+", help="image files or folders of them")
+    ap.add_argument("-o", "--output", help="results CSV (default: print to stdout)")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="worker processes (default 1)")
+    ap.add_argument("--laydown", type=float, nargs=4, metavar=CHANNELS, default=InkProfile().laydown_ml_m2,
+                    help="ml per m² at 100%% coverage of each channel")
+    ap.add_argument("--set", dest="overrides", action="append", type=_parse_override, default=[],
+                    metavar="NAME=VALUE", help="cost model input (repeatable)")
+    args = ap.parse_args(argv)
+
+    paths = []
+    for item in args.inputs:
+        paths += folder_images(item) if os.path.isdir(item) else [item]
+    if not paths:
+        raise SystemExit("No PNG/TIFF files found.")
+    t0 = time.perf_counter()
+    coverages = measure_many(paths, workers=args.workers)
+    df = job_costs(coverages, CostParams(**dict(args.overrides)), InkProfile(tuple(args.laydown)))
+    if args.output:
+        df.to_csv(args.output, index=False)
+    else:
+        print(df.to_csv(index=False), end="")
+    print(f"Measured {len(paths):,d} files in {time.perf_counter() - t0:,.2f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
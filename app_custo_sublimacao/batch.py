@@ -0,0 +1,203 @@
+# app_custo_sublimacao/batch.py
+# Headless batch quoting: price every row of a CSV/Parquet order book.
+# Run: python -m app_custo_sublimacao.batch jobs.parquet -o quotes.parquet
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .model import CostParams, PARAM_NAMES, compute_costs
+
+# Result columns appended to each job row
+QUOTE_COLUMNS = (
+    "avg_speed", "prod_month", "cost_var_per_m", "fixed_per_m", "total_cost_per_m",
+    "gross_margin_per_m", "net_margin_per_m", "profit_m", "roi_pct", "BE_m",
+)
+DEFAULT_CHUNKSIZE = 250_000
+
+
+# ---------- Pricing ----------
+def price_frame(df, base=None):
+    """Price every row of `df`.
+
+    Columns named like CostParams fields override `base` per row; missing
+    fields come from `base`. Non-numeric values become NaN and propagate
+    to that row's results. Returns `df` with QUOTE_COLUMNS appended.
+    """
+    base = base if base is not None else CostParams()
+    overrides = {
+        name: pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        for name in PARAM_NAMES if name in df.columns
+    }
+    res = compute_costs(base, **overrides)
+    out = df.copy()
+    for name in QUOTE_COLUMNS:
+        out[name] = np.broadcast_to(getattr(res, name), (len(df),))
+    return out
+
+
+def _price_chunk(args):
+    df, base = args
+    return price_frame(df, base)
+
+
+# ---------- Input ----------
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of at most `chunksize` rows from a CSV or Parquet file."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Reading Parquet requires pyarrow (pip install pyarrow).")
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    elif ext in (".csv", ".txt", ".gz"):
+        yield from pd.read_csv(path, chunksize=chunksize)
+    else:
+        raise SystemExit(f"Unsupported input format: {ext or path!r} (use .csv or .parquet)")
+
+
+# ---------- Output ----------
+class _CsvSink:
+    def __init__(self, path):
+        self.path, self.header = path, True
+
+    def write(self, df):
+        df.to_csv(self.path, mode="w" if self.header else "a", header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        if self.header:
+            open(self.path, "w").close()
+
+
+class _ParquetSink:
+    def __init__(self, path):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Writing Parquet requires pyarrow (pip install pyarrow).")
+        self.pa, self.pq, self.path, self.writer = pa, pq, path, None
+
+    def write(self, df):
+        table = self.pa.Table.from_pandas(df, preserve_index=False)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+class _ExcelSink:
+    # constant_memory flushes each row as it is written
+    MAX_ROWS = 1_048_575
+
+    def __init__(self, path):
+        import xlsxwriter
+        self.book = xlsxwriter.Workbook(path, {"constant_memory": True, "nan_inf_to_errors": True})
+        self.sheet = self.book.add_worksheet("Quotes")
+        self.row = 0
+
+    def write(self, df):
+        if self.row == 0:
+            self.sheet.write_row(0, 0, list(df.columns))
+            self.row = 1
+        if self.row + len(df) > self.MAX_ROWS + 1:
+            raise SystemExit("Too many rows for one Excel sheet; write CSV or Parquet instead.")
+        for values in df.itertuples(index=False, name=None):
+            self.sheet.write_row(self.row, 0, values)
+            self.row += 1
+
+    def close(self):
+        self.book.close()
+
+
+def open_sink(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return _CsvSink(path)
+    if ext in (".parquet", ".pq"):
+        return _ParquetSink(path)
+    if ext == ".xlsx":
+        return _ExcelSink(path)
+    raise SystemExit(f"Unsupported output format: {ext or path!r} (use .csv, .parquet or .xlsx)")
+
+
+# ---------- Driver ----------
+def run_batch(input_path, output_path, base=None, chunksize=DEFAULT_CHUNKSIZE, workers=1):
+    """Stream `input_path` through price_frame into `output_path`; returns rows written."""
+    base = base if base is not None else CostParams()
+    sink = open_sink(output_path)
+    rows = 0
+    try:
+        chunks = read_chunks(input_path, chunksize)
+        if workers <= 1:
+            for df in chunks:
+                sink.write(price_frame(df, base))
+                rows += len(df)
+        else:
+            # Keep a bounded number of chunks in flight, written in input order
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for df in chunks:
+                    pending.append(pool.submit(_price_chunk, (df, base)))
+                    if len(pending) >= 2 * workers:
+                        out = pending.popleft().result()
+                        sink.write(out)
+                        rows += len(out)
+                while pending:
+                    out = pending.popleft().result()
+                    sink.write(out)
+                    rows += len(out)
+    finally:
+        sink.close()
+    return rows
+
+
+def _parse_override(text):
+    name, sep, value = text.partition("=")
+    if not sep or name not in PARAM_NAMES:
+        raise argparse.ArgumentTypeError(f"expected NAME=VALUE with NAME in CostParams, got {text!r}")
+    try:
+        return name, float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not a number: {value!r}")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m app_custo_sublimacao.batch",
+        description="Price a CSV/Parquet order book with the sublimation cost model. "
+                    "Columns named like the model inputs (width, speed1, usage1, ink_ml, "
+                    "sell_price, ...) override the defaults per row.")
+    ap.add_argument("input", help="jobs file (.csv or .parquet)")
+    ap.add_argument("-o", "--output", help="results file (.csv, .parquet or .xlsx); "
+                                          "default: <input>_quotes.csv")
+    ap.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="rows per chunk")
+    ap.add_argument("-j", "--workers", type=int, default=1, help="worker processes (default 1)")
+    ap.add_argument("--set", dest="overrides", action="append", type=_parse_override, default=[],
+                    metavar="NAME=VALUE", help="default for an input missing from the file (repeatable)")
+    args = ap.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.input)[0] + "_quotes.csv"
+    base = CostParams(**dict(args.overrides))
+    t0 = time.perf_counter()
+    rows = run_batch(args.input, output, base=base, chunksize=args.chunksize, workers=args.workers)
+    dt = time.perf_counter() - t0
+    rate = rows / dt * 60 if dt > 0 else float("inf")
+    print(f"Priced {rows:,d} jobs in {dt:,.2f} s ({rate:,.0f} rows/min) -> {output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
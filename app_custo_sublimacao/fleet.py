@@ -0,0 +1,166 @@
+# app_custo_sublimacao/fleet.py
+# Multi-machine fleet: allocate an order book across printers with different
+# widths, speeds and energy use, minimizing running cost under machine-hour
+# and due-date capacity. Solved as one small LP (scipy HiGHS) over groups of
+# interchangeable orders, then split back to orders.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, compute_costs
+
+
+@dataclass(frozen=True)
+class Machine:
+    name: str
+    width: float = 1.6
+    speed1: float = 400.0           # m/h, 1 pass
+    speed2: float = 200.0           # m/h, 2 passes
+    machine_kw: float = 60.0
+    hours_month: float = 192.0      # productive hours available in the period
+    fixed_cost_month: float = 0.0   # depreciation and dedicated fixed costs
+    cost_per_hour: float = 0.0      # operator / running cost per productive hour
+
+
+@dataclass(frozen=True)
+class FleetPlan:
+    machines: tuple
+    allocation: np.ndarray          # meters, shape (orders, machines)
+    unmet: np.ndarray               # meters per order not served by its due time
+    hours_used: np.ndarray          # per machine
+    utilization: np.ndarray         # % of hours_month, per machine
+    bottleneck: np.ndarray          # bool per machine: capacity limits the plan
+    hour_value: np.ndarray          # USD saved per extra machine hour (LP dual)
+    variable_cost: float            # materials + energy + hourly cost of served meters
+    fixed_cost: float               # fixed costs of machines that run
+    meters: float                   # meters served
+
+    @property
+    def blended_cost_per_m(self):
+        return (self.variable_cost + self.fixed_cost) / self.meters if self.meters else np.nan
+
+    def machine_rows(self):
+        meters = self.allocation.sum(axis=0)
+        return [
+            {"Machine": m.name, "Meters": float(meters[j]), "Hours": float(self.hours_used[j]),
+             "Utilization (%)": float(self.utilization[j]), "Bottleneck": bool(self.bottleneck[j]),
+             "Value of 1 h (USD)": float(self.hour_value[j])}
+            for j, m in enumerate(self.machines)
+        ]
+
+
+def _due_buckets(due_h, horizon, max_buckets):
+    """Bucket index per order and bucket end times (due dates rounded down)."""
+    due = np.minimum(np.where(np.isfinite(due_h), due_h, horizon), horizon)
+    ends = np.unique(due)
+    if len(ends) > max_buckets:
+        ends = np.unique(np.concatenate([np.linspace(0, horizon, max_buckets)[1:], [horizon]]))
+        ends = ends[ends > 0]
+        # Round each due date down to a bucket end (never later than promised)
+        idx = np.searchsorted(ends, due, side="right") - 1
+        late = idx < 0
+        idx = np.maximum(idx, 0)
+        return idx, ends, late
+    return np.searchsorted(ends, due), ends, np.zeros(len(due), bool)
+
+
+def allocate(machines, meters, passes=1, width=None, due_h=None, params=None, max_buckets=31,
+             unmet_penalty=None):
+    """Allocate order meters to machines at minimum running cost.
+
+    `meters`, `passes` (1 or 2), `width` (m) and `due_h` (productive hours
+    from the start of the period by which the order must be printed) are
+    per-order arrays. An order only runs on machines at least as wide. Per
+    machine and due date, the hours of all orders due by then must fit in
+    the hours available by then. Meters that cannot fit are reported as
+    unmet instead of making the problem infeasible; each unmet meter costs
+    `unmet_penalty` (default: the selling price, i.e. lost revenue), so
+    hour_value is the margin one more machine hour would recover.
+    """
+    try:
+        from scipy.optimize import linprog
+        from scipy.sparse import coo_matrix
+    except ImportError:
+        raise ImportError("Fleet allocation requires scipy (pip install scipy).")
+
+    params = params if params is not None else CostParams()
+    machines = tuple(machines)
+    meters = np.asarray(meters, dtype=float).ravel()
+    n, k = len(meters), len(machines)
+    passes = np.broadcast_to(np.asarray(passes), (n,))
+    width = np.broadcast_to(np.asarray(params.width if width is None else width, dtype=float), (n,))
+    due_h = np.broadcast_to(np.asarray(np.inf if due_h is None else due_h, dtype=float), (n,))
+
+    mw = np.array([m.width for m in machines])
+    hours = np.array([m.hours_month for m in machines])
+    speed = np.array([[m.speed1 for m in machines], [m.speed2 for m in machines]])   # (2, k)
+    res = compute_costs(params)
+    material = res.cv_ink + res.cv_paper_imp + res.cv_paper_prot
+    run_cost_h = np.array([m.machine_kw for m in machines]) * params.elec_price + np.array([m.cost_per_hour for m in machines])
+
+    # ---------- Group interchangeable orders: (due bucket, passes, narrowest fitting width) ----------
+    bucket, ends, late = _due_buckets(due_h, float(hours.max()) if k else 0.0, max_buckets)
+    widths = np.unique(mw)
+    fit = np.searchsorted(widths, width, side="left")          # index of narrowest machine width that fits
+    pass_idx = (passes == 2).astype(int)
+    keys = np.stack([bucket, pass_idx, fit], axis=1)
+    groups, group_of = np.unique(keys, axis=0, return_inverse=True)
+    group_of = group_of.ravel()
+    g_meters = np.bincount(group_of, weights=np.where(late, 0.0, meters), minlength=len(groups))
+    G = len(groups)
+
+    # Per-meter hours and cost for each (group, machine)
+    g_speed = speed[groups[:, 1]]                               # (G, k)
+    compatible = (groups[:, 2][:, None] < len(widths)) & (mw[None, :] >= widths[np.minimum(groups[:, 2], len(widths) - 1)][:, None])
+    compatible &= g_speed > 0
+    with np.errstate(divide="ignore"):
+        h_per_m = np.where(compatible, 1.0 / g_speed, 0.0)
+    cost = h_per_m * run_cost_h[None, :]
+
+    # Variables: y[g, j] for compatible pairs, then unmet u[g]
+    gi, ji = np.nonzero(compatible)
+    nv = len(gi)
+    penalty = params.sell_price if unmet_penalty is None else unmet_penalty
+    c = np.concatenate([cost[gi, ji], np.full(G, float(penalty))])
+    A_eq = coo_matrix((np.ones(nv + G), (np.concatenate([gi, np.arange(G)]), np.arange(nv + G))),
+                      shape=(G, nv + G))
+
+    # Cumulative capacity: orders due by bucket b use at most min(end_b, hours_j) on machine j
+    rows, cols, vals = [], [], []
+    B = len(ends)
+    for b in range(B):
+        sel = groups[gi, 0] <= b
+        rows.append(ji[sel] * B + b)
+        cols.append(np.nonzero(sel)[0])
+        vals.append(h_per_m[gi[sel], ji[sel]])
+    A_ub = coo_matrix((np.concatenate(vals), (np.concatenate(rows), np.concatenate(cols))), shape=(k * B, nv + G))
+    b_ub = np.minimum(ends[None, :], hours[:, None]).ravel()
+
+    sol = linprog(c, A_ub=A_ub, b_ub=b_ub, A_eq=A_eq, b_eq=g_meters, bounds=(0, None), method="highs")
+    if sol.status != 0:
+        raise RuntimeError(f"Fleet allocation failed: {sol.message}")
+    y = np.zeros((G, k))
+    y[gi, ji] = sol.x[:nv]
+    duals = -sol.ineqlin.marginals.reshape(k, B)
+
+    # ---------- Split group allocations back to orders, pro rata ----------
+    served_meters = np.where(late, 0.0, meters)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        share = np.where(g_meters[group_of] > 0, served_meters / g_meters[group_of], 0.0)
+    allocation = share[:, None] * y[group_of]
+    unmet = meters - allocation.sum(axis=1)
+
+    hours_used = (y * h_per_m).sum(axis=0)
+    utilization = np.where(hours > 0, hours_used / np.where(hours > 0, hours, 1) * 100, 0.0)
+    served = float(allocation.sum())
+    running = hours_used > 1e-9
+    return FleetPlan(
+        machines=machines, allocation=allocation, unmet=np.maximum(unmet, 0.0),
+        hours_used=hours_used, utilization=utilization,
+        bottleneck=(duals.sum(axis=1) > 1e-9) | (utilization >= 99.9),
+        hour_value=duals.sum(axis=1),
+        variable_cost=float(served * material + (y * cost).sum()),
+        fixed_cost=float(sum(m.fixed_cost_month for m, r in zip(machines, running) if r)),
+        meters=served,
+    )
@@ -0,0 +1,87 @@
+# app_custo_sublimacao/formatting.py
+# Display formatting with unit metadata and locale/currency choice.
+# Whole columns are formatted in one pass: one format call per value, then
+# a single join/translate/split for prefixes, suffixes and separators.
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+MISSING = "—"
+# Number styles: (decimal mark, thousands separator)
+LOCALES = {"en-US": (".", ","), "pt-BR": (",", ".")}
+CURRENCIES = ("USD", "BRL")
+
+
+@dataclass(frozen=True)
+class Unit:
+    decimals: int = 2
+    money: bool = False             # prefixed with the currency code
+    suffix: str = ""                # e.g. " m", "%", " /m"
+    sign: bool = False              # always show + / -
+
+    def with_decimals(self, decimals):
+        return replace(self, decimals=decimals)
+
+
+NUMBER = Unit()
+INTEGER = Unit(decimals=0)
+METERS = Unit(decimals=0, suffix=" m")
+PERCENT = Unit(decimals=1, suffix="%")
+MONEY = Unit(money=True)
+MONEY_PER_M = Unit(money=True, suffix=" /m")
+
+
+@dataclass(frozen=True)
+class Formatter:
+    """Locale- and currency-aware formatter; hashable, so it can key caches.
+
+    The currency is a label: amounts are shown in whatever currency the
+    inputs were entered in.
+    """
+    currency: str = "USD"
+    decimal: str = "."
+    thousands: str = ","
+
+    @classmethod
+    def for_locale(cls, locale="en-US", currency="USD"):
+        decimal, thousands = LOCALES[locale]
+        return cls(currency=currency, decimal=decimal, thousands=thousands)
+
+    def format(self, values, unit=NUMBER):
+        """Format a column of numbers; NaN/None become MISSING."""
+        arr = np.asarray(values, dtype=float).ravel()
+        spec = "{:%s,.%df}" % ("+" if unit.sign else "", unit.decimals)
+        prefix = f"{self.currency} " if unit.money else ""
+        text = (unit.suffix + "\0" + prefix).join(map(spec.format, arr.tolist()))
+        if (self.decimal, self.thousands) != (".", ","):
+            text = text.translate(str.maketrans({".": self.decimal, ",": self.thousands}))
+        out = (prefix + text + unit.suffix).split("\0") if len(arr) else []
+        for i in np.flatnonzero(np.isnan(arr)):
+            out[i] = MISSING
+        return out
+
+    def __call__(self, value, unit=NUMBER):
+        return self.format((value,), unit)[0]
+
+    # ---------- Shorthands for single values ----------
+    def money(self, value, decimals=2):
+        return self(value, MONEY.with_decimals(decimals))
+
+    def money_per_m(self, value):
+        return self(value, MONEY_PER_M)
+
+    def num(self, value, decimals=2):
+        return self(value, NUMBER.with_decimals(decimals))
+
+    def integer(self, value):
+        return self(value, INTEGER)
+
+    def pct(self, value, decimals=1):
+        return self(value, PERCENT.with_decimals(decimals))
+
+    # ---------- Metadata for numeric tables ----------
+    def columns(self, frame, units):
+        """{column: formatted strings} for the columns named in `units`; others pass through."""
+        return {col: (self.format(frame[col], units[col]) if col in units else list(frame[col]))
+                for col in frame}
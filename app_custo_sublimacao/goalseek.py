@@ -0,0 +1,198 @@
+# app_custo_sublimacao/goalseek.py
+# Reverse goal seek: the value of one input that makes a metric hit a target
+# ("how much downtime before profit hits zero", "what ink price gives 20%
+# ROI"). Many (input, metric, target) problems are solved together: affine
+# cases in closed form, the rest by a vectorized bracketing root finder.
+
+import numpy as np
+
+from .model import CostParams, PARAM_NAMES, compute_costs
+
+GOAL_METRICS = ("profit_m", "roi_pct", "payback_months", "net_margin_per_m", "total_cost_per_m")
+# Inputs of the break-even table by default
+GOAL_INPUTS = ("downtime_h", "ink_price_l", "elec_price", "salary", "paper_imp_waste",
+               "paper_prot_waste", "sell_price", "usage1")
+# Profit (and so ROI) is affine in each of these while production stays positive
+AFFINE_INPUTS = frozenset((
+    "downtime_h", "usage1", "speed1", "speed2", "shifts_per_day", "hours_per_shift", "days_month",
+    "ink_ml", "ink_price_l", "paper_imp_waste", "paper_imp_price", "paper_prot_waste", "paper_prot_price",
+    "machine_kw", "elec_price", "salary", "rent", "other_fixed", "maintenance", "sell_price",
+))
+# Inputs that change production; per-meter metrics are affine only in the others
+PRODUCTION_INPUTS = frozenset(("downtime_h", "usage1", "speed1", "speed2", "shifts_per_day", "hours_per_shift",
+                               "days_month"))
+SEARCH_SPAN = 10.0                  # root finder searches up to SEARCH_SPAN x base for unbounded inputs
+GRID_POINTS = 65
+BISECTIONS = 60
+RTOL = 1e-6
+
+
+# ---------- Evaluation of many problems at once ----------
+def _domain(params, name, limits=None):
+    """(low, high) range of an input; high may be inf.
+
+    The physical range, narrowed to limits[name] when `limits` has it.
+    """
+    if name == "usage1":
+        low, high = 0.0, 100.0
+    elif name == "downtime_h":
+        low, high = 0.0, float(params.shifts_per_day * params.hours_per_shift * params.days_month)
+    elif name in ("years_printer", "years_cal"):
+        low, high = 1e-9, np.inf
+    else:
+        low, high = 0.0, np.inf
+    if limits and name in limits:
+        low, high = max(low, float(limits[name][0])), min(high, float(limits[name][1]))
+    return low, high
+
+
+def _metric(p, res, metric):
+    if metric == "payback_months":
+        # Months of steady cash flow (profit + depreciation) to recover the investment
+        cash = res.profit_m + res.depr_printer_m + res.depr_cal_m
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(cash > 0, (p.invest_printer + p.invest_cal) / cash, np.inf)
+    return getattr(res, metric)
+
+
+def _evaluate(params, names, metrics, values):
+    """Metric k with input names[k] set to values[..., k]; shape of `values`."""
+    values = np.asarray(values, dtype=float)
+    names = np.asarray(names)
+    fields = {n: np.where(names == n, values, getattr(params, n)) for n in set(names.tolist())}
+    p = params.replace(**fields)
+    res = compute_costs(p)
+    metrics = np.asarray(metrics)
+    out = np.empty(values.shape)
+    for m in set(metrics.tolist()):
+        out = np.where(metrics == m, _metric(p, res, m), out)
+    return out
+
+
+# ---------- Solvers ----------
+def _closed_form(params, names, metrics, targets, base):
+    """Two-point inversion for metrics affine in their input."""
+    solve_metrics = np.array(metrics, dtype=object)
+    solve_targets = targets.copy()
+    # Payback is a function of profit alone: seek the profit that gives it
+    payback = solve_metrics == "payback_months"
+    if payback.any():
+        res = compute_costs(params)
+        invest = float(params.invest_printer + params.invest_cal)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            solve_targets[payback] = np.where(targets[payback] > 0, invest / targets[payback], np.nan) \
+                - (res.depr_printer_m + res.depr_cal_m)
+        solve_metrics[payback] = "profit_m"
+    step = np.maximum(np.abs(base) * 0.1, 1.0)
+    f0, f1 = _evaluate(params, names, solve_metrics, np.stack([base, base + step]))
+    slope = (f1 - f0) / step
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(slope != 0, base + (solve_targets - f0) / slope, np.nan)
+
+
+def _root_find(params, names, metrics, targets, base, limits=None):
+    """Bracket on a grid over each input's range, then bisect; NaN where no bracket."""
+    bounds = np.array([_domain(params, n, limits) for n in names])
+    lo = bounds[:, 0]
+    hi = np.where(np.isfinite(bounds[:, 1]), bounds[:, 1], np.maximum(np.abs(base) * SEARCH_SPAN, SEARCH_SPAN))
+    grid = lo + (hi - lo) * np.linspace(0.0, 1.0, GRID_POINTS)[:, None]          # (points, problems)
+    g = _evaluate(params, names, metrics, grid) - targets
+    g = np.where(np.isfinite(g), g, np.nan)
+    crossing = (np.sign(g[:-1]) * np.sign(g[1:]) <= 0) & ~np.isnan(g[:-1]) & ~np.isnan(g[1:])
+    # Of several crossings, take the one nearest the base value
+    distance = np.where(crossing, np.abs((grid[:-1] + grid[1:]) / 2 - base), np.inf)
+    i = distance.argmin(axis=0)
+    cols = np.arange(len(names))
+    found = crossing[i, cols]
+    a, b = grid[i, cols], grid[i + 1, cols]
+    ga = g[i, cols]
+    for _ in range(BISECTIONS):
+        mid = (a + b) / 2
+        gm = _evaluate(params, names, metrics, mid) - targets
+        left = np.sign(gm) == np.sign(ga)
+        a, ga = np.where(left, mid, a), np.where(left, gm, ga)
+        b = np.where(left, b, mid)
+    return np.where(found, (a + b) / 2, np.nan)
+
+
+def goal_seek_many(params=None, problems=(), limits=None):
+    """Solve (input, metric, target) problems together; one row per problem.
+
+    Affine problems (profit_m, roi_pct or payback_months against an input
+    in AFFINE_INPUTS; per-meter metrics against one that leaves production
+    unchanged) are inverted from two evaluations and checked. The others,
+    and affine ones failing the check (production hitting zero), go to the
+    root finder. `value` is NaN when no input in the physical
+    range reaches the target. `limits` ({input: (low, high)}, e.g. the
+    ranges of the UI's widgets) narrows that range.
+    """
+    import pandas as pd
+
+    params = params if params is not None else CostParams()
+    problems = list(problems)
+    names = [str(n) for n, _, _ in problems]
+    metrics = [str(m) for _, m, _ in problems]
+    bad = [n for n in names if n not in PARAM_NAMES] + [m for m in metrics if m not in GOAL_METRICS]
+    if bad:
+        raise ValueError(f"Unknown inputs/metrics: {sorted(set(bad))}")
+    targets = np.array([t for _, _, t in problems], dtype=float)
+    base = np.array([float(getattr(params, n)) for n in names])
+    value = np.full(len(problems), np.nan)
+    method = np.full(len(problems), "unreachable", dtype=object)
+
+    def check(idx, x):
+        # Accept solutions inside the input's range that reproduce the target
+        lo, hi = np.array([_domain(params, names[k], limits) for k in idx]).reshape(-1, 2).T
+        ok = np.isfinite(x) & (x >= lo - 1e-9) & (x <= hi + 1e-9)
+        if ok.any():
+            got = _evaluate(params, [names[k] for k in idx], [metrics[k] for k in idx], np.where(ok, x, base[idx]))
+            ok &= np.abs(got - targets[idx]) <= RTOL * np.maximum(1.0, np.abs(targets[idx]))
+        return ok
+
+    affine = np.array([n in AFFINE_INPUTS and (m in ("profit_m", "roi_pct", "payback_months")
+                                               or n not in PRODUCTION_INPUTS)
+                       for n, m in zip(names, metrics)], dtype=bool)
+    idx = np.flatnonzero(affine)
+    if len(idx):
+        x = _closed_form(params, [names[k] for k in idx], [metrics[k] for k in idx], targets[idx], base[idx])
+        ok = check(idx, x)
+        value[idx[ok]], method[idx[ok]] = x[ok], "closed form"
+    idx = np.flatnonzero(method == "unreachable")
+    if len(idx):
+        x = _root_find(params, [names[k] for k in idx], [metrics[k] for k in idx], targets[idx], base[idx],
+                       limits)
+        ok = check(idx, x)
+        value[idx[ok]], method[idx[ok]] = x[ok], "root finder"
+
+    achieved = np.full(len(problems), np.nan)
+    solved = ~np.isnan(value)
+    if solved.any():
+        achieved[solved] = _evaluate(params, np.array(names)[solved], np.array(metrics)[solved], value[solved])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        change_pct = np.where(base != 0, (value - base) / np.abs(base) * 100, np.nan)
+    return pd.DataFrame({"input": names, "metric": metrics, "target": targets, "base": base, "value": value,
+                         "change": value - base, "change_pct": change_pct, "achieved": achieved,
+                         "method": method.astype(str)})
+
+
+def goal_seek(params=None, name="downtime_h", metric="profit_m", target=0.0, limits=None):
+    """Value of input `name` at which `metric` equals `target` (NaN if out of reach)."""
+    return float(goal_seek_many(params, [(name, metric, target)], limits)["value"].iloc[0])
+
+
+def break_even_table(params=None, inputs=GOAL_INPUTS, metric="profit_m", target=0.0, limits=None):
+    """Tornado table: each input's threshold for `metric` = `target`, nearest first.
+
+    Nearness is the change relative to the current value, or, for inputs
+    currently at 0 (no change_pct), relative to the input's range. Inputs
+    at 0 with an unbounded range follow the other reachable thresholds;
+    unreachable thresholds come last.
+    """
+    params = params if params is not None else CostParams()
+    df = goal_seek_many(params, [(name, metric, target) for name in inputs], limits)
+    span = np.array([np.subtract(*_domain(params, n, limits)[::-1]) for n in df["input"]], dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        nearness = np.where(df["base"] != 0, np.abs(df["change_pct"]) / 100,
+                            np.where(np.isfinite(span) & (span > 0), np.abs(df["change"]) / span, np.inf))
+    order = np.lexsort((np.where(np.isnan(nearness), np.inf, nearness), df["value"].isna()))
+    return df.iloc[order].reset_index(drop=True)
@@ -0,0 +1,60 @@
+# app_custo_sublimacao/grid.py
+# Two-parameter sweeps of the cost model, evaluated in one broadcast call.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, PARAM_NAMES, RESULT_NAMES, compute_costs
+
+
+@dataclass(frozen=True)
+class Grid2D:
+    x_name: str
+    y_name: str
+    output: str
+    x: np.ndarray            # shape (nx,)
+    y: np.ndarray            # shape (ny,)
+    z: np.ndarray            # shape (ny, nx): z[i, j] at (x[j], y[i])
+
+    def downsample(self, max_points=150):
+        """Stride the grid so neither axis exceeds `max_points` (for plotting)."""
+        sy = max(1, int(np.ceil(len(self.y) / max_points)))
+        sx = max(1, int(np.ceil(len(self.x) / max_points)))
+        if sx == 1 and sy == 1:
+            return self
+        return Grid2D(self.x_name, self.y_name, self.output,
+                      self.x[::sx], self.y[::sy], self.z[::sy, ::sx])
+
+
+def sweep_2d(params, x_name, x_values, y_name, y_values, outputs=("profit_m",)):
+    """Evaluate the model on the x_values × y_values grid.
+
+    All other inputs stay at `params`. Returns {output: Grid2D}; the whole
+    grid is a single compute_costs call (x broadcast along rows, y along
+    columns).
+    """
+    params = params if params is not None else CostParams()
+    for name in (x_name, y_name):
+        if name not in PARAM_NAMES:
+            raise ValueError(f"Unknown parameter: {name!r}")
+    for name in outputs:
+        if name not in RESULT_NAMES:
+            raise ValueError(f"Unknown output: {name!r}")
+    if x_name == y_name:
+        raise ValueError("x and y must be different parameters")
+
+    x = np.asarray(x_values, dtype=float).ravel()
+    y = np.asarray(y_values, dtype=float).ravel()
+    res = compute_costs(params, **{x_name: x[np.newaxis, :], y_name: y[:, np.newaxis]})
+    shape = (len(y), len(x))
+    return {
+        name: Grid2D(x_name, y_name, name, x, y, np.broadcast_to(getattr(res, name), shape))
+        for name in outputs
+    }
+
+
+def span(base, pct=50, n=200, lower=0.0):
+    """`n` evenly spaced values within ±pct% of `base` (never below `lower`)."""
+    delta = abs(base) * pct / 100 if base else 1.0
+    return np.linspace(max(lower, base - delta), base + delta, int(n))
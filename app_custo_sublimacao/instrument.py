@@ -0,0 +1,210 @@
+# app_custo_sublimacao/instrument.py
+# Optional per-section timing and memory metrics for a script rerun, with a
+# process-wide registry exported as Prometheus text or JSON log lines.
+# A disabled RerunProfiler does nothing but an attribute check per call.
+
+import json
+import logging
+import os
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+log = logging.getLogger("app_custo_sublimacao.metrics")
+
+# Histogram bucket upper bounds (seconds) for section durations
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# A session that asked for tracing and has not rerun for this long no longer counts
+TRACING_IDLE_SECONDS = 3600
+
+# Whether tracemalloc was started here (never stop tracing someone else started)
+_owns_tracing = False
+
+
+def stop_memory_tracing():
+    """Stop tracemalloc if a RerunProfiler started it."""
+    global _owns_tracing
+    if _owns_tracing and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _owns_tracing = False
+
+
+@dataclass
+class SectionSample:
+    name: str
+    seconds: float
+    peak_bytes: int = None          # traced allocation peak above the section's start (tracemalloc only)
+
+
+@dataclass
+class RerunRecord:
+    sections: list = field(default_factory=list)
+    total_seconds: float = 0.0
+    traced_bytes: int = None        # traced memory at the end of the rerun
+    top_allocations: list = field(default_factory=list)   # (location, size in bytes, count)
+
+    def rows(self):
+        return [{"Section": s.name, "ms": s.seconds * 1000,
+                 "Share (%)": s.seconds / self.total_seconds * 100 if self.total_seconds else 0.0,
+                 "Peak (KiB)": s.peak_bytes / 1024 if s.peak_bytes is not None else None}
+                for s in self.sections]
+
+    def to_json(self, **extra):
+        return json.dumps({
+            "event": "rerun", **extra,
+            "total_ms": round(self.total_seconds * 1000, 3),
+            "traced_bytes": self.traced_bytes,
+            "sections": {s.name: {"ms": round(s.seconds * 1000, 3), "peak_bytes": s.peak_bytes}
+                         for s in self.sections},
+        })
+
+
+class RerunProfiler:
+    """Times consecutive sections of one rerun.
+
+    mark(name) ends the running section (if any) and starts `name`, so the
+    top-level script needs no extra indentation. With trace_memory, each
+    section also records its tracemalloc peak (tracing is process-wide).
+    """
+
+    def __init__(self, enabled=False, trace_memory=False):
+        global _owns_tracing
+        self.enabled = enabled
+        self.trace_memory = enabled and trace_memory
+        self.record = RerunRecord()
+        self._name = None
+        if not enabled:
+            return
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _owns_tracing = True
+        self._mem = None
+        self._t_start = self._t = time.perf_counter()
+
+    def _close(self):
+        now = time.perf_counter()
+        peak = None
+        # Tracing is process-wide and may have been stopped since the section began
+        if self._mem is not None and tracemalloc.is_tracing():
+            peak = max(tracemalloc.get_traced_memory()[1] - self._mem, 0)
+        self.record.sections.append(SectionSample(self._name, now - self._t, peak))
+        self._name = None
+        return now
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = self._close() if self._name is not None else time.perf_counter()
+        self._name, self._t = name, now
+        self._mem = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            self._mem = tracemalloc.get_traced_memory()[0]
+
+    def stop(self):
+        if self.enabled and self._name is not None:
+            self._close()
+
+    def finish(self, top=10):
+        """End the rerun; returns its RerunRecord (empty when disabled)."""
+        if not self.enabled:
+            return self.record
+        self.stop()
+        self.record.total_seconds = time.perf_counter() - self._t_start
+        if self.trace_memory and tracemalloc.is_tracing():
+            self.record.traced_bytes = tracemalloc.get_traced_memory()[0]
+            stats = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            ).statistics("lineno")[:top]
+            self.record.top_allocations = [(str(s.traceback[0]), s.size, s.count) for s in stats]
+        return self.record
+
+
+class MetricsRegistry:
+    """Process-wide aggregates over all sessions' reruns (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reruns = 0
+        self._sections = {}         # name -> [count, sum_seconds, bucket counts..., max peak bytes]
+        self._traced_bytes = None
+        self._tracing = {}          # session -> time it last asked for memory tracing
+
+    def want_tracing(self, session, wanted):
+        """Record whether `session` traces memory; tracing stops once no session does.
+
+        tracemalloc is process-wide, so one session turning it off must not
+        end another session's tracing mid-rerun.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if wanted:
+                self._tracing[session] = now
+            else:
+                self._tracing.pop(session, None)
+            # Closed sessions never say so: forget those idle for long
+            for s, seen in list(self._tracing.items()):
+                if now - seen > TRACING_IDLE_SECONDS:
+                    del self._tracing[s]
+            if not self._tracing:
+                stop_memory_tracing()
+
+    def observe(self, record, session=None):
+        if not record.sections:
+            return
+        with self._lock:
+            self._reruns += 1
+            for s in [*record.sections, SectionSample("total", record.total_seconds)]:
+                agg = self._sections.setdefault(s.name, [0, 0.0, [0] * len(BUCKETS), 0])
+                agg[0] += 1
+                agg[1] += s.seconds
+                for i, bound in enumerate(BUCKETS):
+                    if s.seconds <= bound:
+                        agg[2][i] += 1
+                if s.peak_bytes is not None:
+                    agg[3] = max(agg[3], s.peak_bytes)
+            if record.traced_bytes is not None:
+                self._traced_bytes = record.traced_bytes
+        if log.isEnabledFor(logging.INFO):
+            log.info(record.to_json(session=session))
+
+    def to_prometheus(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            lines = [
+                "# HELP sublimacao_reruns_total Profiled script reruns.",
+                "# TYPE sublimacao_reruns_total counter",
+                f"sublimacao_reruns_total {self._reruns}",
+                "# HELP sublimacao_section_seconds Wall time per app section and rerun.",
+                "# TYPE sublimacao_section_seconds histogram",
+            ]
+            for name, (count, total, buckets, _) in self._sections.items():
+                label = name.replace("\\", "\\\\").replace('"', '\\"')
+                for bound, n in zip(BUCKETS, buckets):
+                    lines.append(f'sublimacao_section_seconds_bucket{{section="{label}",le="{bound}"}} {n}')
+                lines.append(f'sublimacao_section_seconds_bucket{{section="{label}",le="+Inf"}} {count}')
+                lines.append(f'sublimacao_section_seconds_sum{{section="{label}"}} {total:.6f}')
+                lines.append(f'sublimacao_section_seconds_count{{section="{label}"}} {count}')
+            peaks = [(name, agg[3]) for name, agg in self._sections.items() if agg[3]]
+            if peaks:
+                lines += ["# HELP sublimacao_section_peak_bytes Largest traced allocation peak per section.",
+                          "# TYPE sublimacao_section_peak_bytes gauge"]
+                lines += [f'sublimacao_section_peak_bytes{{section="{name}"}} {peak}' for name, peak in peaks]
+            if self._traced_bytes is not None:
+                lines += ["# HELP sublimacao_traced_bytes Memory traced by tracemalloc after the last rerun.",
+                          "# TYPE sublimacao_traced_bytes gauge",
+                          f"sublimacao_traced_bytes {self._traced_bytes}"]
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically write the exposition file (node_exporter textfile collector)."""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+    def summary_rows(self):
+        with self._lock:
+            return [{"Section": name, "Reruns": count, "Mean (ms)": total / count * 1000 if count else 0.0}
+                    for name, (count, total, _, _) in self._sections.items()]
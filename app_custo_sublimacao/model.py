@@ -0,0 +1,177 @@
+# app_custo_sublimacao/model.py
+# Pure cost model behind app.py (no Streamlit). Every field accepts a scalar
+# or a NumPy array; arrays broadcast, so many parameter sets evaluate at once.
+
+from dataclasses import dataclass, fields, replace
+
+import numpy as np
+
+
+# ---------- Inputs ----------
+@dataclass(frozen=True)
+class CostParams:
+    # Production & capacity
+    width: float = 1.6
+    speed1: float = 400.0
+    speed2: float = 200.0
+    usage1: float = 50.0            # % of work printed in 1 pass (rest is 2 passes)
+    shifts_per_day: float = 1
+    hours_per_shift: float = 8
+    days_month: float = 24
+    downtime_h: float = 0.0
+    # Consumables & variable costs
+    ink_ml: float = 5.0
+    ink_price_l: float = 56.7
+    paper_imp_waste: float = 5.0    # %
+    paper_imp_price: float = 0.85
+    paper_prot_waste: float = 3.0   # %
+    paper_prot_price: float = 0.20
+    machine_kw: float = 60.0
+    elec_price: float = 1.6
+    # Monthly fixed costs
+    salary: float = 25340.0
+    invest_printer: float = 450000.0
+    years_printer: float = 4
+    invest_cal: float = 150000.0
+    years_cal: float = 5
+    rent: float = 8000.0
+    other_fixed: float = 0.0
+    maintenance: float = 0.0
+    # Revenue
+    sell_price: float = 4.5
+
+    def replace(self, **changes):
+        return replace(self, **changes)
+
+    def as_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+PARAM_NAMES = tuple(f.name for f in fields(CostParams))
+
+
+# ---------- Outputs ----------
+@dataclass(frozen=True)
+class CostResult:
+    # Capacity
+    usage2: object
+    hours_day: object
+    total_hours_month: object
+    avg_speed: object
+    productive_hours: object
+    prod_month: object
+    prod_year: object
+    utilization: object
+    # Variable costs (USD/m)
+    paper_imp_u: object
+    paper_prot_u: object
+    cv_ink: object
+    cv_paper_imp: object
+    cv_paper_prot: object
+    cv_elec: object
+    cost_var_per_m: object
+    # Fixed costs (USD/month)
+    depr_printer_m: object
+    depr_cal_m: object
+    fixed_cost_month: object
+    # KPIs
+    revenue_m: object
+    var_total_m: object
+    profit_m: object
+    roi_pct: object
+    BE_m: object                    # NaN when sell_price <= cost_var_per_m
+    fixed_per_m: object             # NaN when prod_month == 0
+    total_cost_per_m: object
+    gross_margin_per_m: object
+    net_margin_per_m: object        # NaN when prod_month == 0
+
+    def as_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+
+RESULT_NAMES = tuple(f.name for f in fields(CostResult))
+
+
+# ---------- Helpers ----------
+def _div(num, den, where, fill):
+    """num/den where `where` holds, `fill` elsewhere (no divide warnings)."""
+    num, den = np.asarray(num, dtype=float), np.asarray(den, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(where, num / den, fill)
+
+
+def _scalarize(x):
+    x = np.asarray(x)
+    return float(x) if x.ndim == 0 else x
+
+
+# ---------- Model ----------
+def compute_costs(params=None, **overrides):
+    """Evaluate the full cost model for one or many parameter sets.
+
+    `params` is a CostParams (or a mapping of its fields); keyword overrides
+    replace individual fields. Scalar inputs give float outputs, array
+    inputs give arrays of the broadcast shape.
+    """
+    if params is None:
+        params = CostParams()
+    elif not isinstance(params, CostParams):
+        params = CostParams(**dict(params))
+    if overrides:
+        params = replace(params, **overrides)
+    p = {k: np.asarray(v, dtype=float) for k, v in params.as_dict().items()}
+
+    # 1) Capacity
+    usage1 = p["usage1"]
+    usage2 = 100 - usage1
+    hours_day = p["shifts_per_day"] * p["hours_per_shift"]
+    total_hours_month = hours_day * p["days_month"]
+    avg_speed = p["speed1"] * usage1/100 + p["speed2"] * usage2/100
+    productive_hours = np.maximum(0.0, total_hours_month - p["downtime_h"])
+    prod_month = avg_speed * productive_hours
+    prod_year = prod_month * 12
+    utilization = _div(productive_hours * 100, total_hours_month, total_hours_month > 0, 0.0)
+
+    # 2) Variable costs
+    paper_imp_u = 1.0 + p["paper_imp_waste"]/100
+    paper_prot_u = 1.0 + p["paper_prot_waste"]/100
+    cv_ink = p["ink_ml"]/1000 * p["ink_price_l"]
+    cv_paper_imp = paper_imp_u * p["paper_imp_price"]
+    cv_paper_prot = paper_prot_u * p["paper_prot_price"]
+    cv_elec = _div(p["machine_kw"] * productive_hours * p["elec_price"], prod_month, prod_month != 0, 0.0)
+    cost_var_per_m = cv_ink + cv_paper_imp + cv_paper_prot + cv_elec
+
+    # 3) Fixed costs
+    depr_printer_m = p["invest_printer"] / p["years_printer"] / 12
+    depr_cal_m = p["invest_cal"] / p["years_cal"] / 12
+    fixed_cost_month = (p["salary"] + depr_printer_m + depr_cal_m
+                        + p["rent"] + p["other_fixed"] + p["maintenance"])
+
+    # KPIs
+    sell_price = p["sell_price"]
+    invest = p["invest_printer"] + p["invest_cal"]
+    revenue_m = sell_price * prod_month
+    var_total_m = cost_var_per_m * prod_month
+    profit_m = revenue_m - var_total_m - fixed_cost_month
+    roi_pct = _div(profit_m * 12 * 100, invest, invest > 0, 0.0)
+    gross_margin_per_m = sell_price - cost_var_per_m
+    BE_m = _div(fixed_cost_month, gross_margin_per_m, sell_price > cost_var_per_m, np.nan)
+    fixed_per_m = _div(fixed_cost_month, prod_month, prod_month > 0, np.nan)
+    total_cost_per_m = cost_var_per_m + np.where(np.isnan(fixed_per_m), 0.0, fixed_per_m)
+    net_margin_per_m = _div(profit_m, prod_month, prod_month > 0, np.nan)
+
+    out = dict(
+        usage2=usage2, hours_day=hours_day, total_hours_month=total_hours_month,
+        avg_speed=avg_speed, productive_hours=productive_hours,
+        prod_month=prod_month, prod_year=prod_year, utilization=utilization,
+        paper_imp_u=paper_imp_u, paper_prot_u=paper_prot_u,
+        cv_ink=cv_ink, cv_paper_imp=cv_paper_imp, cv_paper_prot=cv_paper_prot,
+        cv_elec=cv_elec, cost_var_per_m=cost_var_per_m,
+        depr_printer_m=depr_printer_m, depr_cal_m=depr_cal_m,
+        fixed_cost_month=fixed_cost_month,
+        revenue_m=revenue_m, var_total_m=var_total_m, profit_m=profit_m,
+        roi_pct=roi_pct, BE_m=BE_m, fixed_per_m=fixed_per_m,
+        total_cost_per_m=total_cost_per_m, gross_margin_per_m=gross_margin_per_m,
+        net_margin_per_m=net_margin_per_m,
+    )
+    return CostResult(**{k: _scalarize(v) for k, v in out.items()})
@@ -0,0 +1,127 @@
+# app_custo_sublimacao/optimize.py
+# Closed-form / vectorized optimizers over the cost model:
+# target prices, 1-pass vs 2-pass usage mix, and shift/hours configuration.
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, compute_costs
+
+MAX_SHIFTS = 4
+MAX_HOURS_PER_SHIFT = 12
+MAX_HOURS_PER_DAY = 24
+
+
+def _params(params):
+    return params if params is not None else CostParams()
+
+
+# ---------- Target prices ----------
+# Production, variable and fixed costs do not depend on the selling price,
+# so every target price is a closed-form expression of the base result.
+def min_price(params=None):
+    """Price (USD/m) at which monthly profit is zero."""
+    res = compute_costs(_params(params))
+    return np.where(res.prod_month > 0, res.total_cost_per_m, np.nan)[()]
+
+
+def price_for_margin(params=None, margin_pct=20.0):
+    """Price (USD/m) giving a net margin of `margin_pct`% of revenue."""
+    res = compute_costs(_params(params))
+    m = np.asarray(margin_pct, dtype=float) / 100
+    ok = (res.prod_month > 0) & (m < 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(ok, res.total_cost_per_m / (1 - m), np.nan)[()]
+
+
+def price_for_roi(params=None, roi_pct=20.0):
+    """Price (USD/m) giving an annual ROI of `roi_pct`% on the investment."""
+    p = _params(params)
+    res = compute_costs(p)
+    invest = np.asarray(p.invest_printer, dtype=float) + np.asarray(p.invest_cal, dtype=float)
+    target_profit = np.asarray(roi_pct, dtype=float) / 100 * invest / 12
+    with np.errstate(divide="ignore", invalid="ignore"):
+        price = res.cost_var_per_m + (res.fixed_cost_month + target_profit) / res.prod_month
+    return np.where(res.prod_month > 0, price, np.nan)[()]
+
+
+# ---------- 1-pass / 2-pass mix ----------
+@dataclass(frozen=True)
+class UsageMix:
+    usage1: object
+    usage2: object
+    profit_m: object
+    roi_pct: object
+    prod_month: object
+
+
+def best_usage_mix(params=None, min_two_pass_pct=0.0):
+    """usage1 (%) maximizing profit with at least `min_two_pass_pct`% 2-pass work.
+
+    avg_speed is linear in usage1 and electricity per month does not depend
+    on it, so profit is linear in usage1 and the optimum sits on a bound of
+    [0, 100 - min_two_pass_pct]. Both bounds are evaluated in one call.
+    """
+    p = _params(params)
+    hi = 100.0 - np.clip(np.asarray(min_two_pass_pct, dtype=float), 0.0, 100.0)
+    bounds = np.stack(np.broadcast_arrays(np.zeros_like(hi), hi))
+    res = compute_costs(p, usage1=bounds)
+    profit = np.broadcast_to(res.profit_m, bounds.shape)
+    pick = np.argmax(profit, axis=0)[np.newaxis]
+
+    def take(x):
+        return np.take_along_axis(np.broadcast_to(x, bounds.shape), pick, axis=0)[0][()]
+
+    usage1 = take(bounds)
+    return UsageMix(usage1=usage1, usage2=100 - usage1, profit_m=take(res.profit_m),
+                    roi_pct=take(res.roi_pct), prod_month=take(res.prod_month))
+
+
+# ---------- Shifts / hours ----------
+@dataclass(frozen=True)
+class ShiftPlan:
+    shifts_per_day: int
+    hours_per_shift: int
+    prod_month: float
+    cost_per_m: float          # total cost per delivered meter
+    meets_demand: bool
+    table: dict                # all evaluated configs: name -> 2-D array (shifts x hours)
+
+
+def best_shift_plan(params=None, demand_m=None, salary_per_shift=True):
+    """Shift/hours configuration minimizing total cost per delivered meter.
+
+    All 4 x 12 configurations are evaluated in one broadcast call; those
+    over MAX_HOURS_PER_DAY (shifts x hours > 24) are never chosen. With
+    `salary_per_shift`, the salary input is taken as the payroll of the
+    current shift count and scales with shifts_per_day. With `demand_m`
+    (m/month), output beyond demand is not sold, so the cost is spread
+    over min(prod_month, demand_m) and configs meeting demand win.
+    """
+    p = _params(params)
+    shifts = np.arange(1, MAX_SHIFTS + 1, dtype=float)[:, np.newaxis]
+    hours = np.arange(1, MAX_HOURS_PER_SHIFT + 1, dtype=float)[np.newaxis, :]
+    salary = p.salary / max(float(p.shifts_per_day), 1.0) * shifts if salary_per_shift else p.salary
+    res = compute_costs(p, shifts_per_day=shifts, hours_per_shift=hours, salary=salary)
+
+    shape = (len(shifts), hours.shape[1])
+    prod = np.broadcast_to(res.prod_month, shape)
+    delivered = prod if demand_m is None else np.minimum(prod, float(demand_m))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost = np.where(delivered > 0, res.cost_var_per_m + res.fixed_cost_month / delivered, np.inf)
+    cost = np.broadcast_to(cost, shape)
+    meets = np.ones(shape, bool) if demand_m is None else prod >= float(demand_m)
+
+    # Only setups that fit in a day; of those, prefer configs meeting demand,
+    # then lowest cost, then fewest hours/day
+    hours_day = (shifts * hours).ravel()
+    feasible = np.flatnonzero(hours_day <= MAX_HOURS_PER_DAY)
+    order = feasible[np.lexsort((hours_day[feasible], cost.ravel()[feasible], ~meets.ravel()[feasible]))]
+    i, j = np.unravel_index(order[0], shape)
+    return ShiftPlan(
+        shifts_per_day=int(shifts[i, 0]), hours_per_shift=int(hours[0, j]),
+        prod_month=float(prod[i, j]), cost_per_m=float(cost[i, j]),
+        meets_demand=bool(meets[i, j]),
+        table={"prod_month": prod, "cost_per_m": cost, "meets_demand": meets},
+    )
@@ -0,0 +1,138 @@
+# app_custo_sublimacao/projection.py
+# Month-by-month projection over the depreciation horizon: ramp-up,
+# seasonality, downtime schedule and inflation curves, with cash flow,
+# payback, NPV and IRR. Vectorized over months (last axis) and over any
+# array-valued CostParams fields (leading axes = scenarios).
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, compute_costs
+
+
+@dataclass(frozen=True)
+class ProjectionInputs:
+    months: int = 60
+    ramp_months: int = 0                  # months to reach full volume
+    ramp_start_pct: float = 50.0          # volume in month 1 while ramping (% of capacity)
+    seasonality: tuple = (1.0,) * 12      # demand index per calendar month (capped at capacity)
+    start_month: int = 1                  # calendar month of projection month 1 (1 = January)
+    extra_downtime_h: tuple = ()          # extra downtime per projection month (repeats if shorter)
+    price_growth_pct: float = 0.0         # annual selling price change
+    ink_inflation_pct: float = 0.0        # annual ink price change
+    elec_inflation_pct: float = 0.0       # annual electricity price change
+    fixed_inflation_pct: float = 0.0      # annual change of salaries, rent, other, maintenance
+    discount_rate_pct: float = 10.0       # annual, for NPV
+
+
+@dataclass(frozen=True)
+class ProjectionResult:
+    month: np.ndarray                     # 1..months
+    prod: np.ndarray                      # m/month, shape (..., months)
+    revenue: np.ndarray
+    var_cost: np.ndarray
+    fixed_cash: np.ndarray                # cash fixed costs (no depreciation)
+    depreciation: np.ndarray
+    profit: np.ndarray                    # accounting profit
+    cash_flow: np.ndarray                 # revenue - variable - cash fixed
+    cumulative_cash: np.ndarray           # starts at -investment
+    investment: np.ndarray
+    payback_month: np.ndarray             # NaN if not reached within the horizon
+    npv: np.ndarray
+    irr_annual_pct: np.ndarray            # NaN if cash flows never turn the sign
+
+
+def _growth(pct, t):
+    # Annual rate applied continuously per month; month 1 is the base price
+    return (1 + np.asarray(pct, dtype=float) / 100) ** ((t - 1) / 12)
+
+
+def _repeat(values, months):
+    values = np.asarray(values, dtype=float)
+    if values.size == 0:
+        return np.zeros(months)
+    return np.resize(values, months)
+
+
+def irr_monthly(investment, cash_flows, iters=80):
+    """Monthly IRR by vectorized bisection; cash_flows shape (..., T)."""
+    investment = np.asarray(investment, dtype=float)
+    t = np.arange(1, cash_flows.shape[-1] + 1)
+    lo = np.full(np.broadcast_shapes(investment.shape, cash_flows.shape[:-1]), -0.99)
+    hi = np.full_like(lo, 1.0)
+
+    def npv(r):
+        return -investment + np.sum(cash_flows / (1 + r[..., None]) ** t, axis=-1)
+
+    f_lo, f_hi = npv(lo), npv(hi)
+    valid = np.sign(f_lo) != np.sign(f_hi)
+    for _ in range(iters):
+        mid = (lo + hi) / 2
+        f_mid = npv(mid)
+        left = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(left, mid, lo)
+        f_lo = np.where(left, f_mid, f_lo)
+        hi = np.where(left, hi, mid)
+    return np.where(valid, (lo + hi) / 2, np.nan)
+
+
+def project(params=None, inputs=None):
+    """Run the projection. Scalar params give arrays of shape (months,)."""
+    params = params if params is not None else CostParams()
+    inputs = inputs if inputs is not None else ProjectionInputs()
+    T = int(inputs.months)
+    t = np.arange(1, T + 1, dtype=float)
+
+    # Scenario values on the leading axes, months on the last one
+    p = params.replace(**{k: np.asarray(v, dtype=float)[..., None] for k, v in params.as_dict().items()})
+
+    # Volume: ramp-up x seasonality, capped at capacity
+    if inputs.ramp_months > 0:
+        ramp = np.clip(inputs.ramp_start_pct / 100
+                       + (1 - inputs.ramp_start_pct / 100) * (t - 1) / inputs.ramp_months, 0.0, 1.0)
+    else:
+        ramp = np.ones(T)
+    season = _repeat(inputs.seasonality, 12)[(np.arange(T) + inputs.start_month - 1) % 12]
+    volume = np.minimum(ramp * season, 1.0)
+
+    fixed_growth = _growth(inputs.fixed_inflation_pct, t)
+    sell_price = p.sell_price * _growth(inputs.price_growth_pct, t)
+    res = compute_costs(
+        p,
+        downtime_h=p.downtime_h + _repeat(inputs.extra_downtime_h, T),
+        sell_price=sell_price,
+        ink_price_l=p.ink_price_l * _growth(inputs.ink_inflation_pct, t),
+        elec_price=p.elec_price * _growth(inputs.elec_inflation_pct, t),
+        salary=p.salary * fixed_growth,
+    )
+
+    prod = res.prod_month * volume
+    revenue = prod * sell_price
+    var_cost = prod * res.cost_var_per_m
+    fixed_cash = (p.salary + p.rent + p.other_fixed + p.maintenance) * fixed_growth
+    # Straight-line depreciation stops once each machine is written off
+    depreciation = (res.depr_printer_m * (t <= p.years_printer * 12)
+                    + res.depr_cal_m * (t <= p.years_cal * 12))
+    cash_flow = revenue - var_cost - fixed_cash
+    shape = np.broadcast_shapes(cash_flow.shape, depreciation.shape)
+    cash_flow = np.broadcast_to(cash_flow, shape)
+    profit = cash_flow - depreciation
+
+    investment_col = p.invest_printer + p.invest_cal
+    investment = investment_col[..., 0]
+    cumulative = np.cumsum(cash_flow, axis=-1) - investment_col
+    reached = cumulative >= 0
+    payback = np.where(reached.any(axis=-1), reached.argmax(axis=-1) + 1.0, np.nan)
+
+    r = (1 + inputs.discount_rate_pct / 100) ** (1 / 12) - 1
+    npv = np.sum(cash_flow / (1 + r) ** t, axis=-1) - investment
+    irr = irr_monthly(investment, cash_flow)
+
+    return ProjectionResult(
+        month=t.astype(int), prod=np.broadcast_to(prod, shape), revenue=np.broadcast_to(revenue, shape),
+        var_cost=np.broadcast_to(var_cost, shape), fixed_cash=np.broadcast_to(fixed_cash, shape),
+        depreciation=np.broadcast_to(depreciation, shape), profit=profit, cash_flow=cash_flow,
+        cumulative_cash=cumulative, investment=investment, payback_month=payback, npv=npv,
+        irr_annual_pct=((1 + irr) ** 12 - 1) * 100,
+    )
@@ -0,0 +1,112 @@
+# app_custo_sublimacao/reference.py
+# Shared reference data: price lists, machine specs and fixed-cost templates
+# read from one JSON file. Loaded objects are read-only (mapping proxies and
+# frozen CostParams), so a single copy can serve every session of a process.
+
+import json
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+
+from .model import CostParams
+
+# Inputs each kind of entry may set; anything else keeps the model default
+PRICE_FIELDS = ("ink_price_l", "paper_imp_price", "paper_prot_price", "elec_price")
+MACHINE_FIELDS = ("width", "speed1", "speed2", "ink_ml", "machine_kw", "invest_printer", "years_printer",
+                  "invest_cal", "years_cal")
+FIXED_COST_FIELDS = ("salary", "rent", "other_fixed", "maintenance")
+SECTIONS = {"price_lists": PRICE_FIELDS, "machines": MACHINE_FIELDS, "fixed_costs": FIXED_COST_FIELDS}
+DEFAULT_ENTRY = "Default"
+
+
+@dataclass(frozen=True, eq=False)
+class ReferenceData:
+    price_lists: MappingProxyType       # name -> {field: value}
+    machines: MappingProxyType
+    fixed_costs: MappingProxyType
+    source: str = ""                    # file read ("" = built-in defaults)
+    signature: tuple = None             # file_signature() at load time
+
+    def defaults(self, price_list=None, machine=None, fixed_costs=None):
+        """CostParams with the chosen entries over the model defaults (None = first entry).
+
+        The same choice returns the same object, so sessions share it.
+        """
+        return _defaults(self, price_list or next(iter(self.price_lists)),
+                         machine or next(iter(self.machines)), fixed_costs or next(iter(self.fixed_costs)))
+
+
+@lru_cache(maxsize=256)
+def _defaults(ref, price_list, machine, fixed_costs):
+    return CostParams(**{**ref.price_lists[price_list], **ref.machines[machine], **ref.fixed_costs[fixed_costs]})
+
+
+def _freeze(entries):
+    return MappingProxyType({name: MappingProxyType(values) for name, values in entries.items()})
+
+
+def builtin_reference():
+    """One 'Default' entry per section, taken from the CostParams defaults."""
+    base = CostParams().as_dict()
+    return ReferenceData(**{section: _freeze({DEFAULT_ENTRY: {f: base[f] for f in names}})
+                            for section, names in SECTIONS.items()})
+
+
+def file_signature(path):
+    """(mtime_ns, size) of `path`, or None if it does not exist; changes when the file is rewritten."""
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_reference(path):
+    """Read a reference file; sections it omits get the built-in Default entry.
+
+    Format: {"price_lists": {name: {field: value}}, "machines": {...},
+    "fixed_costs": {...}} with the fields listed in SECTIONS.
+    Raises ValueError on malformed content.
+    """
+    signature = file_signature(path)
+    if signature is None:
+        return builtin_reference()
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"{path}: not valid JSON ({e})") from None
+    if not isinstance(raw, dict):
+        raise ValueError(f"{path}: expected an object with {', '.join(SECTIONS)}")
+    unknown = set(raw) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"{path}: unknown sections {sorted(unknown)}")
+
+    builtin = builtin_reference()
+    sections = {}
+    for section, allowed in SECTIONS.items():
+        entries = raw.get(section)
+        if not entries:
+            sections[section] = getattr(builtin, section)
+            continue
+        if not isinstance(entries, dict):
+            raise ValueError(f"{path}: {section} must map names to field values")
+        clean = {}
+        for name, values in entries.items():
+            if not isinstance(values, dict):
+                raise ValueError(f"{path}: {section}[{name!r}] must map fields to values")
+            bad = set(values) - set(allowed)
+            if bad:
+                raise ValueError(f"{path}: {section}[{name!r}] sets {sorted(bad)}; allowed: {', '.join(allowed)}")
+            try:
+                clean[str(name)] = {k: float(v) for k, v in values.items()}
+            except (TypeError, ValueError):
+                raise ValueError(f"{path}: {section}[{name!r}] has a non-numeric value") from None
+        sections[section] = _freeze(clean)
+    return ReferenceData(**sections, source=os.path.abspath(path), signature=signature)
+
+
+def input_deltas(params, base):
+    """{field: value} of the inputs in `params` that differ from `base`."""
+    return {k: v for k, v in params.as_dict().items() if v != getattr(base, k)}
@@ -0,0 +1,202 @@
+# app_custo_sublimacao/report.py
+# Streaming report writer: named tables written row by row to Excel
+# (xlsxwriter constant_memory), zipped CSV or zipped Parquet. Rows come from
+# iterables/generators, so peak memory does not grow with the row count.
+
+import csv
+import io
+import os
+import zipfile
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import chain, islice
+
+from .formatting import MONEY, NUMBER
+from .model import PARAM_NAMES
+from .scenarios import SCENARIO_METRICS, BASE_NAME, evaluate_many
+from .store import MODEL_VERSION, params_hash
+from .tables import (
+    variable_cost_items, fixed_cost_items, summary_items, parameter_items,
+)
+
+FORMATS = {"xlsx": ".xlsx", "csv.zip": ".csv.zip", "parquet.zip": ".parquet.zip"}
+EXCEL_MAX_ROWS = 1_048_575          # data rows below the header
+PARQUET_BATCH_ROWS = 16_384
+SCENARIO_CHUNK = 10_000             # scenarios evaluated per compute_costs call
+
+
+@dataclass(frozen=True)
+class Table:
+    name: str                       # sheet / file name
+    columns: tuple
+    rows: object                    # iterable of tuples, consumed once
+    units: dict = None              # {column: Unit}; number formats in Excel only
+
+
+# ---------- Writers ----------
+class _ExcelReport:
+    # constant_memory flushes each row to a temp file as it is written,
+    # so rows must arrive in order, one sheet after the other
+    def __init__(self, target, currency):
+        import xlsxwriter
+        self.book = xlsxwriter.Workbook(target, {"constant_memory": True, "nan_inf_to_errors": True})
+        self.header = self.book.add_format({"bold": True})
+        # Cells stay numeric; Excel shows them with the reader's own separators
+        self.formats = {}
+        self.currency = currency
+
+    def _num_format(self, unit):
+        spec = "#,##0" + ("." + "0" * unit.decimals if unit.decimals else "")
+        if unit.money:
+            spec = f'"{self.currency}" ' + spec
+        if unit.suffix == "%":
+            spec += '"%"'
+        if spec not in self.formats:
+            self.formats[spec] = self.book.add_format({"num_format": spec})
+        return self.formats[spec]
+
+    def table(self, table):
+        sheet = self.book.add_worksheet(table.name[:31])
+        units = table.units or {}
+        for col, name in enumerate(table.columns):
+            unit = units.get(name)
+            sheet.set_column(col, col, max(len(str(name)) + 2, 14),
+                             self._num_format(unit) if unit is not None else None)
+        sheet.write_row(0, 0, table.columns, self.header)
+        sheet.freeze_panes(1, 0)
+        n = 0
+        for n, values in enumerate(table.rows, start=1):
+            if n > EXCEL_MAX_ROWS:
+                raise ValueError(f"Too many rows for one Excel sheet ({table.name!r}); "
+                                 "write CSV or Parquet instead.")
+            sheet.write_row(n, 0, values)
+        return n
+
+    def close(self):
+        self.book.close()
+
+
+class _CsvZipReport:
+    def __init__(self, target):
+        self.zip = zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED)
+
+    def table(self, table):
+        with self.zip.open(f"{table.name}.csv", "w", force_zip64=True) as raw, \
+                io.TextIOWrapper(raw, encoding="utf-8", newline="") as text:
+            out = csv.writer(text)
+            out.writerow(table.columns)
+            n = 0
+            for n, values in enumerate(table.rows, start=1):
+                out.writerow(values)
+        return n
+
+    def close(self):
+        self.zip.close()
+
+
+class _ParquetZipReport:
+    # One Parquet file per table; already compressed, so stored as is
+    def __init__(self, target):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet reports require pyarrow (pip install pyarrow).") from None
+        self.pa, self.pq = pa, pq
+        self.zip = zipfile.ZipFile(target, "w", zipfile.ZIP_STORED)
+
+    def table(self, table):
+        pa = self.pa
+        rows = iter(table.rows)
+        n = 0
+        writer = None
+        with self.zip.open(f"{table.name}.parquet", "w", force_zip64=True) as raw:
+            while True:
+                batch = list(islice(rows, PARQUET_BATCH_ROWS))
+                if batch or writer is None:
+                    arrays = ([pa.array(col) for col in zip(*batch)] if batch
+                              else [pa.array([], pa.null()) for _ in table.columns])
+                    chunk = pa.Table.from_arrays(arrays, names=list(table.columns))
+                    if writer is None:
+                        writer = self.pq.ParquetWriter(raw, chunk.schema)
+                    writer.write_table(chunk.cast(writer.schema))
+                    n += len(batch)
+                if len(batch) < PARQUET_BATCH_ROWS:
+                    break
+            writer.close()
+        return n
+
+    def close(self):
+        self.zip.close()
+
+
+def report_kind(path):
+    """Report format from a file name ('xlsx', 'csv.zip' or 'parquet.zip')."""
+    name = os.path.basename(str(path)).lower()
+    for kind, ext in FORMATS.items():
+        if name.endswith(ext):
+            return kind
+    raise ValueError(f"Unsupported report format: {path!r} (use {', '.join(FORMATS.values())})")
+
+
+def write_report(target, tables, kind=None, currency="USD"):
+    """Write `tables` (Table) to a path or binary file object; returns {table name: rows}.
+
+    `kind` defaults to the format implied by the path's extension.
+    """
+    kind = kind or report_kind(target)
+    if kind == "xlsx":
+        writer = _ExcelReport(target, currency)
+    elif kind == "csv.zip":
+        writer = _CsvZipReport(target)
+    elif kind == "parquet.zip":
+        writer = _ParquetZipReport(target)
+    else:
+        raise ValueError(f"Unknown report format: {kind!r} (use one of {sorted(FORMATS)})")
+    try:
+        return {t.name: writer.table(t) for t in tables}
+    finally:
+        writer.close()
+
+
+# ---------- Report contents ----------
+def about_rows(params, stamp=True):
+    """Who/what produced the report: model version, input hash and, with `stamp`, time (UTC)."""
+    yield ("model_version", str(MODEL_VERSION))
+    yield ("params_hash", params_hash(params))
+    if stamp:
+        yield ("generated_at", datetime.now(timezone.utc).isoformat(timespec="seconds"))
+
+
+def scenario_rows(named_params, metrics=SCENARIO_METRICS, chunk=SCENARIO_CHUNK):
+    """(name, every input, every metric) per (name, CostParams), evaluated chunk by chunk."""
+    named_params = iter(named_params)
+    while True:
+        batch = list(islice(named_params, chunk))
+        if not batch:
+            return
+        out = evaluate_many([p for _, p in batch], metrics)
+        cols = [out[m].tolist() for m in metrics]
+        for i, (name, p) in enumerate(batch):
+            yield (name, *(float(getattr(p, f)) for f in PARAM_NAMES), *(c[i] for c in cols))
+
+
+def cost_report(params, res, currency="USD", scenarios=(), stamp=True):
+    """Tables of the cost report.
+
+    `scenarios` ((name, CostParams) pairs, possibly a generator) adds a
+    Scenarios table with Base first; its rows are evaluated while written.
+    stamp=False leaves the generation time out of About, for reports that
+    are cached and served again later.
+    """
+    tables = [
+        Table("Variables", ("Item", f"{currency}/m"), variable_cost_items(res), {f"{currency}/m": MONEY}),
+        Table("Fixed", ("Item", f"{currency}/month"), fixed_cost_items(params, res), {f"{currency}/month": MONEY}),
+        Table("Summary", ("Metric", "Value"), summary_items(res, currency), {"Value": NUMBER}),
+        Table("Parameters", ("Parameter", "Value"), parameter_items(params, res)),
+        Table("About", ("Key", "Value"), about_rows(params, stamp)),
+    ]
+    if scenarios:
+        columns = ("Scenario", *PARAM_NAMES, *SCENARIO_METRICS)
+        tables.append(Table("Scenarios", columns, scenario_rows(chain([(BASE_NAME, params)], scenarios))))
+    return tables
@@ -0,0 +1,144 @@
+# app_custo_sublimacao/risk.py
+# Monte Carlo risk simulation over the cost model. Samples are drawn and
+# evaluated in NumPy batches (one compute_costs call per chunk, no Python
+# loop over samples).
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams, PARAM_NAMES, compute_costs
+
+# Inputs users typically put a distribution on
+RISK_PARAMS = (
+    "ink_ml", "ink_price_l", "paper_imp_price", "paper_imp_waste",
+    "paper_prot_price", "paper_prot_waste", "elec_price", "downtime_h",
+    "sell_price", "salary",
+)
+RISK_OUTPUTS = ("profit_m", "roi_pct", "BE_m")
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+# ---------- Distributions ----------
+# All model inputs are non-negative, so draws are clipped at zero.
+@dataclass(frozen=True)
+class Normal:
+    mean: float
+    sd: float
+
+    def sample(self, rng, n):
+        return np.maximum(0.0, rng.normal(self.mean, self.sd, n))
+
+
+@dataclass(frozen=True)
+class Triangular:
+    low: float
+    mode: float
+    high: float
+
+    def sample(self, rng, n):
+        if self.high <= self.low:
+            return np.full(n, float(self.mode))
+        return np.maximum(0.0, rng.triangular(self.low, self.mode, self.high, n))
+
+
+@dataclass(frozen=True)
+class Uniform:
+    low: float
+    high: float
+
+    def sample(self, rng, n):
+        return np.maximum(0.0, rng.uniform(self.low, self.high, n))
+
+
+def spread_distribution(kind, base, spread_pct, spread_abs=None):
+    """Distribution centred on `base` with a relative spread (in %).
+
+    `spread_abs` (in the input's units) replaces the relative spread; it is
+    the only way to spread an input whose base is 0.
+    """
+    delta = abs(base) * spread_pct / 100 if spread_abs is None else abs(spread_abs)
+    if kind == "normal":
+        return Normal(base, delta)
+    if kind == "triangular":
+        return Triangular(base - delta, base, base + delta)
+    if kind == "uniform":
+        return Uniform(base - delta, base + delta)
+    raise ValueError(f"Unknown distribution: {kind!r}")
+
+
+# ---------- Results ----------
+@dataclass(frozen=True)
+class RiskResult:
+    n: int
+    samples: dict            # output name -> 1-D array of length n; None if not kept
+    percentiles: dict        # output name -> {p: value}
+    mean: dict
+    std: dict
+    prob_loss: float         # P(profit_m < 0)
+    prob_no_be: float        # P(sell_price <= variable cost), BE undefined
+    histograms: dict         # output name -> (counts, edges) of the finite samples
+
+    def histogram(self, name, bins=None):
+        """(counts, edges); computed at simulation time unless other `bins` are asked for."""
+        if bins is None:
+            return self.histograms[name]
+        if self.samples is None:
+            raise ValueError("Samples were not kept; simulate with keep_samples=True to rebin.")
+        x = self.samples[name]
+        return np.histogram(x[np.isfinite(x)], bins=bins)
+
+    def summary_rows(self):
+        rows = []
+        for name in RISK_OUTPUTS:
+            row = {"Output": name, "Mean": self.mean[name], "Std": self.std[name]}
+            row.update({f"P{p}": v for p, v in self.percentiles[name].items()})
+            rows.append(row)
+        return rows
+
+
+# ---------- Simulation ----------
+def simulate(params=None, distributions=None, n=100_000, seed=None, chunk_size=100_000, bins=50,
+             keep_samples=True):
+    """Draw `n` samples of the uncertain inputs and evaluate the model.
+
+    `distributions` maps CostParams field names to Normal/Triangular/Uniform.
+    Evaluation runs in chunks of `chunk_size`, so temporaries stay bounded;
+    only the RISK_OUTPUTS samples (3 x n floats) are kept, and not even
+    those with keep_samples=False (the summary and `bins`-bin histograms
+    remain). Results are reproducible for a given seed and chunk size.
+    """
+    params = params if params is not None else CostParams()
+    distributions = distributions or {}
+    unknown = set(distributions) - set(PARAM_NAMES)
+    if unknown:
+        raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+    n = int(n)
+    chunk_size = max(1, int(chunk_size))
+
+    rng = np.random.default_rng(seed)
+    out = {name: np.empty(n) for name in RISK_OUTPUTS}
+    for start in range(0, n, chunk_size):
+        m = min(chunk_size, n - start)
+        draws = {k: d.sample(rng, m) for k, d in distributions.items()}
+        res = compute_costs(params, **draws)
+        for name in RISK_OUTPUTS:
+            out[name][start:start + m] = getattr(res, name)
+
+    percentiles, mean, std, histograms = {}, {}, {}, {}
+    for name, x in out.items():
+        finite = x[np.isfinite(x)]
+        histograms[name] = np.histogram(finite, bins=bins)
+        if finite.size:
+            percentiles[name] = dict(zip(PERCENTILES, np.percentile(finite, PERCENTILES).tolist()))
+            mean[name], std[name] = float(finite.mean()), float(finite.std())
+        else:
+            percentiles[name] = {p: np.nan for p in PERCENTILES}
+            mean[name] = std[name] = np.nan
+
+    return RiskResult(
+        n=n, samples=out if keep_samples else None, percentiles=percentiles, mean=mean, std=std,
+        prob_loss=float(np.mean(out["profit_m"] < 0)) if n else np.nan,
+        prob_no_be=float(np.mean(np.isnan(out["BE_m"]))) if n else np.nan,
+        histograms=histograms,
+    )
@@ -0,0 +1,95 @@
+# app_custo_sublimacao/scenarios.py
+# Named scenarios (overrides on a base CostParams), evaluated together in
+# one vectorized compute_costs call. Results are cached per scenario, so
+# editing one scenario recomputes only that one.
+
+import numpy as np
+
+from .model import CostParams, PARAM_NAMES, compute_costs
+
+SCENARIO_METRICS = (
+    "prod_month", "revenue_m", "var_total_m", "fixed_cost_month", "profit_m",
+    "roi_pct", "BE_m", "cost_var_per_m", "total_cost_per_m", "utilization",
+)
+BASE_NAME = "Base"
+
+
+def evaluate_many(param_list, metrics=SCENARIO_METRICS):
+    """Evaluate a list of CostParams in one call; returns {metric: array}."""
+    if not param_list:
+        return {m: np.empty(0) for m in metrics}
+    stacked = {name: np.array([getattr(p, name) for p in param_list], dtype=float) for name in PARAM_NAMES}
+    res = compute_costs(CostParams(**stacked))
+    n = len(param_list)
+    return {m: np.broadcast_to(getattr(res, m), (n,)).copy() for m in metrics}
+
+
+class ScenarioSet:
+    """Ordered named scenarios on top of a base parameter set."""
+
+    def __init__(self, base=None):
+        self.base = base if base is not None else CostParams()
+        self._overrides = {}          # name -> {field: value}
+        self._cache = {}              # resolved CostParams -> {metric: value}
+
+    # ---------- Definition ----------
+    def set(self, name, **overrides):
+        if name == BASE_NAME:
+            raise ValueError(f"{BASE_NAME!r} is reserved for the base parameters")
+        unknown = set(overrides) - set(PARAM_NAMES)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {sorted(unknown)}")
+        self._overrides[name] = {k: v for k, v in overrides.items() if v is not None}
+
+    def remove(self, name):
+        self._overrides.pop(name, None)
+
+    def replace_all(self, scenarios):
+        """Replace every scenario from a {name: overrides} mapping (keeps the cache)."""
+        self._overrides = {}
+        for name, overrides in scenarios.items():
+            self.set(name, **overrides)
+
+    def set_base(self, base):
+        self.base = base
+
+    @property
+    def names(self):
+        return list(self._overrides)
+
+    def __len__(self):
+        return len(self._overrides)
+
+    def params(self, name):
+        if name == BASE_NAME:
+            return self.base
+        return self.base.replace(**self._overrides[name])
+
+    # ---------- Evaluation ----------
+    def results(self):
+        """Metrics for Base and every scenario (rows in definition order).
+
+        Only parameter sets not seen before are evaluated, all in one call.
+        """
+        names = [BASE_NAME] + self.names
+        resolved = [self.params(n) for n in names]
+        missing = list(dict.fromkeys(p for p in resolved if p not in self._cache))
+        if missing:
+            out = evaluate_many(missing)
+            for i, p in enumerate(missing):
+                self._cache[p] = {m: float(out[m][i]) for m in SCENARIO_METRICS}
+        # Drop results no scenario refers to any more
+        live = set(resolved)
+        self._cache = {p: r for p, r in self._cache.items() if p in live}
+        import pandas as pd
+        return pd.DataFrame([self._cache[p] for p in resolved], index=pd.Index(names, name="Scenario"))
+
+    def compare(self, rank_by="profit_m"):
+        """Results with differences against Base and a rank (1 = best) on `rank_by`."""
+        df = self.results()
+        base = df.loc[BASE_NAME]
+        for m in ("profit_m", "roi_pct", "total_cost_per_m"):
+            df[f"Δ {m}"] = df[m] - base[m]
+        ascending = rank_by in ("total_cost_per_m", "cost_var_per_m", "BE_m")
+        df["rank"] = df[rank_by].rank(ascending=ascending, method="min", na_option="bottom").astype(int)
+        return df
@@ -0,0 +1,161 @@
+# app_custo_sublimacao/scheduler.py
+# Job-level discrete-event simulation of a month of printing: EDD dispatch
+# over one or more identical lines, changeovers and random breakdowns on
+# the working-hours clock (shifts_per_day x hours_per_shift x days_month).
+# Realized production/utilization feed back into the cost model.
+
+import heapq
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+
+from .model import CostParams
+
+
+@dataclass(frozen=True)
+class ShopConfig:
+    lines: int = 1
+    changeover_h: float = 0.25      # setup before every job
+    mode_change_h: float = 0.5      # extra setup when switching 1-pass <-> 2-pass
+    mtbf_h: float = 0.0             # mean printing hours between breakdowns (0 = none)
+    mttr_h: float = 2.0             # mean repair time
+
+
+@dataclass(frozen=True)
+class SimResult:
+    lines: int
+    horizon_h: float                # working hours per line in the month
+    prod_month: float               # meters printed within the horizon
+    printing_h: float               # summed over lines
+    changeover_h: float
+    breakdown_h: float
+    idle_h: float
+    utilization: float              # printing / available, %
+    late_jobs: int
+    mean_lateness_h: float          # over late jobs
+    max_lateness_h: float
+    unfinished_jobs: int            # not finished within the horizon
+    share_1pass_time: float         # % of printing time in 1-pass mode
+    finish_h: np.ndarray            # completion time per job (input order)
+
+    def to_params(self, params):
+        """CostParams whose capacity matches the simulated month.
+
+        usage1 becomes the 1-pass share of printing time and downtime_h the
+        non-printing hours of an average line, so compute_costs reproduces
+        prod_month / lines for the simulated speeds.
+        """
+        return params.replace(usage1=self.share_1pass_time,
+                              downtime_h=max(0.0, self.horizon_h - self.printing_h / self.lines))
+
+
+def jobs_from_arrays(meters, passes=1, due_h=np.inf):
+    """Compact job table: a structured NumPy array (one record per job)."""
+    meters = np.asarray(meters, dtype=float).ravel()
+    n = len(meters)
+    jobs = np.empty(n, dtype=[("meters", "f8"), ("passes", "i1"), ("due_h", "f8")])
+    jobs["meters"] = meters
+    jobs["passes"] = np.broadcast_to(np.asarray(passes), (n,))
+    jobs["due_h"] = np.broadcast_to(np.asarray(due_h, dtype=float), (n,))
+    return jobs
+
+
+def simulate_month(jobs, params=None, config=None, seed=None):
+    """Simulate one month; `jobs` from jobs_from_arrays."""
+    params = params if params is not None else CostParams()
+    config = config if config is not None else ShopConfig()
+    rng = np.random.default_rng(seed)
+    horizon = float(params.shifts_per_day * params.hours_per_shift * params.days_month)
+    n = len(jobs)
+    lines = max(int(config.lines), 1)
+
+    speed = np.where(jobs["passes"] == 2, params.speed2, params.speed1).astype(float)
+    with np.errstate(divide="ignore"):
+        proc = np.where(speed > 0, jobs["meters"] / speed, np.inf)
+    # A job whose pass mode has no speed can never run: it is left unfinished
+    # with nothing printed instead of being dispatched
+    runnable = np.isfinite(proc)
+    order = np.argsort(jobs["due_h"], kind="stable")           # EDD dispatch
+    order = order[runnable[order]]
+
+    # Per-line state
+    mode = [-1] * lines
+    to_failure = (rng.exponential(config.mtbf_h, lines) if config.mtbf_h > 0 else np.full(lines, np.inf)).tolist()
+    free = [(0.0, line) for line in range(lines)]               # event queue: (time line becomes free, line)
+    heapq.heapify(free)
+
+    finish = np.full(n, np.inf)
+    print_start = np.full(n, np.inf)
+    changeover = breakdown = 0.0
+    for i in order:
+        t, line = heapq.heappop(free)
+        setup = config.changeover_h + (config.mode_change_h if mode[line] not in (-1, jobs["passes"][i]) else 0.0)
+        mode[line] = jobs["passes"][i]
+        start = t + setup
+        remaining = proc[i]
+        end = start
+        # Breakdowns interrupt printing; the job resumes after repair
+        while remaining > to_failure[line]:
+            end += to_failure[line]
+            remaining -= to_failure[line]
+            repair = rng.exponential(config.mttr_h) if config.mttr_h > 0 else 0.0
+            end += repair
+            breakdown += min(repair, max(0.0, horizon - (end - repair)))
+            to_failure[line] = rng.exponential(config.mtbf_h)
+        to_failure[line] -= remaining
+        end += remaining
+
+        print_start[i], finish[i] = start, end
+        changeover += min(setup, max(0.0, horizon - t))
+        heapq.heappush(free, (end, line))
+
+    # Only work inside the horizon counts for this month
+    with np.errstate(divide="ignore", invalid="ignore"):
+        done_frac = np.clip((horizon - print_start) / (finish - print_start), 0.0, 1.0)
+    done_frac = np.where(finish <= horizon, 1.0, np.where(runnable, done_frac, 0.0))
+    printed_h = np.where(runnable, proc, 0.0) * done_frac
+    printing = float(printed_h.sum())
+    printing_1pass = float(printed_h[jobs["passes"] != 2].sum())
+    prod = float((jobs["meters"] * done_frac).sum())
+
+    available = horizon * lines
+    with np.errstate(invalid="ignore"):
+        lateness = finish - jobs["due_h"]
+    late = runnable & (lateness > 0)
+    return SimResult(
+        lines=lines, horizon_h=horizon, prod_month=prod, printing_h=printing, changeover_h=float(changeover),
+        breakdown_h=breakdown, idle_h=max(0.0, available - printing - changeover - breakdown),
+        utilization=printing / available * 100 if available else 0.0,
+        late_jobs=int(late.sum()),
+        mean_lateness_h=float(lateness[late].mean()) if late.any() else 0.0,
+        max_lateness_h=float(lateness[late].max()) if late.any() else 0.0,
+        unfinished_jobs=int((finish > horizon).sum()),
+        share_1pass_time=printing_1pass / printing * 100 if printing else 0.0,
+        finish_h=finish,
+    )
+
+
+def _replicate_one(args):
+    jobs, params, config, seed = args
+    r = simulate_month(jobs, params, config, seed)
+    return (r.prod_month, r.utilization, r.breakdown_h, r.idle_h, r.late_jobs, r.mean_lateness_h)
+
+
+REPLICATION_FIELDS = ("prod_month", "utilization", "breakdown_h", "idle_h", "late_jobs", "mean_lateness_h")
+
+
+def replicate(jobs, params=None, config=None, n=100, seed=None, workers=1):
+    """Run `n` independent replications; returns {field: array of n}.
+
+    Seeds come from one SeedSequence, so results do not depend on `workers`.
+    """
+    seeds = np.random.SeedSequence(seed).spawn(int(n))
+    tasks = [(jobs, params, config, s) for s in seeds]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows = list(pool.map(_replicate_one, tasks, chunksize=max(1, n // (4 * workers))))
+    else:
+        rows = [_replicate_one(t) for t in tasks]
+    out = np.array(rows, dtype=float).reshape(-1, len(REPLICATION_FIELDS))
+    return {name: out[:, k] for k, name in enumerate(REPLICATION_FIELDS)}
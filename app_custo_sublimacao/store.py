@@ -0,0 +1,170 @@
+# app_custo_sublimacao/store.py
+# Local scenario library (SQLite): complete input sets indexed by plant,
+# customer and date, plus results cached under a hash of the inputs.
+
+import hashlib
+import json
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from .model import CostParams, PARAM_NAMES, RESULT_NAMES, compute_costs
+
+# Bump when the cost formulas change so cached results are recomputed
+MODEL_VERSION = 1
+# Used when SUBLIMACAO_STORE is not set
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".app_custo_sublimacao", "scenarios.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT NOT NULL,
+    plant       TEXT NOT NULL DEFAULT '',
+    customer    TEXT NOT NULL DEFAULT '',
+    created_at  TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    params_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_scenarios_created  ON scenarios (created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_scenarios_plant    ON scenarios (plant, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_scenarios_customer ON scenarios (customer, created_at DESC);
+CREATE INDEX IF NOT EXISTS ix_scenarios_hash     ON scenarios (params_hash);
+CREATE TABLE IF NOT EXISTS results (
+    params_hash   TEXT NOT NULL,
+    model_version INTEGER NOT NULL,
+    results_json  TEXT NOT NULL,
+    PRIMARY KEY (params_hash, model_version)
+);
+"""
+
+
+def params_hash(params):
+    """Content hash of a scalar CostParams (stable across processes)."""
+    payload = json.dumps({k: float(v) for k, v in params.as_dict().items()}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class ScenarioRecord:
+    id: int
+    name: str
+    plant: str
+    customer: str
+    created_at: str
+    params_hash: str
+    profit_m: float = None
+    roi_pct: float = None
+
+
+class ScenarioStore:
+    def __init__(self, path=None):
+        # The environment is read here, not at import, so it can be set late
+        path = path or os.environ.get("SUBLIMACAO_STORE") or DEFAULT_PATH
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._memory = sqlite3.connect(path, check_same_thread=False) if path == ":memory:" else None
+        with self._connect() as con:
+            con.executescript(_SCHEMA)
+            if self._memory is None:
+                con.execute("PRAGMA journal_mode=WAL")
+
+    @contextmanager
+    def _connect(self):
+        # One short-lived connection per operation: safe across Streamlit threads
+        con = self._memory or sqlite3.connect(self.path, timeout=10)
+        try:
+            with con:
+                yield con
+        finally:
+            if self._memory is None:
+                con.close()
+
+    # ---------- Scenarios ----------
+    def save(self, params, name, plant="", customer="", created_at=None):
+        """Store a complete input set (and its results); returns the scenario id."""
+        h = params_hash(params)
+        created_at = created_at or datetime.now(timezone.utc).isoformat(timespec="seconds")
+        with self._connect() as con:
+            cur = con.execute(
+                "INSERT INTO scenarios (name, plant, customer, created_at, params_hash, params_json) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (name, plant or "", customer or "", created_at, h,
+                 json.dumps({k: float(v) for k, v in params.as_dict().items()})),
+            )
+            scenario_id = cur.lastrowid
+        self.results(params, h)
+        return scenario_id
+
+    def load(self, scenario_id):
+        """(ScenarioRecord, CostParams) for `scenario_id`; KeyError if missing."""
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT id, name, plant, customer, created_at, params_hash, params_json "
+                "FROM scenarios WHERE id = ?", (scenario_id,)
+            ).fetchone()
+        if row is None:
+            raise KeyError(scenario_id)
+        stored = json.loads(row[6])
+        params = CostParams(**{k: v for k, v in stored.items() if k in PARAM_NAMES})
+        return ScenarioRecord(*row[:6]), params
+
+    def delete(self, scenario_id):
+        with self._connect() as con:
+            con.execute("DELETE FROM scenarios WHERE id = ?", (scenario_id,))
+
+    def list(self, plant=None, customer=None, since=None, until=None, name_like=None, limit=100, offset=0):
+        """Most recent scenarios first, with cached profit/ROI (no recompute)."""
+        where, args = [], []
+        if plant:
+            where.append("s.plant = ?"); args.append(plant)
+        if customer:
+            where.append("s.customer = ?"); args.append(customer)
+        if since:
+            where.append("s.created_at >= ?"); args.append(since)
+        if until:
+            where.append("s.created_at < ?"); args.append(until)
+        if name_like:
+            where.append("s.name LIKE ?"); args.append(f"%{name_like}%")
+        sql = (
+            "SELECT s.id, s.name, s.plant, s.customer, s.created_at, s.params_hash, "
+            "json_extract(r.results_json, '$.profit_m'), json_extract(r.results_json, '$.roi_pct') "
+            "FROM scenarios s LEFT JOIN results r "
+            "ON r.params_hash = s.params_hash AND r.model_version = ? "
+            + ("WHERE " + " AND ".join(where) + " " if where else "")
+            + "ORDER BY s.created_at DESC, s.id DESC LIMIT ? OFFSET ?"
+        )
+        with self._connect() as con:
+            rows = con.execute(sql, [MODEL_VERSION, *args, int(limit), int(offset)]).fetchall()
+        return [ScenarioRecord(*r) for r in rows]
+
+    def distinct(self, column):
+        """Distinct non-empty plants or customers (for filters)."""
+        if column not in ("plant", "customer"):
+            raise ValueError(column)
+        with self._connect() as con:
+            rows = con.execute(f"SELECT DISTINCT {column} FROM scenarios WHERE {column} != '' ORDER BY 1").fetchall()
+        return [r[0] for r in rows]
+
+    # ---------- Results cache ----------
+    def results(self, params, h=None):
+        """Model results for `params` as {name: float}, computed at most once per input hash."""
+        h = h or params_hash(params)
+        with self._connect() as con:
+            row = con.execute(
+                "SELECT results_json FROM results WHERE params_hash = ? AND model_version = ?",
+                (h, MODEL_VERSION),
+            ).fetchone()
+        if row is not None:
+            return json.loads(row[0])
+        res = compute_costs(params)
+        # JSON has no NaN literal; store undefined values as null
+        out = {k: (None if v != v else float(v)) for k, v in ((k, getattr(res, k)) for k in RESULT_NAMES)}
+        with self._connect() as con:
+            con.execute(
+                "INSERT OR REPLACE INTO results (params_hash, model_version, results_json) VALUES (?, ?, ?)",
+                (h, MODEL_VERSION, json.dumps(out)),
+            )
+        return out
@@ -0,0 +1,59 @@
+# app_custo_sublimacao/tables.py
+# Numeric report tables (pandas) built from CostParams/CostResult.
+# Shared by the app exports and the headless tools. pandas is imported only
+# when a DataFrame is built: the app's first page does not need it.
+
+from .formatting import MONEY, METERS, PERCENT
+
+
+# ---------- Plain (label, value) rows: enough for small formatted views ----------
+def variable_cost_items(res):
+    return [("Ink", res.cv_ink), ("Printing paper", res.cv_paper_imp), ("Protective paper", res.cv_paper_prot),
+            ("Electricity", res.cv_elec), ("Total variable", res.cost_var_per_m)]
+
+
+def fixed_cost_items(params, res):
+    return [("Salaries", params.salary), ("Printer depreciation", res.depr_printer_m),
+            ("Calender depreciation", res.depr_cal_m), ("Rent", params.rent), ("Other", params.other_fixed),
+            ("Maintenance", params.maintenance), ("Total", res.fixed_cost_month)]
+
+
+def summary_items(res, currency="USD"):
+    return [("Production (m)", res.prod_month), (f"Revenue ({currency})", res.revenue_m),
+            (f"Variable cost ({currency})", res.var_total_m), (f"Fixed cost ({currency})", res.fixed_cost_month),
+            (f"Profit ({currency})", res.profit_m), ("ROI (%)", res.roi_pct)]
+
+
+# Display unit of each summary_items row, in order
+SUMMARY_UNITS = (METERS, MONEY, MONEY, MONEY, MONEY, PERCENT)
+
+# Capacity figures derived from the inputs, reported next to them
+DERIVED_PARAMETERS = ("usage2", "avg_speed", "productive_hours", "prod_month", "utilization")
+
+
+def parameter_items(params, res):
+    """Every CostParams input (prices, fixed costs, waste, ...) plus DERIVED_PARAMETERS."""
+    return [*((k, float(v)) for k, v in params.as_dict().items()),
+            *((name, float(getattr(res, name))) for name in DERIVED_PARAMETERS)]
+
+
+# ---------- DataFrames (exports) ----------
+def _frame(items, label, value):
+    import pandas as pd
+    return pd.DataFrame({label: [k for k, _ in items], value: [v for _, v in items]})
+
+
+def variable_costs_frame(res, currency="USD"):
+    return _frame(variable_cost_items(res), "Item", f"{currency}/m")
+
+
+def fixed_costs_frame(params, res, currency="USD"):
+    return _frame(fixed_cost_items(params, res), "Item", f"{currency}/month")
+
+
+def summary_frame(res, currency="USD"):
+    return _frame(summary_items(res, currency), "Metric", "Value").round(2)
+
+
+def parameters_frame(params, res):
+    return _frame(parameter_items(params, res), "Parameter", "Value")
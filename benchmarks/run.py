@@ -0,0 +1,404 @@
+# benchmarks/run.py
+# Performance benchmarks for the cost model, report tables, report writer and
+# a full headless rerun of app.py; compares against stored JSON baselines.
+# Run (from the repository root): python -m benchmarks.run [--save] [--only model_scalar]
+
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep the app's scenario library out of the user's home directory; set before
+# the package (and the app runs, and their subprocesses) can read it
+os.environ.setdefault("SUBLIMACAO_STORE", os.path.join(tempfile.mkdtemp(), "scenarios.db"))
+
+from app_custo_sublimacao import CostParams, PARAM_NAMES, compute_costs
+from app_custo_sublimacao.scenarios import ScenarioSet, evaluate_many
+from app_custo_sublimacao.formatting import Formatter, MONEY
+from app_custo_sublimacao.report import write_report, cost_report
+from app_custo_sublimacao.artwork import measure_coverage
+from app_custo_sublimacao.goalseek import goal_seek_many
+from app_custo_sublimacao.tables import (
+    variable_costs_frame, fixed_costs_frame, summary_frame, parameters_frame,
+)
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+DEFAULT_THRESHOLD_PCT = 25.0
+# Whole-app runs (hundreds of ms of Streamlit work each) vary far more between
+# runs than the kernels: they are compared on their fastest run, with more slack
+APP_BENCHMARKS = frozenset(("app_cold", "app_rerun", "app_first_kpi", "process_start"))
+APP_THRESHOLD_PCT = 50.0
+STARTUP_BUDGET_MS = 300.0           # time to first KPI for a new session on a warm server
+
+
+# ---------- Measurement ----------
+def measure(fn, items=1, repeat=20, warmup=2, memory=True, self_timed=False):
+    """Latency percentiles (ms), throughput (items/s) and peak traced memory (MiB).
+
+    With self_timed, `fn` returns the seconds to record instead of being timed.
+    """
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        elapsed = fn()
+        times.append(elapsed if self_timed else time.perf_counter() - t0)
+    peak = None
+    if memory:
+        # Separate pass: tracemalloc slows allocation-heavy code down
+        tracemalloc.start()
+        try:
+            fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    ms = np.array(times) * 1000
+    return {
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "mean_ms": float(ms.mean()),
+        "min_ms": float(ms.min()),
+        "throughput_per_s": items / statistics.median(times) if statistics.median(times) > 0 else float("inf"),
+        "peak_mib": peak,
+        "repeat": repeat,
+    }
+
+
+# ---------- Benchmarks ----------
+# Each returns (callable, items per call, repeat)
+def bench_model_scalar():
+    params = CostParams()
+    return (lambda: compute_costs(params)), 1, 200
+
+
+def bench_model_batch():
+    n = 1_000_000
+    rng = np.random.default_rng(0)
+    params = CostParams(sell_price=rng.uniform(2, 6, n), usage1=rng.uniform(0, 100, n),
+                        downtime_h=rng.uniform(0, 40, n))
+    return (lambda: compute_costs(params)), n, 10
+
+
+def bench_sensitivity():
+    # Same work as the app's sensitivity table: all varied inputs in one evaluate_many call
+    params = CostParams()
+    keys = ("ink_ml", "machine_kw", "salary")
+
+    def run():
+        return evaluate_many([params.replace(**{k: getattr(params, k) * 1.1}) for k in keys],
+                             metrics=("roi_pct", "BE_m"))
+    return run, len(keys), 200
+
+
+def bench_whatif():
+    rng = np.random.default_rng(0)
+    names = ("ink_price_l", "sell_price", "downtime_h", "salary")
+    scenarios = {f"S{i}": {k: float(getattr(CostParams(), k) * rng.uniform(0.8, 1.2)) for k in names}
+                 for i in range(50)}
+
+    def run():
+        ss = ScenarioSet(CostParams())
+        ss.replace_all(scenarios)
+        return ss.compare("profit_m")
+    return run, len(scenarios) + 1, 50
+
+
+def bench_whatif_many():
+    base = CostParams()
+    param_list = [base.replace(sell_price=2 + i * 1e-4) for i in range(10_000)]
+    return (lambda: evaluate_many(param_list)), len(param_list), 10
+
+
+def bench_goal_seek():
+    # Break-even thresholds of every input for three targets in one call
+    params = CostParams()
+    problems = [(name, metric, target) for name in PARAM_NAMES
+                for metric, target in (("profit_m", 0.0), ("roi_pct", 20.0), ("total_cost_per_m", 3.0))]
+    return (lambda: goal_seek_many(params, problems)), len(problems), 20
+
+
+def bench_tables():
+    params = CostParams()
+    res = compute_costs(params)
+
+    def run():
+        return (variable_costs_frame(res), fixed_costs_frame(params, res),
+                summary_frame(res), parameters_frame(params, res))
+    return run, 4, 100
+
+
+def bench_format_column():
+    # Display formatting of a large result column (batch / scenario tables)
+    values = np.random.default_rng(0).uniform(-1e6, 1e6, 100_000)
+    fmt = Formatter.for_locale("pt-BR", "BRL")
+    return (lambda: fmt.format(values, MONEY)), len(values), 10
+
+
+def bench_excel_export():
+    # The app's full report: every table plus parameter provenance
+    params = CostParams()
+    res = compute_costs(params)
+
+    def run():
+        output = BytesIO()
+        write_report(output, cost_report(params, res), "xlsx")
+        return output.getvalue()
+    return run, 1, 20
+
+
+def bench_report_scenarios():
+    # Streaming a large multi-scenario report; peak memory must not follow the row count
+    base = CostParams()
+    path = os.path.join(tempfile.mkdtemp(), "report.csv.zip")
+
+    def named():
+        for i in range(20_000):
+            yield f"S{i}", base.replace(sell_price=2 + i * 1e-4)
+
+    def run():
+        write_report(path, cost_report(base, compute_costs(base), scenarios=named()))
+
+    def cleanup():
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    run.cleanup = cleanup
+    return run, 20_001, 3
+
+
+def bench_artwork():
+    # Coverage of an uncompressed 4000 x 4000 CMYK TIFF, read through a memory map
+    from PIL import Image
+    path = os.path.join(tempfile.mkdtemp(), "artwork.tif")
+    Image.new("CMYK", (4000, 4000), (60, 30, 0, 10)).save(path)
+
+    def cleanup():
+        os.remove(path)
+        os.rmdir(os.path.dirname(path))
+    run = lambda: measure_coverage(path)
+    run.cleanup = cleanup
+    return run, 1, 10
+
+
+def _app_test():
+    from streamlit.logger import set_log_level
+    from streamlit.testing.v1 import AppTest
+    set_log_level("error")          # bare-mode warnings on every run
+    return AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=120)
+
+
+def bench_app_cold():
+    # New session with empty caches: first page load on a fresh server
+    import streamlit as st
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    def run():
+        st.cache_data.clear()
+        st.cache_resource.clear()
+        at = _app_test().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+    return run, 1, 5
+
+
+def bench_app_rerun():
+    # Same session rerun with warm caches: what every widget change costs
+    at = _app_test().run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return (lambda: at.run()), 1, 20
+
+
+def bench_app_first_kpi():
+    # New session on a warm server, timed by the app's own section profiler
+    # up to the end of the KPI block (what the user waits for)
+    records = []
+    handler = logging.Handler()
+    handler.emit = lambda rec: records.append(json.loads(rec.getMessage()))
+    metrics_log = logging.getLogger("app_custo_sublimacao.metrics")
+    metrics_log.addHandler(handler)
+    metrics_log.setLevel(logging.INFO)
+    metrics_log.propagate = False
+    os.environ["SUBLIMACAO_PROFILE"] = "1"
+
+    def run():
+        records.clear()
+        at = _app_test().run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        ms = 0.0
+        for name, sec in records[-1]["sections"].items():
+            ms += sec["ms"]
+            if name == "kpis":
+                break
+        return ms / 1000
+
+    def cleanup():
+        os.environ.pop("SUBLIMACAO_PROFILE", None)
+        metrics_log.removeHandler(handler)
+    run.cleanup = cleanup
+    return run, 1, 10, {"self_timed": True}
+
+
+def bench_process_start():
+    # Fresh interpreter: imports plus the first full page (autoscaled container)
+    code = ("from streamlit.logger import set_log_level; set_log_level('error'); "
+            "from streamlit.testing.v1 import AppTest; "
+            f"at = AppTest.from_file({os.path.join(ROOT, 'app.py')!r}, default_timeout=120).run(); "
+            "assert not at.exception")
+
+    def run():
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT, env={**os.environ, "PYTHONPATH": ROOT},
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return run, 1, 3, {"memory": False}
+
+
+BENCHMARKS = {
+    "model_scalar": bench_model_scalar,
+    "model_batch_1m": bench_model_batch,
+    "sensitivity": bench_sensitivity,
+    "whatif_50": bench_whatif,
+    "whatif_10k": bench_whatif_many,
+    "goal_seek": bench_goal_seek,
+    "tables": bench_tables,
+    "format_100k": bench_format_column,
+    "excel_export": bench_excel_export,
+    "report_20k": bench_report_scenarios,
+    "artwork_16mp": bench_artwork,
+    "app_cold": bench_app_cold,
+    "app_rerun": bench_app_rerun,
+    "app_first_kpi": bench_app_first_kpi,
+    "process_start": bench_process_start,
+}
+
+
+# ---------- Baselines ----------
+def compare(results, baseline, threshold_pct, app_threshold_pct=APP_THRESHOLD_PCT):
+    """Names whose latency or peak memory grew beyond the threshold.
+
+    Latency is the median, except for APP_BENCHMARKS: their fastest run,
+    against app_threshold_pct.
+    """
+    regressions = []
+    for name, cur in results.items():
+        ref = baseline.get("results", {}).get(name)
+        if not ref:
+            continue
+        limit = 1 + threshold_pct / 100
+        stat = "min_ms" if name in APP_BENCHMARKS and "min_ms" in ref else "p50_ms"
+        time_limit = 1 + app_threshold_pct / 100 if name in APP_BENCHMARKS else limit
+        if cur[stat] > ref[stat] * time_limit:
+            regressions.append(f"{name}: {stat[:-3]} {ref[stat]:.3f} -> {cur[stat]:.3f} ms")
+        if cur.get("peak_mib") and ref.get("peak_mib") and cur["peak_mib"] > ref["peak_mib"] * limit:
+            regressions.append(f"{name}: peak {ref['peak_mib']:.2f} -> {cur['peak_mib']:.2f} MiB")
+    return regressions
+
+
+def run_benchmark(name):
+    fn, items, repeat, *options = BENCHMARKS[name]()
+    try:
+        return measure(fn, items=items, repeat=repeat, **(options[0] if options else {}))
+    finally:
+        getattr(fn, "cleanup", lambda: None)()
+
+
+def machine_info():
+    return {"python": platform.python_version(), "machine": platform.machine(),
+            "processor": platform.processor(), "cpus": os.cpu_count()}
+
+
+def capacity_estimate(rerun_ms, think_s):
+    """Active users one server sustains if each user reruns once per `think_s` seconds."""
+    cpus = os.cpu_count() or 1
+    return cpus * think_s * 1000 / rerun_ms if rerun_ms > 0 else float("inf")
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Benchmark the sublimation cost model and app; fail on regressions against the baseline.")
+    ap.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only these (repeatable)")
+    ap.add_argument("--baseline", default=BASELINE_PATH, help="baseline JSON file")
+    ap.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    ap.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD_PCT,
+                    help="allowed slowdown / memory growth in %% (default %(default)s)")
+    ap.add_argument("--app-threshold", type=float, default=APP_THRESHOLD_PCT,
+                    help="allowed slowdown of the whole-app benchmarks' fastest run in %% (default %(default)s)")
+    ap.add_argument("--no-retry", action="store_true",
+                    help="report regressions without re-measuring the suspects once")
+    ap.add_argument("--think-time", type=float, default=10.0,
+                    help="seconds between reruns per active user, for the capacity estimate")
+    ap.add_argument("--startup-budget", type=float, default=STARTUP_BUDGET_MS,
+                    help="max p50 time to first KPI in ms (default %(default)s)")
+    ap.add_argument("--json", help="also write the results to this file")
+    args = ap.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        r = results[name] = run_benchmark(name)
+        peak = f"{r['peak_mib']:8.2f} MiB" if r["peak_mib"] is not None else ""
+        print(f"{name:<16} p50 {r['p50_ms']:10.3f} ms  p95 {r['p95_ms']:10.3f} ms  "
+              f"p99 {r['p99_ms']:10.3f} ms  {r['throughput_per_s']:14,.0f} /s  {peak}")
+
+    if "app_rerun" in results:
+        users = capacity_estimate(results["app_rerun"]["p95_ms"], args.think_time)
+        print(f"~{users:,.0f} active users per server ({os.cpu_count()} CPUs, "
+              f"one rerun per {args.think_time:g} s at p95 rerun latency)")
+
+    payload = {"machine": machine_info(), "results": results}
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(payload, f, indent=2)
+    if args.save:
+        baseline = {"machine": machine_info(), "results": {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline["machine"] = machine_info()
+        baseline["results"].update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline yet; run with --save to create one.", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get("machine", {}) != machine_info():
+        print("Warning: baseline was recorded on a different machine.", file=sys.stderr)
+    regressions = compare(results, baseline, args.threshold, args.app_threshold)
+    if regressions and not args.no_retry:
+        # One slow pass on a busy machine is not a regression: measure each
+        # suspect again and keep its faster pass
+        for name in sorted({line.split(":", 1)[0] for line in regressions}):
+            again = run_benchmark(name)
+            print(f"{name:<16} re-measured: p50 {again['p50_ms']:10.3f} ms  min {again['min_ms']:10.3f} ms")
+            if again["p50_ms"] < results[name]["p50_ms"]:
+                results[name] = again
+        regressions = compare(results, baseline, args.threshold, args.app_threshold)
+    if "app_first_kpi" in results and results["app_first_kpi"]["p50_ms"] > args.startup_budget:
+        regressions.append(f"app_first_kpi: p50 {results['app_first_kpi']['p50_ms']:.1f} ms "
+                           f"over the {args.startup_budget:g} ms budget")
+    for line in regressions:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+# tests/test_artwork.py
+# Artwork coverage: known colours, raw vs decoded TIFFs, and per-job ink costs.
+
+import io
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.artwork import InkProfile, job_costs, measure_coverage
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def save(image, path, **kwargs):
+    image.save(path, **kwargs)
+    return str(path)
+
+
+@pytest.mark.parametrize("colour, expected", [
+    ((255, 255, 255), (0, 0, 0, 0)),
+    ((0, 0, 0), (0, 0, 0, 1)),
+    ((255, 0, 0), (0, 1, 1, 0)),
+    ((0, 0, 255), (1, 1, 0, 0)),
+])
+def test_rgb_png_coverage(tmp_path, colour, expected):
+    cov = measure_coverage(save(Image.new("RGB", (8, 4), colour), tmp_path / "a.png"))
+    np.testing.assert_allclose(cov.cmyk, expected, atol=1e-6)
+    assert cov.decoded and (cov.width_px, cov.height_px) == (8, 4)
+
+
+def test_transparent_pixels_print_nothing(tmp_path):
+    image = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+    image.paste((0, 0, 0, 255), (0, 0, 4, 2))
+    cov = measure_coverage(save(image, tmp_path / "a.png"))
+    np.testing.assert_allclose(cov.cmyk, (0, 0, 0, 0.5), atol=1e-6)
+
+
+def test_raw_tiff_matches_the_decoded_one(tmp_path):
+    rng = np.random.default_rng(0)
+    image = Image.frombytes("CMYK", (50, 60), rng.integers(0, 256, 60 * 50 * 4, dtype=np.uint8).tobytes())
+    raw = measure_coverage(save(image, tmp_path / "raw.tif", dpi=(100, 100)), band_bytes=500)
+    lzw = measure_coverage(save(image, tmp_path / "lzw.tif", compression="tiff_lzw"))
+    assert not raw.decoded and lzw.decoded
+    np.testing.assert_allclose(raw.cmyk, lzw.cmyk)
+    np.testing.assert_allclose(raw.cmyk, np.asarray(image).reshape(-1, 4).mean(axis=0) / 255)
+    assert raw.width_m(1.6) == pytest.approx(50 / 100 * 0.0254)
+    # File objects are read the same way as paths
+    buf = io.BytesIO(open(tmp_path / "raw.tif", "rb").read())
+    np.testing.assert_allclose(measure_coverage(buf, name="job").cmyk, raw.cmyk)
+
+
+def test_job_costs_price_ink_per_job(tmp_path):
+    params = CostParams()
+    path = save(Image.new("CMYK", (10, 200), (128, 0, 0, 255)), tmp_path / "job.tif", dpi=(10, 10))
+    cov = measure_coverage(path)
+    df = job_costs([cov], params, InkProfile((4.0, 4.0, 4.0, 2.0)))
+    width = 10 / 10 * 0.0254
+    ink_ml = width * (128 / 255 * 4.0 + 2.0)
+    assert df["ink_ml_m"][0] == pytest.approx(ink_ml)
+    assert df["cv_ink"][0] == pytest.approx(compute_costs(params.replace(ink_ml=ink_ml)).cv_ink)
+    assert df["ink_cost_job"][0] == pytest.approx(df["cv_ink"][0] * 200 / 10 * 0.0254)
@@ -0,0 +1,56 @@
+# tests/test_batch.py
+# Batch quoting: each priced row matches compute_costs, and files stream through.
+
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.batch import QUOTE_COLUMNS, main, price_frame, run_batch
+
+JOBS = pd.DataFrame({
+    "job": ["a", "b", "c", "d"],
+    "sell_price": [4.5, 6.0, 2.0, 5.0],
+    "usage1": [50, 100, 0, 25],
+    "ink_ml": [12.0, 8.0, 15.0, "n/a"],
+})
+
+
+def test_price_frame_matches_compute_costs_row_by_row():
+    base = CostParams(downtime_h=20.0)
+    out = price_frame(JOBS, base)
+    assert list(out.columns) == list(JOBS.columns) + list(QUOTE_COLUMNS)
+    for i, row in JOBS.iloc[:3].iterrows():
+        res = compute_costs(base.replace(sell_price=row["sell_price"], usage1=row["usage1"], ink_ml=row["ink_ml"]))
+        for name in QUOTE_COLUMNS:
+            assert out[name][i] == pytest.approx(getattr(res, name), nan_ok=True), name
+    # A non-numeric input gives NaN in that row only
+    assert math.isnan(out["total_cost_per_m"][3])
+
+
+def test_columns_not_in_the_model_only_pass_through():
+    out = price_frame(pd.DataFrame({"job": ["x", "y"]}))
+    assert (out["profit_m"] == compute_costs(CostParams()).profit_m).all()
+    assert list(out["job"]) == ["x", "y"]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_streams_chunks_in_order(tmp_path, workers):
+    src, dst = tmp_path / "jobs.csv", tmp_path / "quotes.csv"
+    jobs = pd.DataFrame({"sell_price": np.linspace(3, 6, 25)})
+    jobs.to_csv(src, index=False)
+    assert run_batch(str(src), str(dst), chunksize=4, workers=workers) == 25
+    out = pd.read_csv(dst)
+    np.testing.assert_allclose(out["profit_m"], price_frame(jobs)["profit_m"])
+
+
+def test_cli_defaults_for_missing_inputs(tmp_path):
+    src = tmp_path / "jobs.csv"
+    pd.DataFrame({"usage1": [50, 100]}).to_csv(src, index=False)
+    assert main([str(src), "--set", "sell_price=6"]) == 0
+    out = pd.read_csv(tmp_path / "jobs_quotes.csv")
+    assert out["profit_m"][0] == pytest.approx(compute_costs(CostParams(sell_price=6.0)).profit_m)
+    with pytest.raises(SystemExit):
+        main([str(src), "--set", "nope=1"])
@@ -0,0 +1,30 @@
+# tests/test_fleet.py
+# Fleet allocation: cheapest capacity first, width limits and unmet demand.
+
+import pytest
+
+from app_custo_sublimacao import CostParams
+from app_custo_sublimacao.fleet import Machine, allocate
+
+
+def test_allocate_fills_the_cheaper_machine_first():
+    cheap = Machine("cheap", width=1.6, speed1=400, speed2=200, machine_kw=20, hours_month=100)
+    dear = Machine("dear", width=1.6, speed1=400, speed2=200, machine_kw=80, hours_month=200)
+    plan = allocate([cheap, dear], meters=[60_000], passes=1, params=CostParams())
+    per_machine = plan.allocation.sum(axis=0)
+    assert per_machine[0] == pytest.approx(40_000)          # 100 h x 400 m/h: full
+    assert per_machine[1] == pytest.approx(20_000)
+    assert plan.bottleneck[0] and not plan.bottleneck[1]
+    assert plan.unmet.sum() == pytest.approx(0)
+
+
+def test_allocate_respects_width_and_reports_unmet():
+    narrow = Machine("narrow", width=1.0, speed1=400, speed2=200, hours_month=200)
+    wide = Machine("wide", width=2.0, speed1=400, speed2=200, hours_month=10)
+    plan = allocate([narrow, wide], meters=[10_000, 5_000], passes=[1, 1], width=[1.6, 0.9], params=CostParams())
+    # The 1.6 m order only fits the wide machine, which has 4,000 m of capacity
+    assert plan.allocation[0, 0] == pytest.approx(0)
+    assert plan.allocation[0, 1] + plan.unmet[0] == pytest.approx(10_000)
+    assert plan.unmet[0] >= 6_000 - 1e-6
+    assert plan.allocation[1].sum() == pytest.approx(5_000)
+    assert plan.meters + plan.unmet.sum() == pytest.approx(15_000)
@@ -0,0 +1,42 @@
+# tests/test_formatting.py
+# Column formatting: locale separators, currency prefix, sign and missing values.
+
+import numpy as np
+import pandas as pd
+
+from app_custo_sublimacao.formatting import MISSING, Formatter, Unit, MONEY, METERS, PERCENT
+
+
+def test_pt_br_swaps_the_separators():
+    fmt = Formatter.for_locale("pt-BR", "BRL")
+    assert fmt.format([1234567.891, -0.5], MONEY) == ["BRL 1.234.567,89", "BRL -0,50"]
+    assert fmt.pct(12.34) == "12,3%"
+
+
+def test_en_us_matches_python_formatting():
+    fmt = Formatter()
+    values = [0.0, 999.995, -1234.5, 1e9]
+    assert fmt.format(values, Unit(decimals=3)) == [f"{v:,.3f}" for v in values]
+    assert fmt.money_per_m(2.4869) == "USD 2.49 /m"
+
+
+def test_nan_and_none_become_missing():
+    fmt = Formatter.for_locale("pt-BR")
+    assert fmt.format([np.nan, 1.0, None], METERS) == [MISSING, "1 m", MISSING]
+    assert fmt(np.nan, PERCENT) == MISSING
+
+
+def test_sign_is_always_shown():
+    fmt = Formatter.for_locale("pt-BR")
+    assert fmt.format([12.5, -3, 0], Unit(decimals=1, sign=True, suffix="%")) == ["+12,5%", "-3,0%", "+0,0%"]
+    assert Formatter().format([1500], Unit(money=True, sign=True, decimals=0)) == ["USD +1,500"]
+
+
+def test_empty_column():
+    assert Formatter().format([], MONEY) == []
+
+
+def test_columns_formats_only_the_named_columns():
+    frame = pd.DataFrame({"meters": [1500.0, np.nan], "name": ["a", "b"]})
+    out = Formatter.for_locale("pt-BR").columns(frame, {"meters": METERS})
+    assert out == {"meters": ["1.500 m", MISSING], "name": ["a", "b"]}
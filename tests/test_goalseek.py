@@ -0,0 +1,58 @@
+# tests/test_goalseek.py
+# Goal seek: thresholds per input, unreachable targets and the tornado order.
+
+import math
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.goalseek import goal_seek, goal_seek_many, break_even_table
+
+
+def test_goal_seek_many_hits_each_target():
+    params = CostParams()
+    problems = [("sell_price", "profit_m", 0.0), ("downtime_h", "profit_m", 0.0), ("ink_price_l", "roi_pct", 20.0),
+                ("speed1", "total_cost_per_m", 2.3), ("salary", "payback_months", 36.0)]
+    df = goal_seek_many(params, problems)
+    assert list(df["input"]) == [n for n, _, _ in problems]
+    assert df["value"].notna().all()
+    np.testing.assert_allclose(df["achieved"], df["target"], rtol=1e-6, atol=1e-6)
+    # Break-even price is the total cost per meter
+    assert df["value"][0] == pytest.approx(compute_costs(params).total_cost_per_m)
+    # Per-meter cost against a production input is not affine
+    assert df["method"][3] == "root finder"
+
+
+def test_goal_seek_many_reports_unreachable_targets():
+    # Neither the pass mix nor downtime can move profit this far
+    df = goal_seek_many(CostParams(), [("usage1", "profit_m", -1e9), ("downtime_h", "profit_m", 1e9)])
+    assert df["value"].isna().all()
+    assert (df["method"] == "unreachable").all()
+
+
+def test_goal_seek_rejects_unknown_names():
+    with pytest.raises(ValueError):
+        goal_seek_many(CostParams(), [("nope", "profit_m", 0.0)])
+
+
+def test_break_even_table_ranks_zero_inputs_by_their_range():
+    df = break_even_table(CostParams(), ("downtime_h", "salary", "paper_prot_waste"))
+    assert list(df["input"]) == ["downtime_h", "salary", "paper_prot_waste"]
+    assert math.isnan(df["change_pct"][0]) and df["value"][0] > 0
+
+
+def test_limits_narrow_the_range():
+    params = CostParams()
+    assert goal_seek(params, "elec_price", "profit_m", 0.0) > 10.0
+    assert math.isnan(goal_seek(params, "elec_price", "profit_m", 0.0, limits={"elec_price": (0.0, 10.0)}))
+    # Physical bounds still apply when the limit is wider
+    hours = params.shifts_per_day * params.hours_per_shift * params.days_month
+    df = goal_seek_many(params, [("downtime_h", "profit_m", 0.0)], limits={"downtime_h": (0.0, 10 * hours)})
+    assert 0 < df["value"][0] < hours
+
+
+def test_break_even_table_puts_unbounded_zero_inputs_before_unreachable_ones():
+    df = break_even_table(CostParams(other_fixed=0.0), ("usage1", "other_fixed", "ink_price_l"))
+    assert list(df["input"]) == ["ink_price_l", "other_fixed", "usage1"]
+    assert df["value"][1] == pytest.approx(compute_costs(CostParams()).profit_m)
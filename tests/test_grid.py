@@ -0,0 +1,48 @@
+# tests/test_grid.py
+# Two-parameter sweeps: each cell matches a scalar model run.
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.grid import sweep_2d, span
+
+
+def test_sweep_matches_pointwise_evaluation():
+    params = CostParams()
+    x, y = [3.0, 4.5, 6.0], [0.0, 40.0]
+    grids = sweep_2d(params, "sell_price", x, "downtime_h", y, outputs=("profit_m", "BE_m", "fixed_cost_month"))
+    profit = grids["profit_m"]
+    assert profit.z.shape == (2, 3)
+    for i, yv in enumerate(y):
+        for j, xv in enumerate(x):
+            res = compute_costs(params.replace(sell_price=xv, downtime_h=yv))
+            assert profit.z[i, j] == pytest.approx(res.profit_m)
+            assert grids["BE_m"].z[i, j] == pytest.approx(res.BE_m, nan_ok=True)
+    # Outputs that depend on neither input are broadcast to the grid
+    fixed = grids["fixed_cost_month"].z
+    assert fixed.shape == (2, 3) and (fixed == compute_costs(params).fixed_cost_month).all()
+
+
+def test_sweep_rejects_bad_names():
+    with pytest.raises(ValueError):
+        sweep_2d(CostParams(), "nope", [1], "rent", [1])
+    with pytest.raises(ValueError):
+        sweep_2d(CostParams(), "rent", [1], "rent", [2])
+    with pytest.raises(ValueError):
+        sweep_2d(CostParams(), "rent", [1], "salary", [2], outputs=("nope",))
+
+
+def test_downsample_keeps_both_axes_under_the_limit():
+    g = sweep_2d(CostParams(), "sell_price", span(4.5, n=400), "salary", span(25340, n=90))["profit_m"]
+    small = g.downsample(150)
+    assert len(small.x) <= 150 and len(small.y) <= 150
+    assert small.z.shape == (len(small.y), len(small.x))
+    assert small.z[0, 1] == g.z[0, 3]
+    assert g.downsample(400) is g
+
+
+def test_span_is_clipped_at_the_lower_bound():
+    assert span(10.0, 50, 3).tolist() == [5.0, 10.0, 15.0]
+    assert span(10.0, 200, 3)[0] == 0.0
+    assert span(0.0, 50, 3).tolist() == [0.0, 0.5, 1.0]
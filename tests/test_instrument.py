@@ -0,0 +1,87 @@
+# tests/test_instrument.py
+# Rerun profiling: section records, the shared tracing switch and exports.
+
+import json
+import tracemalloc
+
+import pytest
+
+from app_custo_sublimacao import instrument
+from app_custo_sublimacao.instrument import MetricsRegistry, RerunProfiler, stop_memory_tracing
+
+
+@pytest.fixture(autouse=True)
+def no_tracing():
+    stop_memory_tracing()
+    yield
+    stop_memory_tracing()
+
+
+def test_disabled_profiler_records_nothing():
+    prof = RerunProfiler(enabled=False, trace_memory=True)
+    prof.mark("a")
+    assert prof.finish().sections == [] and not tracemalloc.is_tracing()
+
+
+def test_sections_follow_marks():
+    prof = RerunProfiler(enabled=True)
+    prof.mark("inputs")
+    prof.mark("charts")
+    record = prof.finish()
+    assert [s.name for s in record.sections] == ["inputs", "charts"]
+    assert record.total_seconds >= sum(s.seconds for s in record.sections)
+    assert all(s.peak_bytes is None for s in record.sections)
+    assert json.loads(record.to_json(session="x"))["sections"].keys() == {"inputs", "charts"}
+
+
+def test_memory_peaks_and_tracing_shared_between_sessions():
+    registry = MetricsRegistry()
+    registry.want_tracing("a", True)
+    registry.want_tracing("b", True)
+    prof = RerunProfiler(enabled=True, trace_memory=True)
+    prof.mark("alloc")
+    block = bytearray(2_000_000)
+    record = prof.finish()
+    del block
+    assert record.sections[0].peak_bytes >= 2_000_000 and record.traced_bytes is not None
+    # One session turning tracing off leaves it on for the other
+    registry.want_tracing("a", False)
+    assert tracemalloc.is_tracing()
+    registry.want_tracing("b", False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_idle_sessions_stop_holding_tracing(monkeypatch):
+    registry = MetricsRegistry()
+    registry.want_tracing("gone", True)
+    RerunProfiler(enabled=True, trace_memory=True)
+    clock = instrument.time.monotonic() + instrument.TRACING_IDLE_SECONDS + 1
+    monkeypatch.setattr(instrument.time, "monotonic", lambda: clock)
+    registry.want_tracing("other", False)
+    assert not tracemalloc.is_tracing()
+
+
+def test_tracing_started_elsewhere_is_left_running():
+    tracemalloc.start()
+    try:
+        RerunProfiler(enabled=True, trace_memory=True).finish()
+        MetricsRegistry().want_tracing("a", False)
+        assert tracemalloc.is_tracing()
+    finally:
+        tracemalloc.stop()
+
+
+def test_prometheus_export(tmp_path):
+    registry = MetricsRegistry()
+    prof = RerunProfiler(enabled=True)
+    prof.mark('say "hi"')
+    registry.observe(prof.finish())
+    registry.observe(RerunProfiler(enabled=False).finish())
+    text = registry.to_prometheus()
+    assert "sublimacao_reruns_total 1" in text
+    assert 'sublimacao_section_seconds_count{section="say \\"hi\\""} 1' in text
+    assert 'sublimacao_section_seconds_bucket{section="total",le="+Inf"} 1' in text
+    path = tmp_path / "metrics.prom"
+    registry.write_prometheus(str(path))
+    assert path.read_text() == text
+    assert [r["Section"] for r in registry.summary_rows()] == ['say "hi"', "total"]
@@ -0,0 +1,106 @@
+# tests/test_model.py
+# compute_costs against the formulas of the original single-file app.py.
+
+import math
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+
+
+def baseline_costs(width, speed1, speed2, usage1, shifts_per_day, hours_per_shift, days_month, downtime_h,
+                   ink_ml, ink_price_l, paper_imp_waste, paper_imp_price, paper_prot_waste, paper_prot_price,
+                   machine_kw, elec_price, salary, invest_printer, years_printer, invest_cal, years_cal,
+                   rent, other_fixed, maintenance, sell_price):
+    # Transcribed from app.py before the model was extracted (scalar, one set at a time)
+    usage2 = 100 - usage1
+    hours_day = shifts_per_day * hours_per_shift
+    total_hours_month = float(hours_day) * float(days_month)
+    avg_speed = speed1 * usage1/100 + speed2 * usage2/100
+    productive_hours = max(0.0, total_hours_month - downtime_h)
+    prod_month = avg_speed * productive_hours
+    prod_year = prod_month * 12
+    utilization = (productive_hours/total_hours_month * 100) if total_hours_month > 0 else 0.0
+    paper_imp_u = 1.0 + paper_imp_waste/100
+    paper_prot_u = 1.0 + paper_prot_waste/100
+    cv_ink = ink_ml/1000 * ink_price_l
+    cv_paper_imp = paper_imp_u * paper_imp_price
+    cv_paper_prot = paper_prot_u * paper_prot_price
+    cv_elec = (machine_kw * productive_hours * elec_price) / prod_month if prod_month else 0.0
+    cost_var_per_m = cv_ink + cv_paper_imp + cv_paper_prot + cv_elec
+    depr_printer_m = invest_printer / years_printer / 12
+    depr_cal_m = invest_cal / years_cal / 12
+    fixed_cost_month = salary + depr_printer_m + depr_cal_m + rent + other_fixed + maintenance
+    revenue_m = sell_price * prod_month
+    var_total_m = cost_var_per_m * prod_month
+    profit_m = revenue_m - var_total_m - fixed_cost_month
+    roi_pct = (profit_m * 12) / (invest_printer + invest_cal) * 100 if (invest_printer + invest_cal) > 0 else 0
+    BE_m = fixed_cost_month / (sell_price - cost_var_per_m) if sell_price > cost_var_per_m else None
+    fixed_per_m = (fixed_cost_month / prod_month) if prod_month > 0 else np.nan
+    total_cost_per_m = cost_var_per_m + (fixed_per_m if not math.isnan(fixed_per_m) else 0)
+    gross_margin_per_m = sell_price - cost_var_per_m
+    net_margin_per_m = (profit_m / prod_month) if prod_month > 0 else np.nan
+    return dict(
+        usage2=usage2, prod_month=prod_month, prod_year=prod_year, utilization=utilization,
+        cv_ink=cv_ink, cv_paper_imp=cv_paper_imp, cv_paper_prot=cv_paper_prot, cv_elec=cv_elec,
+        cost_var_per_m=cost_var_per_m, depr_printer_m=depr_printer_m, depr_cal_m=depr_cal_m,
+        fixed_cost_month=fixed_cost_month, revenue_m=revenue_m, var_total_m=var_total_m, profit_m=profit_m,
+        roi_pct=roi_pct, BE_m=np.nan if BE_m is None else BE_m, total_cost_per_m=total_cost_per_m,
+        gross_margin_per_m=gross_margin_per_m, net_margin_per_m=net_margin_per_m,
+    )
+
+
+CASES = {
+    "defaults": {},
+    "downtime": {"downtime_h": 37.5, "usage1": 30},
+    "zero production (no speed)": {"speed1": 0.0, "speed2": 0.0},
+    "zero production (all downtime)": {"downtime_h": 192.0},
+    "price at variable cost": {"sell_price": compute_costs().cost_var_per_m},
+    "price below variable cost": {"sell_price": 1.0},
+    "no investment": {"invest_printer": 0.0, "invest_cal": 0.0},
+}
+
+
+@pytest.mark.parametrize("overrides", CASES.values(), ids=CASES.keys())
+def test_matches_baseline_formulas(overrides):
+    params = CostParams(**overrides)
+    expected = baseline_costs(**params.as_dict())
+    res = compute_costs(params)
+    for name, value in expected.items():
+        np.testing.assert_allclose(getattr(res, name), value, rtol=1e-12, atol=1e-9, equal_nan=True,
+                                   err_msg=name)
+
+
+def test_defaults_kpis():
+    res = compute_costs()
+    assert res.prod_month == pytest.approx(57_600)
+    assert res.profit_m == pytest.approx(115_949.80)
+    assert res.total_cost_per_m == pytest.approx(2.487, abs=5e-4)
+    assert res.BE_m == pytest.approx(16_160, abs=1)
+
+
+def test_no_break_even_when_price_does_not_cover_variable_cost():
+    res = compute_costs(sell_price=1.0)
+    assert math.isnan(res.BE_m)
+    assert res.profit_m < 0
+
+
+def test_zero_production_has_no_per_meter_margin():
+    res = compute_costs(speed1=0.0, speed2=0.0)
+    assert res.prod_month == 0
+    assert res.cv_elec == 0
+    assert math.isnan(res.net_margin_per_m)
+    assert res.profit_m == pytest.approx(-res.fixed_cost_month)
+
+
+def test_arrays_match_one_call_per_set():
+    rng = np.random.default_rng(7)
+    base = CostParams()
+    prices = rng.uniform(1.0, 8.0, 50)
+    downtime = rng.uniform(0.0, 192.0, 50)
+    res = compute_costs(base, sell_price=prices, downtime_h=downtime)
+    for i in range(len(prices)):
+        one = baseline_costs(**base.replace(sell_price=prices[i], downtime_h=downtime[i]).as_dict())
+        assert res.profit_m[i] == pytest.approx(one["profit_m"])
+        assert res.total_cost_per_m[i] == pytest.approx(one["total_cost_per_m"])
@@ -0,0 +1,54 @@
+# tests/test_optimize.py
+# Target prices, pass mix and shift plans against direct model runs.
+
+import math
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.optimize import (
+    MAX_HOURS_PER_DAY, best_shift_plan, best_usage_mix, min_price, price_for_margin, price_for_roi,
+)
+
+
+def test_target_prices_hit_their_targets():
+    params = CostParams()
+    assert compute_costs(params.replace(sell_price=min_price(params))).profit_m == pytest.approx(0, abs=1e-6)
+    res = compute_costs(params.replace(sell_price=price_for_margin(params, 20)))
+    assert res.profit_m / res.revenue_m == pytest.approx(0.2)
+    assert compute_costs(params.replace(sell_price=price_for_roi(params, 35))).roi_pct == pytest.approx(35)
+
+
+def test_target_prices_without_production_are_nan():
+    params = CostParams(speed1=0.0, speed2=0.0)
+    assert math.isnan(min_price(params))
+    assert math.isnan(price_for_margin(CostParams(), 100))
+
+
+def test_best_usage_mix_respects_the_two_pass_floor():
+    params = CostParams()
+    mix = best_usage_mix(params, min_two_pass_pct=30)
+    assert mix.usage1 in (0.0, 70.0) and mix.usage2 == 100 - mix.usage1
+    other = 70.0 - mix.usage1
+    assert mix.profit_m >= compute_costs(params.replace(usage1=other)).profit_m
+    assert mix.profit_m == pytest.approx(compute_costs(params.replace(usage1=mix.usage1)).profit_m)
+
+
+@pytest.mark.parametrize("demand_m", [None, 10_000.0, 100_000.0, 1e9])
+def test_best_shift_plan_never_exceeds_a_day(demand_m):
+    # Cheap labour makes longer days always better, which used to pick 4 x 12 h
+    params = CostParams(salary=1000.0, sell_price=50.0)
+    plan = best_shift_plan(params, demand_m=demand_m)
+    assert plan.shifts_per_day * plan.hours_per_shift <= MAX_HOURS_PER_DAY
+    assert plan.table["prod_month"].shape == (4, 12)
+
+
+def test_best_shift_plan_is_the_cheapest_feasible_config():
+    params = CostParams()
+    plan = best_shift_plan(params, demand_m=60_000.0)
+    cost, meets = plan.table["cost_per_m"], plan.table["meets_demand"]
+    fits = np.arange(1, 5)[:, None] * np.arange(1, 13)[None, :] <= MAX_HOURS_PER_DAY
+    candidates = cost[fits & meets] if (fits & meets).any() else cost[fits]
+    assert plan.meets_demand
+    assert plan.cost_per_m == pytest.approx(candidates.min())
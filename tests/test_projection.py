@@ -0,0 +1,36 @@
+# tests/test_projection.py
+# Multi-year projection: flat case against the monthly model, IRR and payback.
+
+import math
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.projection import ProjectionInputs, project
+
+
+def test_flat_projection_repeats_the_monthly_model():
+    params = CostParams()
+    res = compute_costs(params)
+    out = project(params, ProjectionInputs(months=24, discount_rate_pct=0.0))
+    cash = res.revenue_m - res.var_total_m - (params.salary + params.rent + params.other_fixed + params.maintenance)
+    np.testing.assert_allclose(out.cash_flow, cash)
+    np.testing.assert_allclose(out.profit, res.profit_m)
+    investment = params.invest_printer + params.invest_cal
+    assert out.payback_month == math.ceil(investment / cash)
+    assert out.npv == pytest.approx(24 * cash - investment)
+
+
+def test_projection_irr_zeroes_the_npv():
+    params = CostParams()
+    out = project(params, ProjectionInputs(months=36, price_growth_pct=3.0, fixed_inflation_pct=5.0))
+    monthly = (1 + out.irr_annual_pct / 100) ** (1 / 12) - 1
+    t = np.arange(1, 37)
+    assert np.sum(out.cash_flow / (1 + monthly) ** t) == pytest.approx(out.investment, rel=1e-9)
+
+
+def test_projection_without_payback():
+    out = project(CostParams(sell_price=2.0), ProjectionInputs(months=12))
+    assert math.isnan(out.payback_month)
+    assert math.isnan(out.irr_annual_pct)
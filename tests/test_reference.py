@@ -0,0 +1,63 @@
+# tests/test_reference.py
+# Reference data: file loading, validation, shared read-only defaults.
+
+import json
+
+import pytest
+
+from app_custo_sublimacao import CostParams
+from app_custo_sublimacao.reference import (
+    DEFAULT_ENTRY, builtin_reference, file_signature, input_deltas, load_reference,
+)
+
+
+def write(tmp_path, content):
+    path = tmp_path / "reference.json"
+    path.write_text(json.dumps(content) if not isinstance(content, str) else content)
+    return str(path)
+
+
+def test_missing_file_gives_the_builtin_defaults(tmp_path):
+    ref = load_reference(str(tmp_path / "none.json"))
+    assert ref.source == "" and list(ref.machines) == [DEFAULT_ENTRY]
+    assert ref.defaults() == CostParams()
+
+
+def test_entries_combine_over_the_model_defaults(tmp_path):
+    ref = load_reference(write(tmp_path, {
+        "price_lists": {"Supplier A": {"ink_price_l": 40}, "Supplier B": {"ink_price_l": 70, "elec_price": 2}},
+        "machines": {"Wide": {"width": 3.2, "speed1": 500}},
+    }))
+    params = ref.defaults(price_list="Supplier B")
+    assert (params.ink_price_l, params.elec_price, params.width, params.speed1) == (70.0, 2.0, 3.2, 500.0)
+    assert params.salary == CostParams().salary          # fixed_costs fell back to Default
+    assert ref.defaults().ink_price_l == 40.0            # first entry by default
+    # Same choice, same shared object; entries are read-only
+    assert ref.defaults(price_list="Supplier B") is params
+    with pytest.raises(TypeError):
+        ref.machines["Wide"]["width"] = 1.0
+    assert input_deltas(params.replace(rent=1.0), params) == {"rent": 1.0}
+
+
+@pytest.mark.parametrize("content", [
+    "not json",
+    [],
+    {"extras": {}},
+    {"machines": [1]},
+    {"machines": {"A": 1}},
+    {"machines": {"A": {"salary": 1}}},
+    {"machines": {"A": {"width": "wide"}}},
+])
+def test_malformed_files_raise_value_error(tmp_path, content):
+    with pytest.raises(ValueError):
+        load_reference(write(tmp_path, content))
+
+
+def test_signature_changes_when_the_file_is_rewritten(tmp_path):
+    path = write(tmp_path, {"machines": {"A": {"width": 1.0}}})
+    before = load_reference(path).signature
+    assert before == file_signature(path)
+    write(tmp_path, {"machines": {"A": {"width": 1.25}}})
+    assert file_signature(path) != before
+    assert file_signature(None) is None
+    assert builtin_reference().signature is None
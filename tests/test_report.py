@@ -0,0 +1,72 @@
+# tests/test_report.py
+# Report writer: tables read back from each format, and report contents.
+
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.report import Table, cost_report, report_kind, write_report
+from app_custo_sublimacao.scenarios import SCENARIO_METRICS
+
+
+def sample_tables(n=1000):
+    return [Table("Squares", ("i", "square"), ((i, i * i / 2) for i in range(n))),
+            Table("Empty", ("a", "b"), iter(()))]
+
+
+def test_csv_zip_round_trip(tmp_path):
+    path = tmp_path / "r.csv.zip"
+    assert write_report(str(path), sample_tables()) == {"Squares": 1000, "Empty": 0}
+    with zipfile.ZipFile(path) as z:
+        assert z.namelist() == ["Squares.csv", "Empty.csv"]
+        df = pd.read_csv(z.open("Squares.csv"))
+        assert list(pd.read_csv(z.open("Empty.csv")).columns) == ["a", "b"]
+    assert df["square"].tolist() == [i * i / 2 for i in range(1000)]
+
+
+def test_parquet_zip_round_trip(tmp_path):
+    pytest.importorskip("pyarrow")
+    buf = io.BytesIO()
+    write_report(buf, sample_tables(40_000), kind="parquet.zip")
+    with zipfile.ZipFile(buf) as z:
+        df = pd.read_parquet(io.BytesIO(z.read("Squares.parquet")))
+        assert pd.read_parquet(io.BytesIO(z.read("Empty.parquet"))).empty
+    assert len(df) == 40_000 and df["square"].iloc[-1] == 39_999 ** 2 / 2
+
+
+def test_xlsx_has_one_sheet_per_table(tmp_path):
+    pytest.importorskip("xlsxwriter")
+    path = tmp_path / "r.xlsx"
+    assert write_report(str(path), sample_tables(10))["Squares"] == 10
+    with zipfile.ZipFile(path) as z:
+        workbook = z.read("xl/workbook.xml").decode()
+    assert 'name="Squares"' in workbook and 'name="Empty"' in workbook
+
+
+def test_report_kind():
+    assert report_kind("a/B.CSV.zip") == "csv.zip"
+    assert report_kind("x.parquet.zip") == "parquet.zip"
+    with pytest.raises(ValueError):
+        report_kind("x.zip")
+    with pytest.raises(ValueError):
+        write_report(io.BytesIO(), [], kind="pdf")
+
+
+def test_cost_report_contents(tmp_path):
+    params = CostParams()
+    scenarios = ((f"S{i}", params.replace(sell_price=4 + i / 10)) for i in range(3))
+    tables = cost_report(params, compute_costs(params), "BRL", scenarios=scenarios, stamp=False)
+    path = tmp_path / "r.csv.zip"
+    counts = write_report(str(path), tables)
+    assert counts["Scenarios"] == 4
+    with zipfile.ZipFile(path) as z:
+        about = dict(pd.read_csv(z.open("About.csv")).values)
+        scen = pd.read_csv(z.open("Scenarios.csv"))
+        assert "BRL/m" in pd.read_csv(z.open("Variables.csv")).columns
+    assert "generated_at" not in about
+    assert list(scen["Scenario"]) == ["Base", "S0", "S1", "S2"]
+    assert scen["profit_m"][2] == pytest.approx(compute_costs(params.replace(sell_price=4.1)).profit_m)
+    assert set(SCENARIO_METRICS) <= set(scen.columns)
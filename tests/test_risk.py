@@ -0,0 +1,53 @@
+# tests/test_risk.py
+# Monte Carlo risk: reproducibility, probabilities and summaries without samples.
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.risk import PERCENTILES, Normal, Triangular, simulate, spread_distribution
+
+
+def test_without_distributions_every_sample_is_the_base_case():
+    res = compute_costs(CostParams())
+    risk = simulate(n=1000, seed=0)
+    assert risk.mean["profit_m"] == pytest.approx(res.profit_m)
+    assert risk.std["profit_m"] == pytest.approx(0.0, abs=1e-6)
+    assert risk.prob_loss == 0.0 and risk.prob_no_be == 0.0
+
+
+def test_results_are_reproducible_for_a_seed():
+    dists = {"sell_price": Normal(4.5, 0.5), "ink_price_l": Triangular(40, 56.7, 80)}
+    a = simulate(distributions=dists, n=5000, seed=7, chunk_size=5000)
+    b = simulate(distributions=dists, n=5000, seed=7, chunk_size=5000)
+    np.testing.assert_array_equal(a.samples["profit_m"], b.samples["profit_m"])
+    assert a.percentiles["profit_m"][5] < a.percentiles["profit_m"][50] < a.percentiles["profit_m"][95]
+    assert sorted(a.percentiles["roi_pct"]) == list(PERCENTILES)
+
+
+def test_loss_probability_matches_the_samples():
+    risk = simulate(distributions={"sell_price": Normal(2.5, 0.3)}, n=20_000, seed=1)
+    assert risk.prob_loss == pytest.approx(np.mean(risk.samples["profit_m"] < 0))
+    assert 0.2 < risk.prob_loss < 0.8
+
+
+def test_summary_without_samples():
+    dists = {"sell_price": spread_distribution("uniform", 4.5, 20)}
+    full = simulate(distributions=dists, n=10_000, seed=3, bins=40)
+    lean = simulate(distributions=dists, n=10_000, seed=3, bins=40, keep_samples=False)
+    assert lean.samples is None
+    assert lean.percentiles == full.percentiles and lean.prob_loss == full.prob_loss
+    counts, edges = lean.histogram("profit_m")
+    assert counts.sum() == 10_000 and len(edges) == 41
+    np.testing.assert_array_equal(counts, np.histogram(full.samples["profit_m"], bins=40)[0])
+    with pytest.raises(ValueError):
+        lean.histogram("profit_m", bins=10)
+
+
+def test_spread_distribution():
+    assert spread_distribution("normal", 10.0, 20) == Normal(10.0, 2.0)
+    assert spread_distribution("triangular", 0.0, 20, spread_abs=3) == Triangular(-3.0, 0.0, 3.0)
+    with pytest.raises(ValueError):
+        spread_distribution("lognormal", 1.0, 10)
+    with pytest.raises(ValueError):
+        simulate(distributions={"nope": Normal(1, 1)}, n=10)
@@ -0,0 +1,55 @@
+# tests/test_scenarios.py
+# Named scenarios: batched evaluation, per-scenario cache and ranking.
+
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao import scenarios as scen
+from app_custo_sublimacao.scenarios import BASE_NAME, ScenarioSet, evaluate_many
+
+
+def test_evaluate_many_matches_single_runs():
+    params = [CostParams(), CostParams(sell_price=6.0, downtime_h=30.0), CostParams(speed1=0.0, speed2=0.0)]
+    out = evaluate_many(params)
+    for i, p in enumerate(params):
+        res = compute_costs(p)
+        assert out["profit_m"][i] == pytest.approx(res.profit_m)
+        assert out["BE_m"][i] == pytest.approx(res.BE_m, nan_ok=True)
+    assert evaluate_many([])["profit_m"].shape == (0,)
+
+
+def test_compare_ranks_and_diffs_against_base():
+    ss = ScenarioSet(CostParams())
+    ss.set("Dear ink", ink_price_l=80.0)
+    ss.set("Higher price", sell_price=5.0)
+    df = ss.compare("profit_m")
+    assert list(df.index) == [BASE_NAME, "Dear ink", "Higher price"]
+    assert list(df["rank"]) == [2, 3, 1]
+    assert df.loc[BASE_NAME, "Δ profit_m"] == 0
+    expected = compute_costs(CostParams(sell_price=5.0)).profit_m - compute_costs(CostParams()).profit_m
+    assert df.loc["Higher price", "Δ profit_m"] == pytest.approx(expected)
+    # Lower cost per meter ranks first
+    assert ss.compare("total_cost_per_m").loc["Dear ink", "rank"] == 3
+
+
+def test_only_new_parameter_sets_are_evaluated(monkeypatch):
+    ss = ScenarioSet(CostParams())
+    ss.set("A", sell_price=5.0)
+    ss.results()
+    calls = []
+    real = scen.evaluate_many
+    monkeypatch.setattr(scen, "evaluate_many", lambda ps: calls.append(len(ps)) or real(ps))
+    ss.replace_all({"A": {"sell_price": 5.0}, "B": {"rent": 0.0}})
+    ss.results()
+    ss.results()
+    assert calls == [1]
+
+
+def test_invalid_scenarios_are_rejected():
+    ss = ScenarioSet()
+    with pytest.raises(ValueError):
+        ss.set(BASE_NAME, rent=0.0)
+    with pytest.raises(ValueError):
+        ss.set("A", nope=1.0)
+    ss.set("A", rent=None)
+    assert ss.params("A") == ss.base
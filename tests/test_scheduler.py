@@ -0,0 +1,69 @@
+# tests/test_scheduler.py
+# Job-level month simulation: dispatch, breakdowns and jobs that cannot run.
+
+import math
+import warnings
+
+import numpy as np
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.scheduler import ShopConfig, jobs_from_arrays, simulate_month, replicate
+
+
+def test_without_setups_or_breakdowns_matches_the_cost_model():
+    params = CostParams()
+    hours = params.shifts_per_day * params.hours_per_shift * params.days_month
+    jobs = jobs_from_arrays([params.speed1 * hours / 2, params.speed2 * hours / 2], [1, 2])
+    sim = simulate_month(jobs, params, ShopConfig(changeover_h=0.0, mode_change_h=0.0))
+    assert sim.prod_month == pytest.approx(compute_costs(params).prod_month)
+    assert sim.utilization == pytest.approx(100.0)
+    assert sim.unfinished_jobs == 0
+    assert compute_costs(sim.to_params(params)).prod_month == pytest.approx(sim.prod_month)
+
+
+def test_edd_dispatch_and_lateness():
+    jobs = jobs_from_arrays([400.0, 400.0], 1, due_h=[10.0, 0.5])
+    sim = simulate_month(jobs, CostParams(), ShopConfig(changeover_h=0.0))
+    # The job due first runs first and is the only late one
+    assert sim.finish_h[1] == pytest.approx(1.0) and sim.finish_h[0] == pytest.approx(2.0)
+    assert sim.late_jobs == 1 and sim.max_lateness_h == pytest.approx(0.5)
+
+
+def test_breakdowns_cost_time_but_not_meters():
+    jobs = jobs_from_arrays(np.full(20, 1000.0), 1)
+    calm = simulate_month(jobs, CostParams(), ShopConfig(mtbf_h=0.0), seed=1)
+    rough = simulate_month(jobs, CostParams(), ShopConfig(mtbf_h=5.0, mttr_h=1.0), seed=1)
+    assert rough.breakdown_h > 0
+    assert rough.prod_month == pytest.approx(calm.prod_month)
+    assert rough.finish_h.max() > calm.finish_h.max()
+
+
+@pytest.mark.parametrize("mtbf_h", [0.0, 40.0])
+def test_zero_speed_jobs_are_left_unfinished(mtbf_h):
+    # Used to loop forever with breakdowns on, and return NaN without them
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        sim = simulate_month(jobs_from_arrays([100.0], [1]), CostParams(speed1=0.0), ShopConfig(mtbf_h=mtbf_h), seed=0)
+    assert sim.prod_month == 0 and sim.printing_h == 0 and sim.utilization == 0
+    assert sim.unfinished_jobs == 1 and sim.late_jobs == 0
+    assert math.isinf(sim.finish_h[0])
+
+
+def test_only_the_mode_without_speed_is_skipped():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        sim = simulate_month(jobs_from_arrays([100.0, 400.0], [2, 1], due_h=[1.0, 1.0]), CostParams(speed2=0.0),
+                             ShopConfig(mtbf_h=40.0), seed=0)
+    assert sim.prod_month == pytest.approx(400.0)
+    assert sim.unfinished_jobs == 1
+    assert np.isfinite(sim.max_lateness_h) and np.isfinite(sim.mean_lateness_h)
+
+
+def test_replications_do_not_depend_on_workers():
+    jobs = jobs_from_arrays(np.full(30, 2000.0), [1, 2] * 15)
+    config = ShopConfig(mtbf_h=20.0)
+    one = replicate(jobs, CostParams(), config, n=6, seed=3, workers=1)
+    two = replicate(jobs, CostParams(), config, n=6, seed=3, workers=2)
+    for name in one:
+        np.testing.assert_array_equal(one[name], two[name])
@@ -0,0 +1,41 @@
+# tests/test_store.py
+# Scenario library: save/load/list round trips and the results cache.
+
+import pytest
+
+from app_custo_sublimacao import CostParams, compute_costs
+from app_custo_sublimacao.store import ScenarioStore, params_hash
+
+
+def test_save_load_round_trip(tmp_path):
+    store = ScenarioStore(str(tmp_path / "s.db"))
+    params = CostParams(sell_price=5.25, downtime_h=12.0)
+    sid = store.save(params, "Quote 1", plant="North", customer="ACME", created_at="2024-03-01T10:00:00+00:00")
+    record, loaded = store.load(sid)
+    assert loaded == params
+    assert (record.name, record.plant, record.customer) == ("Quote 1", "North", "ACME")
+    assert record.params_hash == params_hash(params)
+    with pytest.raises(KeyError):
+        store.load(sid + 1)
+
+
+def test_list_filters_and_carries_cached_results(tmp_path):
+    store = ScenarioStore(str(tmp_path / "s.db"))
+    store.save(CostParams(), "old", plant="North", created_at="2024-01-01T00:00:00+00:00")
+    store.save(CostParams(sell_price=6.0), "new", plant="South", created_at="2024-02-01T00:00:00+00:00")
+    assert [r.name for r in store.list()] == ["new", "old"]
+    assert [r.name for r in store.list(plant="North")] == ["old"]
+    assert [r.name for r in store.list(since="2024-01-15")] == ["new"]
+    assert store.list(name_like="ne")[0].profit_m == pytest.approx(compute_costs(CostParams(sell_price=6.0)).profit_m)
+    assert store.distinct("plant") == ["North", "South"]
+    with pytest.raises(ValueError):
+        store.distinct("name")
+
+
+def test_path_comes_from_the_environment_at_construction(tmp_path, monkeypatch):
+    target = tmp_path / "env" / "s.db"
+    monkeypatch.setenv("SUBLIMACAO_STORE", str(target))
+    store = ScenarioStore()
+    store.save(CostParams(), "x")
+    assert store.path == str(target) and target.exists()
+    assert ScenarioStore(":memory:").list() == []